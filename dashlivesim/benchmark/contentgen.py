@@ -0,0 +1,347 @@
+"""Synthetic fMP4 content generator for scale testing.
+
+Writes a VoD package with an MPD, init and media segments, and the .cfg and .dat files
+needed by the live simulator. The segments are built with boxes.py and can have any
+number of samples, bitrates, segment durations and loop lengths, with optional CENC.
+"""
+
+# The copyright in this software is being made available under the BSD License,
+# included below. This software may be subject to other third party and contributor
+# rights, including patent rights, and no such rights are granted under this license.
+#
+# Copyright (c) 2026, Dash Industry Forum.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#  * Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation and/or
+#  other materials provided with the distribution.
+#  * Neither the name of Dash Industry Forum nor the names of its
+#  contributors may be used to endorse or promote products derived from this software
+#  without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS AS IS AND ANY
+#  EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+#  WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+#  INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+#  WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+import os
+import sys
+from collections import namedtuple
+from os.path import join
+from struct import pack
+
+from dashlivesim.dashlib import boxes
+from dashlivesim.dashlib.boxes import Sample, SENCSample, SENCSubsample
+from dashlivesim.dashlib.configprocessor import SEGTIMEFORMAT, VodConfig
+from dashlivesim.dashlib.timeformatconversions import seconds_to_iso_duration
+
+VIDEO_TRACK_ID = 1
+AUDIO_TRACK_ID = 2
+AUDIO_TIMESCALE = 48000
+AAC_FRAME_DURATION = 1024
+DEFAULT_KID = bytes.fromhex("10000000100010001000100000000001")
+COMMON_SYSTEM_ID = bytes.fromhex("1077efecc0b24d02ace33c1e52e2fb4b")
+SPS = bytes.fromhex("6764001facd9405005bb011000000300100000030320f1831960")
+PPS = bytes.fromhex("68ebe3cb22c0")
+AAC_LC_CONFIG = bytes.fromhex("1190")  # AAC-LC, 48kHz, stereo
+I_FRAME_WEIGHT = 8  # Size of the sync sample relative to the other samples in a segment
+
+VideoRep = namedtuple("VideoRep", "id width height bitrate")
+
+MPD_TEMPLATE = """<?xml version="1.0" encoding="utf-8"?>
+<MPD xmlns="urn:mpeg:dash:schema:mpd:2011" xmlns:cenc="urn:mpeg:cenc:2013" \
+profiles="urn:mpeg:dash:profile:isoff-live:2011" type="static" availabilityStartTime="1970-01-01T00:00:00Z" \
+mediaPresentationDuration="{duration}" maxSegmentDuration="PT{seg_dur}S" minBufferTime="PT2S">
+   <Period id="p0">
+{adaptation_sets}   </Period>
+</MPD>
+"""
+
+ADAPTATION_SET_TEMPLATE = """      <AdaptationSet contentType="{content_type}" mimeType="{content_type}/mp4" \
+segmentAlignment="true" startWithSAP="1"{extra}>
+{protection}         <SegmentTemplate initialization="$RepresentationID$/init.mp4" \
+media="$RepresentationID$/$Number$.m4s" timescale="{timescale}" duration="{duration}" startNumber="1"/>
+{representations}      </AdaptationSet>
+"""
+
+PROTECTION_TEMPLATE = """         <ContentProtection schemeIdUri="urn:mpeg:dash:mp4protection:2011" value="cenc" \
+cenc:default_KID="{kid}"/>
+         <ContentProtection schemeIdUri="urn:uuid:{system_id}"/>
+"""
+
+
+class ContentGeneratorError(Exception):
+    "Bad content parameters."
+
+
+class PlaceholderEncryptor(object):
+    """Encryptor for boxes.create_moof, which generates CENC auxiliary information.
+
+    The sample data is left in the clear, since the content is only used for load testing.
+    With subsamples, each sample gets a clear header and an encrypted part of full 16-byte blocks."""
+
+    def __init__(self, subsamples=True):
+        self.subsamples = subsamples
+        self.next_iv = 1
+
+    def encrypt(self, samples):
+        "Return a SENCSample with IV and subsamples for each sample."
+        aux_data = []
+        for sample in samples:
+            subsamples = None
+            if self.subsamples:
+                clear_bytes = 16 + sample.size % 16 if sample.size > 32 else sample.size
+                subsamples = [SENCSubsample(clear_bytes, sample.size - clear_bytes)]
+            aux_data.append(SENCSample(self.next_iv, subsamples))
+            self.next_iv += 1
+        return aux_data
+
+
+def parse_video_rep(rep_id, spec):
+    "Parse a WIDTHxHEIGHT:KBPS representation specification."
+    try:
+        resolution, kbps = spec.split(":")
+        width, height = (int(x) for x in resolution.split("x"))
+        return VideoRep(rep_id, width, height, int(kbps) * 1000)
+    except ValueError:
+        raise ContentGeneratorError("Bad video representation %r (should be WIDTHxHEIGHT:KBPS)" % spec)
+
+
+def avc_level(height):
+    "AVC level indication appropriate for the resolution."
+    if height <= 720:
+        return 31
+    if height <= 1080:
+        return 42
+    return 51
+
+
+def seg_time_entries(durations, start_nr):
+    "Run-length encode segment durations into (start_nr, repeats, start_time, duration) tuples."
+    entries = []
+    start_time = 0
+    for nr, duration in enumerate(durations, start_nr):
+        if entries and entries[-1][3] == duration:
+            entries[-1][1] += 1
+        else:
+            entries.append([nr, 0, start_time, duration])
+        start_time += duration
+    return [tuple(entry) for entry in entries]
+
+
+class ContentGenerator(object):
+    """Generate a complete synthetic VoD package, which can be served by the live simulator.
+
+    The package consists of an MPD, init and media segments for one or more H.264 video
+    representations and optionally one AAC audio representation below content_root/name,
+    and a .cfg file with .dat files for segment timelines in vod_conf_dir."""
+
+    # pylint: disable=too-many-instance-attributes, too-many-arguments
+
+    def __init__(self, name, content_root, vod_conf_dir, video_reps=("1920x1080:6000",), fps=30,
+                 segment_duration=2, nr_segments=30, audio_bitrate=128000, cenc=False, verbose=False):
+        self.name = name
+        self.content_dir = join(content_root, name)
+        self.vod_conf_dir = vod_conf_dir
+        self.video_reps = [parse_video_rep("V%d" % (i + 1), spec) for i, spec in enumerate(video_reps)]
+        self.fps = fps
+        self.segment_duration = segment_duration
+        self.nr_segments = nr_segments
+        self.audio_bitrate = audio_bitrate
+        self.cenc = cenc
+        self.verbose = verbose
+        self.video_timescale = 90000 if 90000 % fps == 0 else fps * 1000
+        self.sample_duration = self.video_timescale // fps
+        self.samples_per_segment = fps * segment_duration
+        self.check()
+
+    def check(self):
+        "Check that the content can be described by the .dat files."
+        if self.nr_segments < 1 or self.samples_per_segment < 1:
+            raise ContentGeneratorError("Need at least one segment with one sample")
+        if self.nr_segments > 0xffff:
+            raise ContentGeneratorError("At most %d segments in loop" % 0xffff)
+        loop_ticks = self.nr_segments * self.samples_per_segment * self.sample_duration
+        if loop_ticks > 0xffffffff:
+            raise ContentGeneratorError("Loop too long for 32-bit segment times at timescale %d" %
+                                        self.video_timescale)
+
+    def generate(self):
+        "Write all files. Return the path of the .cfg file."
+        media_data = {}
+        if self.video_reps:
+            durations = [self.samples_per_segment * self.sample_duration] * self.nr_segments
+            for rep in self.video_reps:
+                self.write_video_rep(rep)
+            media_data['video'] = self.write_dat("video", [rep.id for rep in self.video_reps],
+                                                 self.video_timescale, durations)
+        if self.audio_bitrate:
+            durations = self.write_audio_rep("A1")
+            media_data['audio'] = self.write_dat("audio", ["A1"], AUDIO_TIMESCALE, durations)
+        self.write_mpd()
+        cfg_path = join(self.vod_conf_dir, "%s.cfg" % self.name)
+        VodConfig().write_config(cfg_path, {'first_segment_in_loop': 1, 'nr_segments_in_loop': self.nr_segments,
+                                            'segment_duration_s': self.segment_duration, 'default_tsbd_secs': 300,
+                                            'media_data': media_data})
+        return cfg_path
+
+    def sinf(self, original_format):
+        "Protection scheme information if CENC is on."
+        if not self.cenc:
+            return None
+        return boxes.create_sinf(original_format, DEFAULT_KID)
+
+    def write_init(self, rep_id, moov):
+        "Write an init segment with ftyp and moov (with pssh if CENC is on)."
+        if self.cenc:
+            moov.add_box(boxes.PSSHBox(COMMON_SYSTEM_ID, [DEFAULT_KID]))
+        self.write_file(rep_id, "init.mp4", [boxes.create_ftyp().serialize(), moov.serialize()])
+
+    def write_file(self, rep_id, filename, parts):
+        "Write parts to a file in the representation directory."
+        rep_dir = join(self.content_dir, rep_id)
+        os.makedirs(rep_dir, exist_ok=True)
+        with open(join(rep_dir, filename), "wb") as ofh:
+            for part in parts:
+                ofh.write(part)
+
+    def write_segment(self, rep_id, seg_nr, track_id, samples, encryptor):
+        "Write a styp + moof + mdat media segment."
+        moof = boxes.create_moof(seg_nr, track_id, samples, encryptor)
+        self.write_file(rep_id, "%d.m4s" % seg_nr, [boxes.create_styp().serialize(), moof.serialize(),
+                                                    boxes.create_mdat(samples).serialize()])
+
+    def write_video_rep(self, rep):
+        "Write init and media segments for a video representation."
+        level = avc_level(rep.height)
+        info = boxes.H264Info(VIDEO_TRACK_ID, self.video_timescale, 0, rep.width, rep.height,
+                              100, 0, level, SPS, PPS, self.sinf(b'avc1'))
+        self.write_init(rep.id, boxes.create_moov_h264(info))
+        segment_bytes = rep.bitrate * self.segment_duration // 8
+        p_size = max(segment_bytes // (self.samples_per_segment + I_FRAME_WEIGHT - 1), 16)
+        i_size = max(segment_bytes - p_size * (self.samples_per_segment - 1), 16)
+        i_frame = make_nal_sample(i_size, 0x65)
+        p_frame = make_nal_sample(p_size, 0x41)
+        encryptor = PlaceholderEncryptor() if self.cenc else None
+        for seg_nr in range(1, self.nr_segments + 1):
+            t0 = (seg_nr - 1) * self.samples_per_segment * self.sample_duration
+            samples = [Sample(i_frame if i == 0 else p_frame, t0 + i * self.sample_duration,
+                              self.sample_duration, i == 0)
+                       for i in range(self.samples_per_segment)]
+            self.write_segment(rep.id, seg_nr, VIDEO_TRACK_ID, samples, encryptor)
+            if self.verbose:
+                print("%s %d/%d" % (rep.id, seg_nr, self.nr_segments))
+
+    def write_audio_rep(self, rep_id):
+        "Write init and media segments for an AAC representation. Return the segment durations."
+        esds = boxes.ESDSBox(AAC_LC_CONFIG).serialize()
+        info = boxes.MP4AInfo(AUDIO_TRACK_ID, AUDIO_TIMESCALE, 0, 2, 16, AUDIO_TIMESCALE, esds, AAC_LC_CONFIG,
+                              sinf=self.sinf(b'mp4a'))
+        self.write_init(rep_id, boxes.create_moov_mp4a(info))
+        frame = make_frame(max(self.audio_bitrate * AAC_FRAME_DURATION // AUDIO_TIMESCALE // 8, 8))
+        frames_per_segment = self.segment_duration * AUDIO_TIMESCALE / AAC_FRAME_DURATION
+        encryptor = PlaceholderEncryptor(subsamples=False) if self.cenc else None
+        durations = []
+        for seg_nr in range(1, self.nr_segments + 1):
+            start = int(round((seg_nr - 1) * frames_per_segment))
+            end = int(round(seg_nr * frames_per_segment))
+            samples = [Sample(frame, i * AAC_FRAME_DURATION, AAC_FRAME_DURATION) for i in range(start, end)]
+            self.write_segment(rep_id, seg_nr, AUDIO_TRACK_ID, samples, encryptor)
+            durations.append((end - start) * AAC_FRAME_DURATION)
+        return durations
+
+    def write_dat(self, content_type, rep_ids, timescale, durations):
+        "Write the segment timeline .dat file. Return the media_data entry of the .cfg file."
+        dat_file = "%s_%s.dat" % (self.name, content_type)
+        os.makedirs(self.vod_conf_dir, exist_ok=True)
+        with open(join(self.vod_conf_dir, dat_file), "wb") as ofh:
+            for entry in seg_time_entries(durations, 1):
+                ofh.write(pack(SEGTIMEFORMAT, *entry))
+        return {'representations': rep_ids, 'timescale': timescale, 'totalDuration': sum(durations),
+                'datFile': dat_file}
+
+    def write_mpd(self):
+        "Write a static MPD, which the simulator turns into a live one."
+        protection = ""
+        if self.cenc:
+            kid = DEFAULT_KID.hex()
+            protection = PROTECTION_TEMPLATE.format(
+                kid="%s-%s-%s-%s-%s" % (kid[:8], kid[8:12], kid[12:16], kid[16:20], kid[20:]),
+                system_id=COMMON_SYSTEM_ID.hex())
+        adaptation_sets = ""
+        if self.video_reps:
+            reps = "".join('         <Representation id="%s" codecs="avc1.6400%02x" bandwidth="%d" width="%d" '
+                           'height="%d" frameRate="%d" sar="1:1"/>\n' %
+                           (rep.id, avc_level(rep.height), rep.bitrate, rep.width, rep.height, self.fps)
+                           for rep in self.video_reps)
+            adaptation_sets += ADAPTATION_SET_TEMPLATE.format(
+                content_type="video", extra=' maxFrameRate="%d"' % self.fps, protection=protection,
+                timescale=self.video_timescale, duration=self.segment_duration * self.video_timescale,
+                representations=reps)
+        if self.audio_bitrate:
+            reps = ('         <Representation id="A1" codecs="mp4a.40.2" bandwidth="%d" audioSamplingRate="%d">\n'
+                    '            <AudioChannelConfiguration '
+                    'schemeIdUri="urn:mpeg:dash:23003:3:audio_channel_configuration:2011" value="2"/>\n'
+                    '         </Representation>\n' % (self.audio_bitrate, AUDIO_TIMESCALE))
+            adaptation_sets += ADAPTATION_SET_TEMPLATE.format(
+                content_type="audio", extra=' lang="en"', protection=protection, timescale=AUDIO_TIMESCALE,
+                duration=self.segment_duration * AUDIO_TIMESCALE, representations=reps)
+        mpd = MPD_TEMPLATE.format(duration=seconds_to_iso_duration(self.nr_segments * self.segment_duration),
+                                  seg_dur=self.segment_duration, adaptation_sets=adaptation_sets)
+        os.makedirs(self.content_dir, exist_ok=True)
+        with open(join(self.content_dir, "Manifest.mpd"), "w") as ofh:
+            ofh.write(mpd)
+
+
+def make_nal_sample(size, nal_header):
+    "Sample of size bytes with a single length-prefixed NAL unit."
+    return pack(">IB", size - 4, nal_header) + make_frame(size - 5)
+
+
+def make_frame(size):
+    "Deterministic filler data of size bytes."
+    return (bytes(range(256)) * (size // 256 + 1))[:size]
+
+
+def main():
+    "Generate content from the command line."
+    from argparse import ArgumentParser
+    parser = ArgumentParser(description="Generate synthetic fMP4 VoD content for the live simulator")
+    parser.add_argument("-c", "--content_dir", dest="content_root", required=True, help="content root directory")
+    parser.add_argument("-d", "--config_dir", dest="vod_conf_dir", required=True,
+                        help="configuration root directory")
+    parser.add_argument("-n", "--name", default="synthetic", help="content name")
+    parser.add_argument("--video", action="append", metavar="WxH:KBPS",
+                        help="video representation (repeatable, default 1920x1080:6000)")
+    parser.add_argument("--no-video", action="store_true", help="only audio")
+    parser.add_argument("--fps", type=int, default=30, help="video frame rate (samples per second)")
+    parser.add_argument("--segment-duration", type=int, default=2, help="segment duration in seconds")
+    parser.add_argument("--segments", type=int, default=30, help="number of segments in loop")
+    parser.add_argument("--audio-kbps", type=int, default=128, help="AAC bitrate (0 for no audio)")
+    parser.add_argument("--cenc", action="store_true", help="add CENC signaling and auxiliary information")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+
+    video_reps = [] if args.no_video else (args.video or ["1920x1080:6000"])
+    try:
+        generator = ContentGenerator(args.name, args.content_root, args.vod_conf_dir, video_reps, args.fps,
+                                     args.segment_duration, args.segments, args.audio_kbps * 1000, args.cenc,
+                                     args.verbose)
+    except ContentGeneratorError as exc:
+        parser.error(str(exc))
+    print("Wrote %s" % generator.generate())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
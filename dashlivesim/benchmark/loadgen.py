@@ -0,0 +1,612 @@
+"""Load generator emulating DASH players.
+
+N players fetch the MPD every minimumUpdatePeriod, start at the live edge, fetch the init
+and media segments of each adaptation set as they become available, switch representations
+at random, and use low-latency chunked delivery when the MPD has availabilityTimeOffset.
+They run against mod_dashlivesim.application in-process on a virtual clock, or against a
+local standalone server over HTTP. Throughput, latency, 404 rates and chunk arrival lateness
+are reported.
+"""
+
+# The copyright in this software is being made available under the BSD License,
+# included below. This software may be subject to other third party and contributor
+# rights, including patent rights, and no such rights are granted under this license.
+#
+# Copyright (c) 2026, Dash Industry Forum.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#  * Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation and/or
+#  other materials provided with the distribution.
+#  * Neither the name of Dash Industry Forum nor the names of its
+#  contributors may be used to endorse or promote products derived from this software
+#  without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS AS IS AND ANY
+#  EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+#  WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+#  INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+#  WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+
+import http.client
+import json
+import platform
+import random
+import re
+import sys
+import threading
+from collections import Counter, namedtuple
+from os.path import dirname
+from struct import unpack
+from time import perf_counter, strftime
+from urllib.parse import urlparse
+from xml.etree import ElementTree
+
+from dashlivesim.dashlib.clock import CLOCK_ENVIRON_KEY, SYSTEM_CLOCK, VirtualClock, parse_start_time
+from dashlivesim.dashlib.dash_namespace import add_ns
+from dashlivesim.dashlib.timeformatconversions import iso_duration_to_seconds, TimeFormatConversionError
+from dashlivesim.benchmark.wsgibench import CONTENT_ROOT, VOD_CONFIG_DIR, git_commit, make_environ, percentile, \
+    summarize
+from dashlivesim.mod_wsgi import mod_dashlivesim
+
+DEFAULT_MPDS = ["/livesim/testpic/Manifest.mpd"]
+RETRY_INTERVAL_IN_S = 1.0  # Wait before fetching a failed MPD again
+MAX_BEHIND_SEGMENTS = 5  # Jump to the live edge if this far behind
+READ_SIZE = 65536
+
+RE_TEMPLATE_ID = re.compile(r"\$(RepresentationID|Number|Time|Bandwidth)(%0(\d+)d)?\$")
+
+Template = namedtuple("Template", "media initialization timescale duration start_number pto ato timeline")
+Adaptation = namedtuple("Adaptation", "content_type reps template")
+Manifest = namedtuple("Manifest", "ast mup period_start base_path adaptations")
+
+
+class LoadGenError(Exception):
+    "Error in the load generator."
+
+
+def parse_duration(value, default=None):
+    "Seconds of an ISO 8601 duration, or default for durations beyond hours, like P100Y."
+    if value is None:
+        return default
+    try:
+        return iso_duration_to_seconds(value)
+    except TimeFormatConversionError:
+        return default
+
+
+def parse_template(elem):
+    "Template from a SegmentTemplate element. timeline is (nr_segments, last_t, last_d) or None."
+    timescale = int(elem.get("timescale", 1))
+    ato = elem.get("availabilityTimeOffset", "0")
+    ato = 0.0 if ato.upper() == "INF" else float(ato)
+    timeline = None
+    timeline_elem = elem.find(add_ns("SegmentTimeline"))
+    if timeline_elem is not None:
+        nr_segments, t, d = 0, 0, 0
+        for s_elem in timeline_elem.findall(add_ns("S")):
+            if s_elem.get("t") is not None:
+                t = int(s_elem.get("t"))
+            elif nr_segments > 0:
+                t += d
+            d = int(s_elem.get("d"))
+            repeat = int(s_elem.get("r", 0))
+            t += repeat * d
+            nr_segments += repeat + 1
+        timeline = (nr_segments, t, d)
+    duration = elem.get("duration")
+    return Template(elem.get("media"), elem.get("initialization"), timescale,
+                    int(duration) if duration is not None else None, int(elem.get("startNumber", 1)),
+                    int(elem.get("presentationTimeOffset", 0)), ato, timeline)
+
+
+def parse_mpd(data, mpd_path):
+    "Manifest with the adaptation sets of the last period of a live MPD."
+    root = ElementTree.fromstring(data)
+    ast = parse_start_time(root.get("availabilityStartTime", "1970-01-01T00:00:00Z"))
+    mup = None
+    if root.get("type") == "dynamic":
+        mup = parse_duration(root.get("minimumUpdatePeriod"))
+    base_path = dirname(mpd_path) + "/"
+    base_url = root.find(add_ns("BaseURL"))
+    if base_url is not None and base_url.text:
+        base_path = urlparse(base_url.text.strip()).path or base_path
+    periods = root.findall(add_ns("Period"))
+    if not periods:
+        raise LoadGenError("No Period in %s" % mpd_path)
+    period = periods[-1]
+    adaptations = []
+    for as_elem in period.findall(add_ns("AdaptationSet")):
+        template_elem = as_elem.find(add_ns("SegmentTemplate"))
+        reps = [(rep.get("id"), int(rep.get("bandwidth", 0))) for rep in as_elem.findall(add_ns("Representation"))]
+        if template_elem is None or not reps:
+            continue
+        content_type = as_elem.get("contentType") or as_elem.get("mimeType", "").split("/")[0]
+        adaptations.append(Adaptation(content_type, reps, parse_template(template_elem)))
+    return Manifest(ast, mup, parse_duration(period.get("start"), 0), base_path, adaptations)
+
+
+def fill_template(template, rep_id, bandwidth, number=0, time=0):
+    "Replace the $...$ identifiers of a SegmentTemplate string."
+    values = {"RepresentationID": rep_id, "Number": number, "Time": time, "Bandwidth": bandwidth}
+
+    def replace(match):
+        value = values[match.group(1)]
+        if match.group(3):
+            return "%0*d" % (int(match.group(3)), value)
+        return str(value)
+    return RE_TEMPLATE_ID.sub(replace, template)
+
+
+class ChunkTimer(object):
+    "Record the clock time when each top-level mdat box of a streamed response is complete."
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.times = []
+        self._header = b""
+        self._remaining = 0  # Bytes left of the current box
+        self._boxtype = None
+
+    def feed(self, data):
+        "Feed the next part of the response."
+        pos = 0
+        while pos < len(data):
+            if self._remaining == 0:
+                missing = 8 - len(self._header)
+                self._header += data[pos:pos + missing]
+                pos += missing
+                if len(self._header) < 8:
+                    return
+                size, self._boxtype = unpack(">I4s", self._header)
+                self._header = b""
+                self._remaining = size - 8 if size >= 8 else float("inf")  # No tracking of 64-bit sizes
+            else:
+                nr_bytes = min(self._remaining, len(data) - pos)
+                pos += nr_bytes
+                self._remaining -= nr_bytes
+            if self._remaining == 0 and self._boxtype == b"mdat":
+                self.times.append(self.clock.time())
+
+
+class InProcessSession(object):
+    "Requests to mod_dashlivesim.application in this process, running on clock."
+
+    def __init__(self, clock, content_root=CONTENT_ROOT, vod_conf_dir=VOD_CONFIG_DIR):
+        self.clock = clock
+        self.content_root = content_root
+        self.vod_conf_dir = vod_conf_dir
+
+    def get(self, path, on_data):
+        "Request path and pass the body parts to on_data. Return the HTTP status code."
+        environ = make_environ(path, self.content_root, self.vod_conf_dir)
+        environ[CLOCK_ENVIRON_KEY] = self.clock
+        response = {}
+
+        def start_response(status, headers):
+            response['status'] = status
+            return on_data
+
+        result = mod_dashlivesim.application(environ, start_response)
+        try:
+            for part in result:
+                if part:
+                    on_data(part)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return int(response['status'].split()[0])
+
+    def close(self):
+        "Nothing to release."
+
+
+class HttpSession(object):
+    "Requests over one keep-alive HTTP connection, which is reopened when the server closes it."
+
+    def __init__(self, host, port, timeout=30):
+        self.conn = http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def get(self, path, on_data):
+        "Request path and pass the body parts to on_data as they arrive. Return the status code, or 0 on errors."
+        try:
+            self.conn.request("GET", path)
+            response = self.conn.getresponse()
+            while True:
+                data = response.read1(READ_SIZE)
+                if not data:
+                    break
+                on_data(data)
+            return response.status
+        except (OSError, http.client.HTTPException):
+            self.conn.close()
+            return 0
+
+    def close(self):
+        "Close the connection."
+        self.conn.close()
+
+
+def timed_get(session, path, on_data=None):
+    "Request path on session. Return (status, nr_bytes, time to first byte, time to last byte)."
+    nr_bytes = [0]
+    first_byte = []
+
+    def receive(data):
+        if not first_byte:
+            first_byte.append(perf_counter())
+        nr_bytes[0] += len(data)
+        if on_data is not None:
+            on_data(data)
+
+    start = perf_counter()
+    status = session.get(path, receive)
+    end = perf_counter()
+    return status, nr_bytes[0], (first_byte[0] if first_byte else end) - start, end - start
+
+
+class LoadStats(object):
+    "Thread-safe collection of request results and chunk lateness."
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}  # resource -> time to first byte in seconds
+        self.durations = {}  # resource -> time to last byte in seconds
+        self.statuses = {}  # resource -> Counter of status codes
+        self.nr_bytes = 0
+        self.lateness = []  # Chunk arrival minus nominal chunk end in media seconds
+        self.resyncs = 0
+
+    def add(self, resource, status, nr_bytes, ttfb, duration):
+        "Add the result of one request."
+        with self._lock:
+            self.statuses.setdefault(resource, Counter())[status] += 1
+            self.nr_bytes += nr_bytes
+            if status == 200:
+                self.latencies.setdefault(resource, []).append(ttfb)
+                self.durations.setdefault(resource, []).append(duration)
+
+    def add_lateness(self, values):
+        "Add the lateness of the chunks of one segment."
+        with self._lock:
+            self.lateness.extend(values)
+
+    def add_resync(self):
+        "Count a jump to the live edge."
+        with self._lock:
+            self.resyncs += 1
+
+    def report(self, elapsed):
+        "JSON-serializable summary for a run of elapsed real seconds."
+        with self._lock:
+            resources = {}
+            totals = Counter()
+            for resource, statuses in sorted(self.statuses.items()):
+                summary = summarize(self.latencies.get(resource, []), elapsed)
+                summary['p99_duration_us'] = round(percentile(sorted(self.durations.get(resource, [])), 0.99) * 1e6, 1)
+                summary['statuses'] = {str(code): count for code, count in sorted(statuses.items())}
+                resources[resource] = summary
+                totals.update(statuses)
+            nr_requests = sum(totals.values())
+            lateness = sorted(self.lateness)
+            return {'total': {'requests': nr_requests,
+                              'requests_per_s': round(nr_requests / elapsed, 1) if elapsed > 0 else 0,
+                              'mbit_per_s': round(self.nr_bytes * 8e-6 / elapsed, 2) if elapsed > 0 else 0,
+                              'not_found_rate': round(totals[404] / nr_requests, 4) if nr_requests else 0,
+                              'error_rate': round((nr_requests - totals[200] - totals[404]) / nr_requests, 4)
+                              if nr_requests else 0,
+                              'resyncs': self.resyncs},
+                    'resources': resources,
+                    'chunk_lateness': {'chunks': len(lateness),
+                                       'p50_ms': round(percentile(lateness, 0.5) * 1e3, 1),
+                                       'p99_ms': round(percentile(lateness, 0.99) * 1e3, 1),
+                                       'max_ms': round(lateness[-1] * 1e3, 1) if lateness else 0}}
+
+
+class Track(object):
+    """Segment fetching for one adaptation set of a player.
+
+    The next segment is tracked by both number and media time, so that $Number$ and
+    $Time$ templates work with and without SegmentTimeline."""
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, player, index, manifest, now):
+        self.player = player
+        self.index = index
+        self.manifest = manifest
+        adaptation = manifest.adaptations[index]
+        self.resource = "media_%s" % adaptation.content_type
+        self.rep_index = player.rng.randrange(len(adaptation.reps))
+        self.inits = set()  # Representations whose init segment has been fetched
+        self.number = self.time = 0
+        self.go_live(now)
+
+    @property
+    def adaptation(self):
+        "The adaptation set in the current manifest."
+        return self.manifest.adaptations[self.index]
+
+    def seg_duration(self, template):
+        "Duration of the next segment in timescale units."
+        return template.timeline[2] if template.timeline is not None else template.duration
+
+    def go_live(self, now):
+        "Move to the newest segment that is available at now."
+        manifest = self.manifest
+        template = self.adaptation.template
+        if template.timeline is not None:
+            nr_segments, self.time, _ = template.timeline
+            self.number = template.start_number + nr_segments - 1
+        else:
+            media_now = (now - manifest.ast - manifest.period_start + template.ato) * template.timescale
+            self.number = template.start_number + max(int(media_now // template.duration) - 1, 0)
+            self.time = template.pto + (self.number - template.start_number) * template.duration
+        while self.available_at() > now and self.number > template.start_number:
+            self.number -= 1
+            self.time -= self.seg_duration(template)
+
+    def update(self, manifest):
+        "Switch to a refreshed manifest."
+        old_adaptations = self.manifest.adaptations
+        if self.index >= len(manifest.adaptations) or len(manifest.adaptations) != len(old_adaptations):
+            return
+        self.manifest = manifest
+        template = self.adaptation.template
+        if template.timeline is None:
+            self.time = template.pto + (self.number - template.start_number) * template.duration
+
+    def seg_start(self):
+        "Wall-clock start of the next segment."
+        template = self.adaptation.template
+        return (self.manifest.ast + self.manifest.period_start +
+                (self.time - template.pto) / float(template.timescale))
+
+    def available_at(self):
+        "Wall-clock time when the next segment can be requested."
+        template = self.adaptation.template
+        return self.seg_start() + self.seg_duration(template) / float(template.timescale) - template.ato
+
+    def step(self, session, now):
+        "Fetch all segments that are due. Return the time of the next one."
+        template = self.adaptation.template
+        seg_dur = self.seg_duration(template) / float(template.timescale)
+        if now - self.available_at() > MAX_BEHIND_SEGMENTS * seg_dur:
+            self.player.stats.add_resync()
+            self.go_live(now)
+        while self.available_at() <= now and not self.player.stopped(now):
+            reps = self.adaptation.reps
+            if len(reps) > 1 and self.player.rng.random() < self.player.switch_probability:
+                self.rep_index = (self.rep_index + self.player.rng.randrange(1, len(reps))) % len(reps)
+            rep_id, bandwidth = reps[self.rep_index % len(reps)]
+            if rep_id not in self.inits:
+                path = self.manifest.base_path + fill_template(template.initialization, rep_id, bandwidth)
+                if self.player.fetch(session, "init", path) == 200:
+                    self.inits.add(rep_id)
+            path = self.manifest.base_path + fill_template(template.media, rep_id, bandwidth, self.number, self.time)
+            chunk_timer = ChunkTimer(self.player.clock) if template.ato > 0 else None
+            self.player.fetch(session, self.resource, path, chunk_timer)
+            if chunk_timer is not None and chunk_timer.times:
+                chunk_dur = seg_dur / len(chunk_timer.times)
+                seg_start = self.seg_start()
+                self.player.stats.add_lateness([t - (seg_start + (i + 1) * chunk_dur)
+                                                for i, t in enumerate(chunk_timer.times)])
+            self.number += 1
+            self.time += self.seg_duration(template)
+            now = self.player.clock.time()
+        return self.available_at()
+
+    def run(self, end_time):
+        "Fetch segments until end_time."
+        session = self.player.make_session()
+        try:
+            clock = self.player.clock
+            while True:
+                now = clock.time()
+                if now >= end_time:
+                    break
+                wake = self.step(session, now)
+                clock.sleep(min(wake, end_time) - clock.time())
+        finally:
+            session.close()
+
+
+class Player(object):
+    """Emulated DASH player.
+
+    It fetches the MPD every minimumUpdatePeriod, starts at the live edge, and has one
+    thread per adaptation set that fetches the init segment of each new representation
+    and the media segments as soon as they are available. With availabilityTimeOffset,
+    segments are requested early and the arrival of their chunks is timed. The
+    representation is switched at random with switch_probability per segment."""
+
+    # pylint: disable=too-many-arguments, too-many-instance-attributes
+
+    def __init__(self, player_id, mpd_path, make_session, clock, stats, switch_probability=0.1, seed=0):
+        self.player_id = player_id
+        self.mpd_path = mpd_path
+        self.make_session = make_session
+        self.clock = clock
+        self.stats = stats
+        self.switch_probability = switch_probability
+        self.rng = random.Random(seed * 100003 + player_id)
+        self.end_time = None
+        self.tracks = []
+
+    def stopped(self, now):
+        "True if the run is over."
+        return now >= self.end_time
+
+    def fetch(self, session, resource, path, chunk_timer=None, body=None):
+        """Request path and record the result in stats. Return the status code.
+
+        The body parts are fed to chunk_timer and appended to body, if given."""
+        # pylint: disable=too-many-arguments
+
+        def on_data(data):
+            if chunk_timer is not None:
+                chunk_timer.feed(data)
+            if body is not None:
+                body.append(data)
+
+        status, nr_bytes, ttfb, duration = timed_get(session, path, on_data)
+        self.stats.add(resource, status, nr_bytes, ttfb, duration)
+        return status
+
+    def fetch_mpd(self, session):
+        "Fetch and parse the MPD. Return the manifest or None."
+        body = []
+        if self.fetch(session, "mpd", self.mpd_path, body=body) != 200:
+            return None
+        return parse_mpd(b"".join(body), self.mpd_path)
+
+    def run(self, start_delay, end_time):
+        "Play from start_delay seconds from now until end_time."
+        self.end_time = end_time
+        self.clock.sleep(start_delay)
+        session = self.make_session()
+        threads = []
+        try:
+            manifest = None
+            while manifest is None and self.clock.time() < end_time:
+                manifest = self.fetch_mpd(session)
+                if manifest is None:
+                    self.clock.sleep(RETRY_INTERVAL_IN_S)
+            if manifest is None:
+                return
+            now = self.clock.time()
+            self.tracks = [Track(self, index, manifest, now) for index in range(len(manifest.adaptations))]
+            for track in self.tracks:
+                thread = threading.Thread(target=track.run, args=(end_time,), daemon=True)
+                thread.start()
+                threads.append(thread)
+            min_seg_dur = min(t.seg_duration(t.adaptation.template) / float(t.adaptation.template.timescale)
+                              for t in self.tracks) if self.tracks else RETRY_INTERVAL_IN_S
+            while manifest.mup is not None:
+                next_fetch = self.clock.time() + max(manifest.mup, min_seg_dur)
+                if next_fetch >= end_time:
+                    break
+                self.clock.sleep(next_fetch - self.clock.time())
+                new_manifest = self.fetch_mpd(session)
+                if new_manifest is not None:
+                    manifest = new_manifest
+                    for track in self.tracks:
+                        track.update(manifest)
+        finally:
+            for thread in threads:
+                thread.join()
+            session.close()
+
+
+def run_load(nr_players=10, duration=60, mpd_paths=None, server=None, speed=1.0, clock_start=None, ramp_up=10,
+             switch_probability=0.1, seed=0, content_root=CONTENT_ROOT, vod_conf_dir=VOD_CONFIG_DIR):
+    """Run nr_players players for duration seconds of clock time and return a JSON-serializable report.
+
+    With server as (host, port), the players run on the system clock against a local HTTP server.
+    Otherwise, they run in-process on a VirtualClock starting at clock_start (default now) with speed."""
+    # pylint: disable=too-many-arguments, too-many-locals
+    mpd_paths = mpd_paths or DEFAULT_MPDS
+    if server is not None:
+        clock = SYSTEM_CLOCK
+
+        def make_session():
+            return HttpSession(*server)
+    else:
+        clock = VirtualClock(clock_start, speed)
+
+        def make_session():
+            return InProcessSession(clock, content_root, vod_conf_dir)
+    stats = LoadStats()
+    start = clock.time()
+    end_time = start + duration
+    players = [Player(i, mpd_paths[i % len(mpd_paths)], make_session, clock, stats, switch_probability, seed)
+               for i in range(nr_players)]
+    threads = [threading.Thread(target=player.run, args=(ramp_up * i / float(nr_players), end_time), daemon=True)
+               for i, player in enumerate(players)]
+    real_start = perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = perf_counter() - real_start
+    report = stats.report(elapsed)
+    report['meta'] = {'commit': git_commit(), 'time': strftime("%Y-%m-%dT%H:%M:%S%z"),
+                      'python': platform.python_version(), 'players': nr_players, 'duration': duration,
+                      'speed': 1.0 if server is not None else speed, 'ramp_up': ramp_up,
+                      'mpds': mpd_paths, 'server': "%s:%d" % server if server is not None else None,
+                      'elapsed': round(elapsed, 3)}
+    return report
+
+
+def format_report(report):
+    "Lines summarizing a report."
+    total = report['total']
+    lines = ["%d requests, %.1f req/s, %.2f Mbit/s, 404 rate %.2f%%, error rate %.2f%%, %d resyncs" %
+             (total['requests'], total['requests_per_s'], total['mbit_per_s'], total['not_found_rate'] * 100,
+              total['error_rate'] * 100, total['resyncs'])]
+    for resource, summary in report['resources'].items():
+        statuses = " ".join("%s:%d" % item for item in summary['statuses'].items())
+        lines.append("%-14s ttfb p50 %8.1f us  p99 %8.1f us  last byte p99 %10.1f us  %s" %
+                     (resource, summary['p50_us'], summary['p99_us'], summary['p99_duration_us'], statuses))
+    lateness = report['chunk_lateness']
+    if lateness['chunks']:
+        lines.append("chunk lateness p50 %.1f ms  p99 %.1f ms  max %.1f ms (%d chunks)" %
+                     (lateness['p50_ms'], lateness['p99_ms'], lateness['max_ms'], lateness['chunks']))
+    return lines
+
+
+def parse_server(value):
+    "(host, port) from host:port or an http URL."
+    if "//" not in value:
+        value = "http://" + value
+    parsed = urlparse(value)
+    if not parsed.hostname:
+        raise LoadGenError("Bad server %r" % value)
+    return parsed.hostname, parsed.port or 80
+
+
+def main():
+    "Run the load generator from the command line."
+    from argparse import ArgumentParser
+    parser = ArgumentParser(description="Emulate DASH players fetching live content")
+    parser.add_argument("-n", "--players", type=int, default=10, help="number of players")
+    parser.add_argument("-t", "--duration", type=float, default=60, help="seconds of clock time to play")
+    parser.add_argument("--ramp-up", type=float, default=10, help="seconds over which players are started")
+    parser.add_argument("-m", "--mpd", action="append", dest="mpds",
+                        help="MPD path, e.g. /livesim/chunkdur_1/ato_5/testpic/Manifest.mpd (repeatable, "
+                             "players are spread over them)")
+    parser.add_argument("--server", help="host:port of a standalone server (default is in-process)")
+    parser.add_argument("-c", "--content_dir", default=CONTENT_ROOT, help="content root directory for in-process")
+    parser.add_argument("-d", "--config_dir", default=VOD_CONFIG_DIR, help="configuration directory for in-process")
+    parser.add_argument("--clock_start", help="in-process start time (seconds since epoch or ISO 8601)")
+    parser.add_argument("--clock_speed", type=float, default=1.0, help="in-process seconds per real second")
+    parser.add_argument("--switch-probability", type=float, default=0.1,
+                        help="probability of a representation switch per segment")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the random switching")
+    parser.add_argument("-o", "--output", help="JSON result file")
+    args = parser.parse_args()
+
+    server = parse_server(args.server) if args.server else None
+    clock_start = parse_start_time(args.clock_start) if args.clock_start else None
+    report = run_load(args.players, args.duration, args.mpds, server, args.clock_speed, clock_start, args.ramp_up,
+                      args.switch_probability, args.seed, args.content_dir, args.config_dir)
+    print("\n".join(format_report(report)))
+    if args.output:
+        with open(args.output, "w") as ofh:
+            json.dump(report, ofh, indent=2)
+        print("Wrote %s" % args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,250 @@
+"""Replay of access logs against the simulator.
+
+GET requests are read from Apache or standalone server access logs and replayed with
+their logged times on a virtual clock that starts at the first request, so that the live
+segment numbers in the URLs are valid again. The replay runs in-process through
+mod_dashlivesim.application or over HTTP against a local server, at the logged pace, faster,
+or as fast as possible. Latency and status codes are reported per URL pattern, and can be
+compared with a recorded baseline.
+"""
+
+# The copyright in this software is being made available under the BSD License,
+# included below. This software may be subject to other third party and contributor
+# rights, including patent rights, and no such rights are granted under this license.
+#
+# Copyright (c) 2026, Dash Industry Forum.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#  * Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation and/or
+#  other materials provided with the distribution.
+#  * Neither the name of Dash Industry Forum nor the names of its
+#  contributors may be used to endorse or promote products derived from this software
+#  without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS AS IS AND ANY
+#  EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+#  WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+#  INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+#  WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+
+import json
+import re
+import sys
+import threading
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from time import perf_counter
+
+from dashlivesim.dashlib.clock import VirtualClock
+from dashlivesim.benchmark.loadgen import HttpSession, InProcessSession, LoadStats, parse_server, timed_get
+from dashlivesim.benchmark.wsgibench import CONTENT_ROOT, VOD_CONFIG_DIR, git_commit
+
+RE_LOG_LINE = re.compile(r'^\S+ \S+ \S+ \[(?P<time>[^\]]+)\] '
+                         r'"(?P<method>[A-Z]+) (?P<path>\S+)[^"]*" (?P<status>\d{3}) ')
+LOG_TIME_FORMATS = ("%d/%b/%Y:%H:%M:%S %z",  # Apache
+                    "%d/%b/%Y %H:%M:%S")  # wsgiref in the standalone server, local time
+RE_LAST_NUMBER = re.compile(r"^(t?)\d+(\.\w+)$")
+RE_PERIOD = re.compile(r"\+p\d+\.period$")
+RE_LONG_NUMBER = re.compile(r"\d{6,}")
+
+LogEntry = namedtuple("LogEntry", "time path status")
+
+
+def parse_log_time(value):
+    "Seconds since the epoch of an access log time."
+    for time_format in LOG_TIME_FORMATS:
+        try:
+            return datetime.strptime(value, time_format).timestamp()
+        except ValueError:
+            pass
+    return None
+
+
+def read_log(lines, include=None):
+    """Generate the LogEntries of the GET requests in lines, sorted by time.
+
+    Requests within the same second are spread evenly over it, in log order. include is
+    an optional regular expression that the paths must match."""
+    include_re = re.compile(include) if include else None
+    entries = []
+    for line in lines:
+        match = RE_LOG_LINE.match(line)
+        if not match or match.group("method") != "GET":
+            continue
+        if include_re is not None and not include_re.search(match.group("path")):
+            continue
+        log_time = parse_log_time(match.group("time"))
+        if log_time is not None:
+            entries.append(LogEntry(log_time, match.group("path"), int(match.group("status"))))
+    entries.sort(key=lambda entry: entry.time)
+    pos = 0
+    while pos < len(entries):
+        end = pos
+        while end < len(entries) and entries[end].time == entries[pos].time:
+            end += 1
+        for i in range(pos, end):
+            yield entries[i]._replace(time=entries[i].time + (i - pos) / float(end - pos))
+        pos = end
+
+
+def url_pattern(path):
+    """Group a request path with others that differ only in segment numbers, times and the like.
+
+    The URL options are kept, so that each combination of options is its own pattern."""
+    parts = path.split("?")[0].split("/")
+    parts[-1] = RE_PERIOD.sub("+p$Number$.period", RE_LAST_NUMBER.sub(r"\1$Number$\2", parts[-1]))
+    if parts[-1].startswith("t$Number$"):
+        parts[-1] = "t$Time$" + parts[-1][len("t$Number$"):]
+    return "/".join([RE_LONG_NUMBER.sub("N", part) for part in parts[:-1]] + parts[-1:])
+
+
+class Replay(object):
+    """Replay of log entries with stats per URL pattern.
+
+    With speed 0 and no server, every request runs on a stopped clock at its logged time,
+    one after the other without waiting. Otherwise, requests are started by a pool of workers
+    at their logged time on a clock that runs speed times faster than real time."""
+
+    # pylint: disable=too-many-arguments
+
+    def __init__(self, speed=1.0, server=None, workers=16, content_root=CONTENT_ROOT, vod_conf_dir=VOD_CONFIG_DIR):
+        if server is not None and speed == 0:
+            raise ValueError("Replay over HTTP needs a running clock")
+        self.speed = speed
+        self.server = server
+        self.workers = workers
+        self.content_root = content_root
+        self.vod_conf_dir = vod_conf_dir
+        self.stats = LoadStats()
+        self.mismatches = Counter()  # pattern -> responses with another status than logged
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _session(self, clock):
+        "Session of the current worker thread."
+        if self.server is None:
+            return InProcessSession(clock, self.content_root, self.vod_conf_dir)
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = HttpSession(*self.server)
+        return session
+
+    def request(self, entry, clock):
+        "Replay one entry and record the result."
+        pattern = url_pattern(entry.path)
+        status, nr_bytes, ttfb, duration = timed_get(self._session(clock), entry.path)
+        self.stats.add(pattern, status, nr_bytes, ttfb, duration)
+        if status != entry.status:
+            with self._lock:
+                self.mismatches[pattern] += 1
+
+    def run(self, entries):
+        "Replay entries, which are sorted by time. Return a JSON-serializable report."
+        nr_requests = 0
+        start = perf_counter()
+        if self.speed == 0:
+            for entry in entries:
+                self.request(entry, VirtualClock(entry.time, speed=0))
+                nr_requests += 1
+        else:
+            clock = None
+            with ThreadPoolExecutor(self.workers) as executor:
+                for entry in entries:
+                    if clock is None:
+                        clock = VirtualClock(entry.time, self.speed)
+                    clock.sleep(entry.time - clock.time())
+                    executor.submit(self.request, entry, clock)
+                    nr_requests += 1
+        report = self.stats.report(perf_counter() - start)
+        del report['chunk_lateness']
+        for pattern, summary in report['resources'].items():
+            summary['status_mismatches'] = self.mismatches[pattern]
+        report['total']['status_mismatches'] = sum(self.mismatches.values())
+        report['meta'] = {'commit': git_commit(), 'speed': self.speed, 'requests': nr_requests,
+                          'server': "%s:%d" % self.server if self.server is not None else None}
+        return report
+
+
+def compare(report, baseline):
+    "Return lines comparing the latencies per pattern of report with those of a baseline report."
+    old = baseline['resources']
+    lines = ["%-60s %10s %10s %7s %10s %10s" % ("pattern", "base p50", "p50", "ratio", "base p99", "p99")]
+    for pattern, summary in sorted(report['resources'].items()):
+        if pattern in old and summary['requests'] and old[pattern]['requests']:
+            base = old[pattern]
+            lines.append("%-60s %10.1f %10.1f %7.2f %10.1f %10.1f" %
+                         (pattern, base['p50_us'], summary['p50_us'],
+                          summary['p50_us'] / base['p50_us'] if base['p50_us'] else 0,
+                          base['p99_us'], summary['p99_us']))
+    return lines
+
+
+def format_report(report):
+    "Lines summarizing a report."
+    total = report['total']
+    lines = ["%d requests, %.1f req/s, 404 rate %.2f%%, %d status mismatches with the log" %
+             (total['requests'], total['requests_per_s'], total['not_found_rate'] * 100, total['status_mismatches'])]
+    for pattern, summary in sorted(report['resources'].items(), key=lambda item: -item[1]['requests']):
+        lines.append("%-60s %6d  p50 %8.1f us  p99 %8.1f us  mismatches %d" %
+                     (pattern, sum(summary['statuses'].values()), summary['p50_us'], summary['p99_us'],
+                      summary['status_mismatches']))
+    return lines
+
+
+def main():
+    "Replay access logs from the command line."
+    from argparse import ArgumentParser
+    parser = ArgumentParser(description="Replay access logs against the simulator")
+    parser.add_argument("logs", nargs="+", help="Apache or standalone server access log files")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="replay speed relative to the log (0 is as fast as possible, in-process only)")
+    parser.add_argument("--server", help="host:port of a standalone server (default is in-process)")
+    parser.add_argument("--workers", type=int, default=16, help="concurrent requests")
+    parser.add_argument("--include", help="only replay paths matching this regular expression")
+    parser.add_argument("-c", "--content_dir", default=CONTENT_ROOT, help="content root directory for in-process")
+    parser.add_argument("-d", "--config_dir", default=VOD_CONFIG_DIR, help="configuration directory for in-process")
+    parser.add_argument("-o", "--output", help="JSON result file")
+    parser.add_argument("--compare", help="JSON result file of an earlier replay to compare with")
+    args = parser.parse_args()
+
+    lines = []
+    for log_file in args.logs:
+        with open(log_file, errors="replace") as ifh:
+            lines.extend(ifh)
+    entries = list(read_log(lines, args.include))
+    if not entries:
+        print("No GET requests found")
+        return 1
+    server = parse_server(args.server) if args.server else None
+    if server is not None:
+        print("Replaying from %d. The server must run with --clock_start %d --clock_speed %g" %
+              (entries[0].time, entries[0].time, args.speed))
+    replay = Replay(args.speed, server, args.workers, args.content_dir, args.config_dir)
+    report = replay.run(entries)
+    print("\n".join(format_report(report)))
+    if args.output:
+        with open(args.output, "w") as ofh:
+            json.dump(report, ofh, indent=2)
+        print("Wrote %s" % args.output)
+    if args.compare:
+        with open(args.compare) as ifh:
+            baseline = json.load(ifh)
+        print()
+        print("\n".join(compare(report, baseline)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+"""Microbenchmarks of the mp4 box parser and the boxes fMP4 serializer.
+
+The cases are run on synthetic segments with 10 to 10000 samples, built with boxes.py,
+and the best time per call is reported, also normalized per sample.
+"""
+
+# The copyright in this software is being made available under the BSD License,
+# included below. This software may be subject to other third party and contributor
+# rights, including patent rights, and no such rights are granted under this license.
+#
+# Copyright (c) 2026, Dash Industry Forum.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#  * Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation and/or
+#  other materials provided with the distribution.
+#  * Neither the name of Dash Industry Forum nor the names of its
+#  contributors may be used to endorse or promote products derived from this software
+#  without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS AS IS AND ANY
+#  EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+#  WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+#  INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+#  WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+import json
+import sys
+import timeit
+from collections import namedtuple
+
+from dashlivesim.benchmark.wsgibench import git_commit
+from dashlivesim.dashlib import mp4 as mp4_module
+from dashlivesim.dashlib.boxes import Sample, TRUNBox, create_moof, create_mdat, create_styp
+from dashlivesim.dashlib.chunker import decode_fragment
+from dashlivesim.dashlib.mp4 import mp4
+from dashlivesim.dashlib.mediasegmentfilter import MediaSegmentFilter
+from dashlivesim.dashlib.structops import uint32_to_str
+from dashlivesim.tests.dash_test_util import make_saio_moof
+
+SAMPLE_COUNTS = (10, 100, 1000, 10000)
+SAMPLE_SIZE = 100
+SAMPLE_DURATION = 3000  # 30 fps in 90kHz
+TRACK_ID = 1
+
+Case = namedtuple("Case", "name setup run")
+
+
+def make_samples(nr_samples, sample_size=SAMPLE_SIZE, start_time=0):
+    "Samples of a synthetic video track with a sync sample every 60 samples and B-frame time offsets."
+    payload = bytes(range(256)) * (sample_size // 256 + 1)
+    return [Sample(payload[i % 256:i % 256 + sample_size], start_time + i * SAMPLE_DURATION, SAMPLE_DURATION,
+                   i % 60 == 0, (i % 3) * SAMPLE_DURATION)
+            for i in range(nr_samples)]
+
+
+def make_segment(nr_samples, sample_size=SAMPLE_SIZE, seq_nr=1):
+    "Serialized styp + moof + mdat media segment with nr_samples samples."
+    samples = make_samples(nr_samples, sample_size, (seq_nr - 1) * nr_samples * SAMPLE_DURATION)
+    return b"".join((create_styp().serialize(), create_moof(seq_nr, TRACK_ID, samples).serialize(),
+                     create_mdat(samples).serialize()))
+
+
+def _parse_find(nr_samples):
+    data = make_segment(nr_samples)
+
+    def run():
+        moof = mp4(data).find(b'moof')
+        return moof.find(b'traf.tfhd'), moof.find(b'traf.tfdt'), moof.find(b'traf.trun')
+    return run
+
+
+def _trun(data):
+    return mp4(data).find(b'moof.traf.trun')
+
+
+def _sample_entries(nr_samples):
+    trun = _trun(make_segment(nr_samples))
+
+    def run():
+        return list(map(trun.sample_entry, range(trun.sample_count)))
+    return run
+
+
+def _full_box(nr_samples):
+    trun = _trun(make_segment(nr_samples))
+    full_box = mp4_module.full_box
+
+    def run():
+        return full_box(trun.fmap, trun.type, trun.size, trun.offset, trun.parent)
+    return run
+
+
+def _trun_box(nr_samples):
+    trun = _trun(make_segment(nr_samples))
+    trun_box = mp4_module.trun_box
+
+    def run():
+        return trun_box(trun.fmap, trun.type, trun.size, trun.offset, trun.parent)
+    return run
+
+
+def _decode_fragment(nr_samples):
+    data = make_segment(nr_samples)
+    trex = mp4_module.trex_box(uint32_to_str(32) + b'trex' + b'\x00' * 24, b'trex', 32, 0)
+
+    def run():
+        return list(decode_fragment(data, trex))
+    return run
+
+
+def _create_moof(nr_samples):
+    samples = make_samples(nr_samples)
+
+    def run():
+        return create_moof(1, TRACK_ID, samples).serialize()
+    return run
+
+
+def _create_mdat(nr_samples):
+    samples = make_samples(nr_samples)
+
+    def run():
+        return create_mdat(samples).serialize()
+    return run
+
+
+def _trun_iter(nr_samples):
+    trun = TRUNBox(0)
+    for sample in make_samples(nr_samples):
+        trun.add_sample(sample.duration, sample.size, sample.sync, sample.time_offset)
+
+    def run():
+        return b"".join(trun)
+    return run
+
+
+def _filter_trun(nr_samples):
+    trun = _trun(make_segment(nr_samples))
+    data = trun.fmap[trun.offset:trun.offset + trun.size]
+    segment_filter = MediaSegmentFilter(None)
+
+    def run():
+        output = segment_filter.process_trun(data)
+        segment_filter.fixups = []
+        return output
+    return run
+
+
+def _filter_saio(nr_samples):
+    "Filter a moof where the tfdt is made 64-bit, so that all saio offsets are shifted."
+    segment_filter = MediaSegmentFilter(None, offset=2**32, track_timescale=1)
+    segment_filter.data = make_saio_moof(nr_samples)
+
+    def run():
+        return segment_filter.filter()
+    return run
+
+
+CASES = [
+    Case("mp4_find", "parse segment and find traf.tfhd/tfdt/trun", _parse_find),
+    Case("trun_sample_entry", "trun_box.sample_entry for all samples", _sample_entries),
+    Case("full_box", "full_box header decoding of trun", _full_box),
+    Case("trun_box", "trun_box construction (durations are summed when asked for)", _trun_box),
+    Case("decode_fragment", "chunker.decode_fragment of all samples", _decode_fragment),
+    Case("create_moof", "create_moof and serialize", _create_moof),
+    Case("create_mdat", "create_mdat and serialize", _create_mdat),
+    Case("TRUNBox_iter", "TRUNBox.__iter__ serialization", _trun_iter),
+    Case("filter_trun", "MediaSegmentFilter.process_trun duration sum", _filter_trun),
+    Case("filter_saio", "MediaSegmentFilter.filter of a moof with an saio entry per sample", _filter_saio),
+]
+
+
+def time_call(func, min_time=0.2, repeat=5):
+    "Best time per call in seconds, with the number of calls per repetition chosen by timeit.autorange."
+    timer = timeit.Timer(func)
+    number, total = timer.autorange()
+    if total < min_time:
+        number = max(number, int(number * min_time / max(total, 1e-9)))
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def run_benchmark(cases=CASES, sample_counts=SAMPLE_COUNTS, min_time=0.2, repeat=5, log=None):
+    "Run all cases for all sample counts and return a JSON-serializable report."
+    report = {'meta': {'commit': git_commit(), 'sample_size': SAMPLE_SIZE, 'repeat': repeat}, 'results': []}
+    for case in cases:
+        for nr_samples in sample_counts:
+            seconds = time_call(case.run(nr_samples), min_time, repeat)
+            result = {'name': "%s/%d" % (case.name, nr_samples), 'case': case.name, 'samples': nr_samples,
+                      'us_per_call': round(seconds * 1e6, 2),
+                      'ns_per_sample': round(seconds * 1e9 / nr_samples, 1)}
+            report['results'].append(result)
+            if log is not None:
+                log("%-24s %12.2f us  %10.1f ns/sample" % (result['name'], result['us_per_call'],
+                                                            result['ns_per_sample']))
+    return report
+
+
+def compare(report, baseline):
+    "Return lines comparing the time per call of report with those of a baseline report."
+    old = dict((r['name'], r['us_per_call']) for r in baseline['results'])
+    lines = ["%-24s %12s %12s %7s" % ("case", "base us", "us", "ratio")]
+    for result in report['results']:
+        if result['name'] in old:
+            lines.append("%-24s %12.2f %12.2f %7.2f" % (result['name'], old[result['name']], result['us_per_call'],
+                                                         result['us_per_call'] / old[result['name']]))
+    return lines
+
+
+def main():
+    "Run the microbenchmarks from the command line."
+    from argparse import ArgumentParser
+    parser = ArgumentParser(description="Microbenchmarks of the mp4 parser and boxes serializer")
+    parser.add_argument("-c", "--case", action="append", dest="cases", choices=[c.name for c in CASES],
+                        help="only run this case (repeatable)")
+    parser.add_argument("--samples", type=int, action="append", help="sample count (repeatable)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="minimum seconds per repetition")
+    parser.add_argument("-o", "--output", help="JSON result file (default mp4bench_<commit>.json)")
+    parser.add_argument("--compare", help="JSON result file of an earlier run to compare with")
+    args = parser.parse_args()
+
+    cases = [c for c in CASES if not args.cases or c.name in args.cases]
+    report = run_benchmark(cases, args.samples or SAMPLE_COUNTS, args.min_time, log=print)
+    output = args.output or "mp4bench_%s.json" % (report['meta']['commit'] or "unknown")[:10]
+    with open(output, "w") as ofh:
+        json.dump(report, ofh, indent=2)
+    print("Wrote %s" % output)
+    if args.compare:
+        with open(args.compare) as ifh:
+            baseline = json.load(ifh)
+        print()
+        print("\n".join(compare(report, baseline)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,288 @@
+"""End-to-end benchmark of the WSGI application.
+
+Requests from a matrix of URLs are run in-process through mod_dashlivesim.application
+with a stopped virtual clock, and requests/s, latency percentiles and allocations are reported per
+scenario and per resource type. The report is saved as JSON, so that runs on different
+commits can be compared with --compare.
+"""
+
+# The copyright in this software is being made available under the BSD License,
+# included below. This software may be subject to other third party and contributor
+# rights, including patent rights, and no such rights are granted under this license.
+#
+# Copyright (c) 2026, Dash Industry Forum.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#  * Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation and/or
+#  other materials provided with the distribution.
+#  * Neither the name of Dash Industry Forum nor the names of its
+#  contributors may be used to endorse or promote products derived from this software
+#  without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS AS IS AND ANY
+#  EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+#  WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+#  INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+#  WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+from collections import namedtuple
+from os.path import abspath, dirname, join
+from time import perf_counter, strftime
+
+from dashlivesim.dashlib import metrics
+from dashlivesim.dashlib.clock import CLOCK_ENVIRON_KEY, VirtualClock
+from dashlivesim.mod_wsgi import mod_dashlivesim
+
+BENCH_DIR = abspath(dirname(__file__))
+TEST_DIR = join(dirname(BENCH_DIR), "tests")
+CONTENT_ROOT = TEST_DIR
+VOD_CONFIG_DIR = join(TEST_DIR, "vod_cfg")
+
+NOW = 1356998460  # Wall-clock time of all testpic requests
+SEG_NR = (NOW - 60) // 6  # Complete 6s segment, which maps to 1.m4s in the 600 segment loop
+STPP_SEG_NR = 718263000  # Maps to the only segment, 1.m4s, of testpic_stpp
+STPP_NOW = STPP_SEG_NR * 2 + 10
+THUMB_CONTENT = "benchthumbs"  # Generated in a temporary directory, since no thumbnails are bundled
+
+Scenario = namedtuple("Scenario", "name resource path now")
+
+SCENARIOS = [
+    Scenario("mpd", "mpd", "/livesim/testpic/Manifest.mpd", NOW),
+    Scenario("mpd_segtimeline", "mpd", "/livesim/segtimeline_1/testpic/Manifest.mpd", NOW),
+    Scenario("mpd_segtimelinenr", "mpd", "/livesim/segtimelinenr_1/testpic/Manifest.mpd", NOW),
+    Scenario("mpd_periods", "mpd", "/livesim/periods_60/testpic/Manifest.mpd", NOW),
+    Scenario("mpd_xlink", "mpd", "/livesim/periods_60/xlink_4/testpic/Manifest.mpd", NOW),
+    Scenario("period_xlink", "period",
+             "/livesim/periods_60/xlink_4/testpic/Manifest.mpd+p%d.period" % (NOW // 60), NOW),
+    Scenario("mpd_scte35", "mpd", "/livesim/scte35_1/testpic/Manifest.mpd", NOW),
+    Scenario("mpd_chunkdur", "mpd", "/livesim/chunkdur_1/ato_7/testpic/Manifest.mpd", NOW),
+    Scenario("init_video", "init", "/livesim/testpic/V1/init.mp4", NOW),
+    Scenario("init_muxed", "init", "/livesim/testpic/V1__A1/init.mp4", NOW),
+    Scenario("media_video", "media", "/livesim/testpic/V1/%d.m4s" % SEG_NR, NOW),
+    Scenario("media_audio", "media", "/livesim/testpic/A1/%d.m4s" % SEG_NR, NOW),
+    Scenario("media_ato_inf", "media", "/livesim/ato_inf/testpic/V1/%d.m4s" % SEG_NR, NOW),
+    Scenario("media_scte35", "media", "/livesim/scte35_1/testpic/V1/%d.m4s" % SEG_NR, NOW),
+    Scenario("media_muxed", "media", "/livesim/testpic/V1__A1/%d.m4s" % SEG_NR, NOW),
+    Scenario("media_chunkdur", "media", "/livesim/chunkdur_1/testpic/V1/%d.m4s" % SEG_NR, NOW),
+    Scenario("media_ttml", "media", "/livesim/testpic_stpp/S1/%d.m4s" % STPP_SEG_NR, STPP_NOW),
+    Scenario("thumbnail", "thumb", "/livesim/%s/thumbs/%d.jpg" % (THUMB_CONTENT, SEG_NR), NOW),
+]
+
+
+def make_thumbnail_content(root):
+    "Write a VoD config and a single looped thumbnail below root. Return (content_root, vod_conf_dir)."
+    content_root = join(root, "content")
+    vod_conf_dir = join(root, "vod_cfg")
+    os.makedirs(join(content_root, THUMB_CONTENT, "thumbs"))
+    os.makedirs(vod_conf_dir)
+    with open(join(vod_conf_dir, THUMB_CONTENT + ".cfg"), "w") as ofh:
+        ofh.write("[General]\nversion = 1.0\n\n"
+                  "[Setup]\nfirst_segment_in_loop = 1\nnr_segments_in_loop = 1\n"
+                  "segment_duration_s = 6\ndefault_tsbd_secs = 300\n\n"
+                  "[image]\nrepresentations = thumbs\ntimescale = 1\n")
+    with open(join(content_root, THUMB_CONTENT, "thumbs", "1.jpg"), "wb") as ofh:
+        ofh.write(b"\xff\xd8" + bytes(range(256)) * 80 + b"\xff\xd9")
+    return content_root, vod_conf_dir
+
+
+def make_environ(path, content_root, vod_conf_dir):
+    "Minimal WSGI environment for a GET request."
+    return {'HTTP_HOST': 'streamtest.eu', 'REQUEST_URI': path, 'REQUEST_METHOD': 'GET',
+            'VOD_CONF_DIR': vod_conf_dir, 'CONTENT_ROOT': content_root}
+
+
+def call_application(environ):
+    "Run one request through the application and consume the body. Return (status, nr_bytes)."
+    response = {}
+    written = []
+
+    def start_response(status, headers):
+        response['status'] = status
+        return written.append
+
+    result = mod_dashlivesim.application(dict(environ), start_response)
+    try:
+        nr_bytes = sum(len(part) for part in written) + sum(len(part) for part in result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return response['status'], nr_bytes
+
+
+def percentile(sorted_values, fraction):
+    "Nearest-rank percentile of an already sorted list."
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, elapsed):
+    "Requests/s and latency percentiles in microseconds for a list of latencies in seconds."
+    values = sorted(latencies)
+    return {'requests': len(values),
+            'requests_per_s': round(len(values) / elapsed, 1) if elapsed > 0 else 0,
+            'p50_us': round(percentile(values, 0.50) * 1e6, 1),
+            'p99_us': round(percentile(values, 0.99) * 1e6, 1),
+            'mean_us': round(sum(values) / len(values) * 1e6, 1) if values else 0}
+
+
+def measure_allocations(environ, iterations):
+    "Return the median peak of memory traced during a request, in bytes."
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    peaks = []
+    try:
+        for _ in range(iterations):
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            call_application(environ)
+            peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+    return percentile(sorted(peaks), 0.5)
+
+
+def run_scenario(scenario, content_root, vod_conf_dir, iterations, warmup, alloc_iterations):
+    "Benchmark one scenario. Return a result dict and the list of latencies."
+    environ = make_environ(scenario.path, content_root, vod_conf_dir)
+    environ[CLOCK_ENVIRON_KEY] = VirtualClock(scenario.now, speed=0)
+    status, nr_bytes = call_application(environ)
+    result = {'name': scenario.name, 'resource': scenario.resource, 'path': scenario.path,
+              'status': status, 'bytes': nr_bytes}
+    if not status.startswith("200"):
+        return result, []
+    for _ in range(warmup):
+        call_application(environ)
+    latencies = []
+    start = perf_counter()
+    for _ in range(iterations):
+        t0 = perf_counter()
+        call_application(environ)
+        latencies.append(perf_counter() - t0)
+    elapsed = perf_counter() - start
+    result.update(summarize(latencies, elapsed))
+    if alloc_iterations > 0:
+        result['alloc_peak_bytes'] = measure_allocations(environ, alloc_iterations)
+    return result, latencies
+
+
+def git_commit():
+    "Commit of the source tree, or None if not available."
+    try:
+        output = subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=BENCH_DIR,
+                                         stderr=subprocess.DEVNULL)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.decode('ascii').strip()
+
+
+def run_benchmark(scenarios=SCENARIOS, iterations=500, warmup=20, alloc_iterations=20, content_root=CONTENT_ROOT,
+                  vod_conf_dir=VOD_CONFIG_DIR, log=None):
+    "Run all scenarios and return a JSON-serializable report."
+    # pylint: disable=too-many-arguments, too-many-locals
+    metrics.REGISTRY.reset()
+    report = {'meta': {'commit': git_commit(), 'time': strftime("%Y-%m-%dT%H:%M:%S%z"),
+                       'python': platform.python_version(), 'platform': platform.platform(),
+                       'iterations': iterations, 'warmup': warmup, 'alloc_iterations': alloc_iterations},
+              'scenarios': [], 'resources': {}}
+    by_resource = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        thumb_root, thumb_conf_dir = make_thumbnail_content(tmp_dir)
+        for scenario in scenarios:
+            if scenario.resource == "thumb":
+                roots = (thumb_root, thumb_conf_dir)
+            else:
+                roots = (content_root, vod_conf_dir)
+            result, latencies = run_scenario(scenario, roots[0], roots[1], iterations, warmup, alloc_iterations)
+            report['scenarios'].append(result)
+            if latencies:
+                totals = by_resource.setdefault(scenario.resource, ([], []))
+                totals[0].extend(latencies)
+                totals[1].append(result)
+            if log is not None:
+                log(format_result(result))
+    for resource, (latencies, results) in sorted(by_resource.items()):
+        summary = summarize(latencies, sum(latencies))
+        peaks = [r['alloc_peak_bytes'] for r in results if 'alloc_peak_bytes' in r]
+        if peaks:
+            summary['alloc_peak_bytes'] = max(peaks)
+        report['resources'][resource] = summary
+    return report
+
+
+def format_result(result):
+    "One line summary of a scenario or resource result."
+    if 'p50_us' not in result:
+        return "%-20s %s" % (result['name'], result['status'])
+    return ("%-20s %9.1f req/s  p50 %8.1f us  p99 %8.1f us  peak %8s B" %
+            (result.get('name', ''), result['requests_per_s'], result['p50_us'], result['p99_us'],
+             result.get('alloc_peak_bytes', '-')))
+
+
+def compare(report, baseline):
+    "Return lines comparing p50 latencies of report with those of a baseline report."
+    old = {r['name']: r for r in baseline['scenarios'] if 'p50_us' in r}
+    lines = ["%-20s %10s %10s %7s" % ("scenario", "base p50", "p50", "ratio")]
+    for result in report['scenarios']:
+        if 'p50_us' in result and result['name'] in old:
+            base_p50 = old[result['name']]['p50_us']
+            lines.append("%-20s %10.1f %10.1f %7.2f" % (result['name'], base_p50, result['p50_us'],
+                                                         result['p50_us'] / base_p50 if base_p50 else 0))
+    return lines
+
+
+def main():
+    "Run the benchmark from the command line."
+    from argparse import ArgumentParser
+    parser = ArgumentParser(description="End-to-end benchmark of the WSGI application")
+    parser.add_argument("-n", "--iterations", type=int, default=500, help="timed requests per scenario")
+    parser.add_argument("--warmup", type=int, default=20, help="untimed requests per scenario")
+    parser.add_argument("--alloc-iterations", type=int, default=20,
+                        help="requests per scenario traced for allocations (0 to disable)")
+    parser.add_argument("-s", "--scenario", action="append", dest="scenarios",
+                        help="only run scenarios whose name starts with this (repeatable)")
+    parser.add_argument("-o", "--output", help="JSON result file (default wsgibench_<commit>.json)")
+    parser.add_argument("--compare", help="JSON result file of an earlier run to compare with")
+    args = parser.parse_args()
+
+    scenarios = SCENARIOS
+    if args.scenarios:
+        scenarios = [s for s in SCENARIOS if any(s.name.startswith(prefix) for prefix in args.scenarios)]
+    report = run_benchmark(scenarios, args.iterations, args.warmup, args.alloc_iterations, log=print)
+    print()
+    for resource, summary in report['resources'].items():
+        print(format_result(dict(summary, name=resource)))
+    output = args.output or "wsgibench_%s.json" % (report['meta']['commit'] or "unknown")[:10]
+    with open(output, "w") as ofh:
+        json.dump(report, ofh, indent=2)
+    print("Wrote %s" % output)
+    if args.compare:
+        with open(args.compare) as ifh:
+            baseline = json.load(ifh)
+        print()
+        print("\n".join(compare(report, baseline)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
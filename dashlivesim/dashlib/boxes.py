@@ -1181,6 +1181,86 @@ class SENCBox(Box):
         return self.sz
 
 
+class FRMABox(Box):
+    """ Original format
+    """
+
+    def __init__(self, data_format):
+        self.data_format = data_format
+
+    def __iter__(self):
+        yield serialize_u32(self.size())
+        yield serialize_name(b'frma')
+        yield serialize_name(self.data_format)
+
+    def size(self):
+        return 12
+
+
+class SCHMBox(Box):
+    """ Scheme type
+    """
+
+    def __init__(self, scheme_type=b'cenc', scheme_version=0x10000):
+        self.scheme_type = scheme_type
+        self.scheme_version = scheme_version
+
+    def __iter__(self):
+        yield serialize_u32(self.size())
+        yield serialize_name(b'schm')
+        yield serialize_u32(0)  # version and flags
+        yield serialize_name(self.scheme_type)
+        yield serialize_u32(self.scheme_version)
+
+    def size(self):
+        return 20
+
+
+class TENCBox(Box):
+    """ Track encryption
+    """
+
+    def __init__(self, kid, iv_size=8):
+        self.kid = kid
+        self.iv_size = iv_size
+
+    def __iter__(self):
+        yield serialize_u32(self.size())
+        yield serialize_name(b'tenc')
+        yield serialize_u32(0)  # version and flags
+        yield serialize_u16(0)  # reserved
+        yield serialize_u8(1)  # default_isProtected
+        yield serialize_u8(self.iv_size)  # default_Per_Sample_IV_Size
+        yield serialize_string(self.kid)  # default_KID
+
+    def size(self):
+        return 32
+
+
+class PSSHBox(Box):
+    """ Protection system specific header (version 1 with key ids)
+    """
+
+    def __init__(self, system_id, kids, data=b''):
+        self.system_id = system_id
+        self.kids = kids
+        self.data = data
+
+    def __iter__(self):
+        yield serialize_u32(self.size())
+        yield serialize_name(b'pssh')
+        yield serialize_u32(0x01000000)  # version and flags
+        yield serialize_string(self.system_id)
+        yield serialize_u32(len(self.kids))
+        for kid in self.kids:
+            yield serialize_string(kid)
+        yield serialize_u32(len(self.data))
+        yield serialize_string(self.data)
+
+    def size(self):
+        return 36 + 16 * len(self.kids) + len(self.data)
+
+
 class SIDXBox(Box):
     """ Segment Index Box, 8.16.3
     """
@@ -1244,13 +1324,18 @@ def create_empty_sidx(track_id, timescale, no_segments):
     return sidx
 
 
-def create_stsd_h264(media_type, width, height, avcc):
+def create_sinf(original_format, kid, iv_size=8):
+    """Create protection scheme information for the cenc scheme."""
+    schi = BoxContainer(b'schi', [TENCBox(kid, iv_size)])
+    return BoxContainer(b'sinf', [FRMABox(original_format), SCHMBox(), schi])
+
+
+def create_stsd_h264(media_type, width, height, avcc, sinf=None):
     pasp = PASPBox()
+    if sinf:
+        avcc = BoxSequence(avcc, sinf)
     visual = VisualSampleEntry(media_type, width, height, avcc, pasp)
 
-    # sinf
-    # TODO
-
     stsd = STSDBox()
     stsd.add_box(visual)
     return stsd
@@ -1272,17 +1357,17 @@ def create_stsd_mp4a(media_type,
                      num_channels,
                      sample_size,
                      sample_rate,
-                     esds):
+                     esds,
+                     sinf=None):
 
+    if sinf:
+        esds += sinf.serialize()
     audio = AudioSampleEntry(media_type,
                              num_channels,
                              sample_size,
                              sample_rate,
                              esds)
 
-    # sinf
-    # TODO
-
     stsd = STSDBox()
     stsd.add_box(audio)
     return stsd
@@ -1378,10 +1463,11 @@ def create_box_trak_h264(h264_info):
                    h264_info.pps)
 
     # stsd
-    stsd = create_stsd_h264(b'avc1',
+    stsd = create_stsd_h264(b'encv' if h264_info.sinf else b'avc1',
                             h264_info.width,
                             h264_info.height,
-                            avcc)
+                            avcc,
+                            h264_info.sinf)
 
     # vmhd
     vmhd = VMHDBox()
@@ -1449,11 +1535,12 @@ def create_box_trak_mp4a(mp4a_info):
     trak.add_box(tkhd)
 
     # stsd
-    stsd = create_stsd_mp4a(b'mp4a',
+    stsd = create_stsd_mp4a(b'enca' if mp4a_info.sinf else b'mp4a',
                             mp4a_info.num_channels,
                             mp4a_info.sample_size,
                             mp4a_info.sample_rate,
-                            mp4a_info.esds)
+                            mp4a_info.esds,
+                            mp4a_info.sinf)
 
     # smhd
     smhd = SMHDBox()
@@ -1550,7 +1637,7 @@ class H264Info(MediaInfo):
     def __init__(self, track_id, timescale, duration,
                  width, height,
                  profile_ind, profile_compat, level_ind,
-                 sps, pps):
+                 sps, pps, sinf=None):
         super().__init__(track_id, timescale, duration)
         self.width = width
         self.height = height
@@ -1559,6 +1646,7 @@ class H264Info(MediaInfo):
         self.level_ind = level_ind
         self.sps = sps
         self.pps = pps
+        self.sinf = sinf
 
 
 class HVCCData:
@@ -1599,7 +1687,7 @@ class MP4AInfo(MediaInfo):
 
     def __init__(self, track_id, timescale, duration,
                  num_channels, sample_size, sample_rate,
-                 esds, dec_cfg, lang='und'):
+                 esds, dec_cfg, lang='und', sinf=None):
         super().__init__(track_id, timescale, duration)
         self.num_channels = num_channels
         self.sample_size = sample_size
@@ -1607,6 +1695,7 @@ class MP4AInfo(MediaInfo):
         self.esds = esds
         self.dec_cfg = dec_cfg
         self.lang = lang
+        self.sinf = sinf
 
 
 class MP4SInfo(MediaInfo):
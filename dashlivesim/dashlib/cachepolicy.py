@@ -0,0 +1,184 @@
+"""HTTP caching policy derived from the live timing model.
+
+Once a segment is available, its bytes do not change until it leaves the time-shift
+buffer, and an MPD does not change until its next publish boundary. The policy turns
+that into a per-response Cache-Control max-age and a strong ETag, so that CDNs and
+shared caches can offload the simulator.
+
+The policy is selected per deployment by the CACHE_POLICY environment value
+(setEnv for Apache mod_wsgi):
+
+    nocache  - Pragma/Cache-Control no-cache on everything (default, old behaviour)
+    timing   - max-age and ETag computed from the timing model
+
+CACHE_INIT_MAX_AGE optionally sets the max-age in seconds for init segments."""
+
+# The copyright in this software is being made available under the BSD License,
+# included below. This software may be subject to other third party and contributor
+# rights, including patent rights, and no such rights are granted under this license.
+#
+# Copyright (c) 2026, Dash Industry Forum.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#  * Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation and/or
+#  other materials provided with the distribution.
+#  * Neither the name of Dash Industry Forum nor the names of its
+#  contributors may be used to endorse or promote products derived from this software
+#  without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS AS IS AND ANY
+#  EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+#  WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+#  INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+#  WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+import hashlib
+import re
+from math import gcd
+
+from dashlivesim.dashlib.dash_proxy import EXTRA_TIME_AFTER_END_IN_S
+
+NO_CACHE = "nocache"
+TIMING = "timing"
+POLICY_MODES = (NO_CACHE, TIMING)
+
+DEFAULT_INIT_MAX_AGE_IN_S = 24 * 3600
+MAX_MAX_AGE_IN_S = 365 * 24 * 3600  # For resources that never expire
+
+NO_CACHE_HEADERS = {'Pragma': 'no-cache',
+                    'Cache-Control': 'no-cache',
+                    'Expires': '-1'}
+
+# Resource types
+MPD = "mpd"
+INIT = "init"
+MEDIA = "media"
+THUMBNAIL = "thumb"
+
+PUBLISH_TIME_PATTERN = re.compile(rb' publishTime="[^"]*"')
+
+
+class CachePolicyError(Exception):
+    "Bad cache policy configuration."
+
+
+def resource_type(ext):
+    "Get the resource type corresponding to a file extension."
+    return {".mpd": MPD, ".period": MPD, ".mp4": INIT, ".m4s": MEDIA, ".jpg": THUMBNAIL}.get(ext)
+
+
+def make_etag(payload):
+    "Strong ETag for the payload bytes (or the fingerprint of a payload left in a file)."
+    if not isinstance(payload, bytes):
+        payload = payload.fingerprint()
+    return '"%s"' % hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+def make_mpd_etag(mpd):
+    """ETag for an MPD, which does not depend on publishTime.
+
+    publishTime is set to the request time, so the ETag would otherwise change on every request
+    even when nothing else in the MPD does."""
+    return make_etag(PUBLISH_TIME_PATTERN.sub(b"", mpd))
+
+
+def etag_matches(if_none_match, etag):
+    "Check if an If-None-Match header value matches etag."
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate in ("*", etag):
+            return True
+    return False
+
+
+class CachePolicy(object):
+    "Compute caching headers for a response."
+
+    def __init__(self, mode=NO_CACHE, init_max_age=DEFAULT_INIT_MAX_AGE_IN_S):
+        if mode not in POLICY_MODES:
+            raise CachePolicyError("Unknown cache policy %s (should be in %s)" % (mode, POLICY_MODES))
+        self.mode = mode
+        self.init_max_age = init_max_age
+
+    @classmethod
+    def from_environ(cls, environment):
+        "Create the policy configured in the WSGI environment."
+        mode = environment.get('CACHE_POLICY', NO_CACHE)
+        init_max_age = int(environment.get('CACHE_INIT_MAX_AGE', DEFAULT_INIT_MAX_AGE_IN_S))
+        return cls(mode, init_max_age)
+
+    @property
+    def uses_etags(self):
+        "True if responses get ETags and conditional GETs are handled."
+        return self.mode != NO_CACHE
+
+    def max_age(self, resource, dashProv, now):
+        "Return max-age in seconds for the resource, or None if it should not be cached."
+        if self.mode == NO_CACHE or dashProv is None:
+            return None
+        cfg = dashProv.cfg
+        if cfg.multi_url:  # Server up/down simulation changes responses every second
+            return None
+        if resource == MPD:
+            max_age = self.mpd_max_age(cfg, now)
+        elif resource == INIT:
+            max_age = self.init_max_age
+        elif resource in (MEDIA, THUMBNAIL):
+            max_age = self.segment_max_age(dashProv, now)
+        else:
+            max_age = None
+        if max_age is None or max_age <= 0:
+            return None
+        return int(min(max_age, MAX_MAX_AGE_IN_S))
+
+    def mpd_max_age(self, cfg, now):
+        """The MPD is valid until the next publish boundary.
+
+        publishTime changes at multiples of minimumUpdatePeriod. If segments or periods are
+        listed explicitly, or AST and AET move with time, the MPD can also change at every
+        segment boundary."""
+        if cfg.add_location or 'direct' in cfg.utc_timing_methods:
+            return None  # The MPD depends on the request time
+        quantum = cfg.minimum_update_period_in_s or cfg.seg_duration
+        if (cfg.seg_timeline or cfg.seg_timeline_nr or cfg.periods_per_hour > 0 or cfg.cont or
+                cfg.start_time is not None):
+            quantum = gcd(quantum, cfg.seg_duration)
+        if not quantum:
+            return None
+        next_boundary = (now // quantum + 1) * quantum
+        return next_boundary - now
+
+    def segment_max_age(self, dashProv, now):
+        "A segment is immutable until it leaves the time-shift buffer."
+        cfg = dashProv.cfg
+        if dashProv.segment_ast is None:
+            return None
+        if cfg.availability_time_offset_in_s == -1 or cfg.stop_number:
+            return MAX_MAX_AGE_IN_S  # No time-shift window applies
+        expiry = dashProv.segment_ast + cfg.seg_duration + cfg.timeshift_buffer_depth_in_s
+        if cfg.availability_end_time is not None:
+            expiry = min(expiry, cfg.availability_end_time + EXTRA_TIME_AFTER_END_IN_S)
+        return expiry - now
+
+    def headers(self, resource, dashProv, now, payload):
+        "Return the caching headers for a response with payload."
+        max_age = self.max_age(resource, dashProv, now)
+        if max_age is None:
+            headers = dict(NO_CACHE_HEADERS)
+        else:
+            headers = {'Cache-Control': 'public, max-age=%d' % max_age}
+        if self.uses_etags:
+            headers['ETag'] = make_mpd_etag(payload) if resource == MPD else make_etag(payload)
+        return headers
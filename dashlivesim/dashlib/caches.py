@@ -0,0 +1,98 @@
+"""Registry of the in-process caches, so that they can be measured and invalidated together.
+
+A cache is any object with __len__(), nbytes() and clear(). Register it with
+register_cache() when it is created. The sizes are exported as metrics gauges.
+A cache that depends on files may also have invalidate(path), which is called by
+invalidate() when a file changes (see fswatch.py).
+"""
+
+# The copyright in this software is being made available under the BSD License,
+# included below. This software may be subject to other third party and contributor
+# rights, including patent rights, and no such rights are granted under this license.
+#
+# Copyright (c) 2026, Dash Industry Forum.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#  * Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation and/or
+#  other materials provided with the distribution.
+#  * Neither the name of Dash Industry Forum nor the names of its
+#  contributors may be used to endorse or promote products derived from this software
+#  without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS AS IS AND ANY
+#  EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+#  WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+#  INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+#  WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+import threading
+
+from dashlivesim.dashlib.metrics import REGISTRY, CACHE_BYTES, CACHE_ENTRIES, CACHE_INVALIDATIONS
+
+CACHES = {}
+_lock = threading.Lock()
+
+
+def register_cache(name, cache):
+    "Register a cache under a unique name."
+    with _lock:
+        CACHES[name] = cache
+
+
+def cache_stats():
+    "Return [(name, nr_entries, nr_bytes)] for all registered caches."
+    with _lock:
+        caches = sorted(CACHES.items())
+    return [(name, len(cache), cache.nbytes()) for name, cache in caches]
+
+
+def clear_caches():
+    "Clear all registered caches. Return the number of caches cleared."
+    with _lock:
+        caches = list(CACHES.values())
+    for cache in caches:
+        cache.clear()
+    return len(caches)
+
+
+def invalidate(path):
+    """Drop what depends on the file at path from all registered caches. Return the number of dropped entries.
+
+    path can also be a directory that was moved or removed, and then stands for all files below it.
+    Caches with an invalidate(path) method drop only the entries that depend on path, and return their number.
+    Other caches are cleared. The dropped entries are counted per cache in the metrics."""
+    with _lock:
+        caches = sorted(CACHES.items())
+    total = 0
+    for name, cache in caches:
+        if hasattr(cache, 'invalidate'):
+            nr_dropped = cache.invalidate(path)
+        else:
+            nr_dropped = len(cache)
+            cache.clear()
+        if nr_dropped:
+            REGISTRY.inc(CACHE_INVALIDATIONS, (("cache", name),), nr_dropped)
+            total += nr_dropped
+    return total
+
+
+def cache_gauges():
+    "Gauge values for the metrics registry."
+    gauges = []
+    for name, nr_entries, nr_bytes in cache_stats():
+        gauges.append((CACHE_ENTRIES, (("cache", name),), nr_entries))
+        gauges.append((CACHE_BYTES, (("cache", name),), nr_bytes))
+    return gauges
+
+
+REGISTRY.add_gauge_callback(cache_gauges)
@@ -0,0 +1,225 @@
+"""Catalogue of the contents that can be served.
+
+The catalogue is built from the VoD configs in VOD_CONF_DIR on the first request of a process, and maps each
+content to its representations with their content type, timescale and init segment, its segment loop, and
+whether it has thumbnails. URLs are then resolved by dictionary lookups, and requests for unknown contents or
+representations fail before any file is read. clear() makes the catalogue be rebuilt on the next request.
+"""
+
+# The copyright in this software is being made available under the BSD License,
+# included below. This software may be subject to other third party and contributor
+# rights, including patent rights, and no such rights are granted under this license.
+#
+# Copyright (c) 2026, Dash Industry Forum.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#  * Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation and/or
+#  other materials provided with the distribution.
+#  * Neither the name of Dash Industry Forum nor the names of its
+#  contributors may be used to endorse or promote products derived from this software
+#  without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS AS IS AND ANY
+#  EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+#  WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+#  INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+#  WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+
+import os
+import threading
+from collections import namedtuple
+
+from dashlivesim.dashlib.caches import register_cache
+from dashlivesim.dashlib.configprocessor import VodConfig
+from dashlivesim.dashlib.contentpack import is_below
+from dashlivesim.dashlib.storage import LocalStorage, StorageError, get_storage
+
+CONFIG_EXTENSION = ".cfg"
+
+Representation = namedtuple("Representation", "rep_id content_type timescale init_path")
+
+
+class ContentInfo(object):
+    "A content with its VoD config and representations."
+
+    def __init__(self, name, vod_cfg):
+        self.name = name
+        self.vod_cfg = vod_cfg
+        self.representations = {}
+        for content_type, media_data in vod_cfg.media_data.items():
+            init_path = None
+            for rep_id in media_data['representations']:
+                if content_type != 'image':  # Thumbnails have no init segment
+                    init_path = "%s/init.mp4" % rep_id
+                rep = Representation(rep_id, content_type, media_data['timescale'], init_path)
+                self.representations.setdefault(rep_id, rep)  # The first content type wins, as before
+        self.first_segment = vod_cfg.first_segment_in_loop
+        self.last_segment = vod_cfg.first_segment_in_loop + vod_cfg.nr_segments_in_loop - 1
+        self.has_thumbnails = 'image' in vod_cfg.media_data
+
+    def __repr__(self):
+        return "<ContentInfo %s: %s>" % (self.name, ", ".join(sorted(self.representations)))
+
+
+class Catalogue(object):
+    """Contents from the VoD configs in a config storage.
+
+    If the storage can be listed, all configs are read when the catalogue is built, and other contents are unknown
+    without any further reads. Otherwise, e.g. for an HTTP origin, each config is read on first use, and is then
+    kept until the catalogue is cleared. Such configs are not invalidated by file changes, and since the storage
+    does not revalidate its files either, a changed config on an origin is only read after a restart.
+
+    Only one thread builds the catalogue, and the others wait for it. A build or read that was started before
+    clear() or invalidate() is not kept, so the catalogue never holds configs from before a change."""
+
+    def __init__(self, storage):
+        self.storage = storage
+        self.contents = {}  # name -> ContentInfo
+        self.errors = {}  # name -> exception from reading or parsing its config
+        self.complete = False  # All contents are known
+        self.built = False
+        self.nr_bytes = 0  # Size of the configs that were read
+        self.generation = 0  # Increased when the catalogue is cleared
+        self.lock = threading.Lock()
+        self.build_lock = threading.Lock()  # Held while building
+
+    def read_content(self, name):
+        "Read and parse the config of content name. Return (ContentInfo, size of the config)."
+        data = self.storage.read(name + CONFIG_EXTENSION)
+        vod_cfg = VodConfig()
+        vod_cfg.read_config_data(data)
+        return ContentInfo(name, vod_cfg), len(data)
+
+    def build(self):
+        "Read the configs of all contents, if the storage can be listed."
+        generation = self.generation
+        contents, errors, nr_bytes = {}, {}, 0
+        try:
+            names = [file_name[:-len(CONFIG_EXTENSION)] for file_name in self.storage.listdir()
+                     if file_name.endswith(CONFIG_EXTENSION)]
+            complete = True
+        except StorageError:
+            names = []
+            complete = False
+        for name in names:
+            try:
+                contents[name], size = self.read_content(name)
+                nr_bytes += size
+            except Exception as exc:  # pylint: disable=broad-except
+                errors[name] = exc  # Raised when the content is requested, as if read then
+        with self.lock:
+            if self.generation != generation:  # Cleared while building. Rebuild on next use.
+                return
+            self.contents, self.errors, self.nr_bytes = contents, errors, nr_bytes
+            self.complete = complete
+            self.built = True
+
+    def get(self, name):
+        """The ContentInfo of content name, or None if there is no such content.
+
+        An error from reading or parsing its config is raised."""
+        if not self.built:
+            with self.build_lock:
+                if not self.built:
+                    self.build()
+        content = self.contents.get(name)
+        if content is not None:
+            return content
+        if name in self.errors:
+            raise self.errors[name].with_traceback(None)
+        if self.complete:
+            return None
+        generation = self.generation
+        try:
+            content, size = self.read_content(name)
+        except FileNotFoundError:
+            return None  # Not remembered, so that unknown names cannot fill the catalogue
+        with self.lock:
+            if self.generation == generation:
+                self.contents[name] = content
+                self.nr_bytes += size
+        return content
+
+    def names(self):
+        "Names of the known contents, in sorted order."
+        return sorted(self.contents)
+
+    def __len__(self):
+        return len(self.contents)
+
+    def nbytes(self):
+        "Size of the configs that the catalogue was built from."
+        return self.nr_bytes
+
+    def clear(self):
+        "Forget all contents, so that the catalogue is rebuilt on next use."
+        with self.lock:
+            self.contents, self.errors, self.nr_bytes = {}, {}, 0
+            self.complete = self.built = False
+            self.generation += 1
+
+    def invalidate(self, path):
+        """Rebuild the catalogue on next use if path is one of its configs, or a directory that contains them.
+
+        Return the number of dropped contents."""
+        if not isinstance(self.storage, LocalStorage):
+            return 0
+        path, root = os.path.abspath(path), os.path.abspath(self.storage.root)
+        is_config = path.endswith(CONFIG_EXTENSION) and os.path.dirname(path) == root
+        if not (is_config or is_below(root, path)):
+            return 0
+        nr_dropped = len(self.contents) + len(self.errors)
+        self.clear()
+        return nr_dropped
+
+
+class CatalogueRegistry(object):
+    "The catalogues of all config storages in the process, registered as one cache."
+
+    def __init__(self):
+        self.catalogues = {}
+        self.lock = threading.Lock()
+
+    def get(self, vod_cfg_dir):
+        "The Catalogue for a VOD_CONF_DIR directory, URL or storage."
+        storage = get_storage(vod_cfg_dir)
+        catalogue = self.catalogues.get(storage)
+        if catalogue is None:
+            with self.lock:
+                catalogue = self.catalogues.setdefault(storage, Catalogue(storage))
+        return catalogue
+
+    def __len__(self):
+        return sum(len(catalogue) for catalogue in list(self.catalogues.values()))
+
+    def nbytes(self):
+        return sum(catalogue.nbytes() for catalogue in list(self.catalogues.values()))
+
+    def clear(self):
+        "Make all catalogues be rebuilt on next use."
+        for catalogue in list(self.catalogues.values()):
+            catalogue.clear()
+
+    def invalidate(self, path):
+        "Make the catalogues that have path as a config be rebuilt on next use."
+        return sum(catalogue.invalidate(path) for catalogue in list(self.catalogues.values()))
+
+
+CATALOGUES = CatalogueRegistry()
+register_cache("catalogue", CATALOGUES)
+
+
+def get_catalogue(vod_cfg_dir):
+    "The Catalogue for a VOD_CONF_DIR directory, URL or storage."
+    return CATALOGUES.get(vod_cfg_dir)
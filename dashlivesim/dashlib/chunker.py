@@ -29,15 +29,19 @@
 #  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 #  POSSIBILITY OF SUCH DAMAGE.
 
-from time import time, sleep
-
 from dashlivesim.dashlib.mp4 import mp4
 from dashlivesim.dashlib.boxes import create_moof, create_mdat, Sample
+from dashlivesim.dashlib.metrics import stage
+from dashlivesim.dashlib.clock import SYSTEM_CLOCK
 
 
 def decode_fragment(data, trex):
-    "Extract samples from a segment."
-    root = mp4(data)
+    """Extract samples from a segment.
+
+    Only the boxes on the path to the trun are parsed, and the sample table is decoded in bulk.
+    The sample data are memoryview slices of data, so they are not copied until the chunks are serialized."""
+    data = memoryview(data)
+    root = mp4(data, recurse=False)
     moof = root.find(b'moof')
     tfhd = moof.find(b'traf.tfhd')
     tfdt = moof.find(b'traf.tfdt')
@@ -48,22 +52,18 @@ def decode_fragment(data, trex):
     base_media_decode_time = tfdt.decode_time
 
     t0, t1 = base_media_decode_time, base_media_decode_time
-    begin, end = 0, 0
+    begin, end = 0, base_data_offset + data_offset
     default_sample_duration = (tfhd.default_sample_duration if tfhd.has_default_sample_duration else
                                trex.default_sample_duration)
     default_sample_size = (tfhd.default_sample_size if tfhd.has_default_sample_size else
                            trex.default_sample_size)
     default_sample_flags = (tfhd.default_sample_flags if tfhd.has_default_sample_flags else
                             trex.default_sample_flags)
-    for entry in map(trun.sample_entry, range(trun.sample_count)):
-        duration = entry['duration'] if trun.has_sample_duration else default_sample_duration
-        size = entry['size'] if trun.has_sample_size else default_sample_size
-        flags = entry['flags'] if trun.has_sample_flags else default_sample_flags
-        time_offset = entry['time_offset'] if trun.has_sample_composition_time_offset else 0
+    for duration, size, flags, time_offset in trun.samples(default_sample_duration, default_sample_size,
+                                                           default_sample_flags):
         begin, end = end, end + size
-        data = root.fmap[base_data_offset+data_offset:][begin:end]
         t0, t1 = t1, t1 + duration
-        yield Sample(data, t0, duration, flags, time_offset)
+        yield Sample(data[begin:end], t0, duration, flags, time_offset)
 
 
 def partition(samples, duration):
@@ -86,25 +86,33 @@ def encode_chunked(seqno, track_id, samples, duration):
 
 
 def chunk(data, duration, trex_box):
-    "Decode data into a segment and chunk it given duration and trex_box data."
-    root = mp4(data)
-    mfhd = root.find(b'moof.mfhd')
-    tfhd = root.find(b'moof.traf.tfhd')
-
-    seqno = mfhd.seqno
-    track_id = tfhd.track_id
-
-    fragments = encode_chunked(seqno,
-                               track_id,
-                               decode_fragment(data, trex_box),
-                               duration)
-    chunks = []
-    for moof, mdat in fragments:
-        chunks.append(moof.serialize() + mdat.serialize())
-    return chunks
-
-
-def simulate_continuous_production(segment, segment_start, chunk_duration, now_float):
+    """Decode data into a segment and chunk it given duration and trex_box data.
+
+    This is a generator, so a chunk (moof + mdat) is only decoded and serialized when
+    it is asked for."""
+    with stage("chunk"):
+        root = mp4(data)
+        mfhd = root.find(b'moof.mfhd')
+        tfhd = root.find(b'moof.traf.tfhd')
+
+        seqno = mfhd.seqno
+        track_id = tfhd.track_id
+
+        fragments = encode_chunked(seqno,
+                                   track_id,
+                                   decode_fragment(data, trex_box),
+                                   duration)
+    while True:
+        with stage("chunk"):
+            try:
+                moof, mdat = next(fragments)
+            except StopIteration:
+                return
+            chunk_data = moof.serialize() + mdat.serialize()
+        yield chunk_data
+
+
+def simulate_continuous_production(segment, segment_start, chunk_duration, now_float, clock=SYSTEM_CLOCK):
     "Simulate continuous production by producing as many chunks as time allows."
 
     # print('Segment requested at %fs' % now_float)
@@ -112,11 +120,11 @@ def simulate_continuous_production(segment, segment_start, chunk_duration, now_f
         chunk_availability_time = segment_start + i * chunk_duration
         time_until_available = chunk_availability_time - now_float
         if time_until_available > 0:
-            now_float = time()  # Update time
+            now_float = clock.time()  # Update time
             time_until_available = chunk_availability_time - now_float
             #print('Chunk %d was delayed by %fs, until %fs' % (i, time_until_available, chunk_availability_time))
             if time_until_available > 0:
-                sleep(time_until_available)
+                clock.sleep(time_until_available)
                 #print('Chunk %d was delayed by %fs, until %fs' % (i, time_until_available, chunk_availability_time))
         yield chunk
 
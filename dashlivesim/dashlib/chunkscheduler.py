@@ -0,0 +1,226 @@
+"""Shared chunk-release scheduler for low-latency (chunked) segments.
+
+All connections in a process that request the same chunked segment subscribe to one
+ChunkProducer. The chunks are generated once and each chunk is released once at its
+scheduled time and handed to all subscribers. A connection that joins late gets the
+already released chunks immediately and then follows the common schedule."""
+
+# The copyright in this software is being made available under the BSD License,
+# included below. This software may be subject to other third party and contributor
+# rights, including patent rights, and no such rights are granted under this license.
+#
+# Copyright (c) 2026, Dash Industry Forum.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#  * Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation and/or
+#  other materials provided with the distribution.
+#  * Neither the name of Dash Industry Forum nor the names of its
+#  contributors may be used to endorse or promote products derived from this software
+#  without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS AS IS AND ANY
+#  EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+#  WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+#  INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+#  WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+import threading
+from dashlivesim.dashlib.metrics import cache_lookup
+from dashlivesim.dashlib.caches import register_cache
+from dashlivesim.dashlib.clock import SYSTEM_CLOCK
+
+RELEASE_MARGIN_IN_S = 0.1  # Make chunks available 100ms before the formal time
+LINGER_AFTER_LAST_CHUNK_IN_S = 10  # Keep finished producers for late joiners
+
+
+class ChunkProducerError(Exception):
+    "The chunks of a segment could not be made. Raised in every connection, after the released chunks."
+
+
+class ChunkProducer(object):
+    """Release the chunks of one segment at their scheduled deadlines.
+
+    The deadlines are fixed on the monotonic time of clock when the producer is created,
+    so they do not drift with wall-clock adjustments or with the time spent
+    delivering earlier chunks. Only one subscriber (the leader) sleeps until the
+    next deadline, releases the chunk and wakes up all others.
+
+    chunks can be any iterable. A chunk is only pulled from it when its release
+    time has come, so a lazy generator produces each chunk just in time. If it raises,
+    the error is kept and each subscriber raises ChunkProducerError, so that the server
+    aborts the connections instead of ending the segments early."""
+
+    # pylint: disable=too-many-arguments
+
+    def __init__(self, key, chunks, seg_start, chunk_duration, now_float, clock=SYSTEM_CLOCK):
+        self.key = key
+        self.clock = clock
+        self.chunks = []  # The released chunks
+        self.done = False
+        self.error = None  # Exception from the chunk iterator
+        self.chunk_duration = chunk_duration
+        mono_offset = clock.monotonic() - now_float
+        self._first_deadline = seg_start + chunk_duration - RELEASE_MARGIN_IN_S + mono_offset
+        self._chunk_iter = iter(chunks)
+        self._cond = threading.Condition()
+        self._has_leader = False
+
+    def deadline(self, index):
+        "Monotonic release time for chunk index (0-based)."
+        return self._first_deadline + index * self.chunk_duration
+
+    @property
+    def expiry(self):
+        "Monotonic time after which the producer can be dropped."
+        return self.deadline(len(self.chunks)) + LINGER_AFTER_LAST_CHUNK_IN_S
+
+    def _release_due_chunks(self, index):
+        """Produce and release chunks up to index, if their deadlines have passed.
+
+        Must be called with the lock held."""
+        now = self.clock.monotonic()
+        nr_released = len(self.chunks)
+        while not self.done and len(self.chunks) <= index and self.deadline(len(self.chunks)) <= now:
+            try:
+                self.chunks.append(next(self._chunk_iter))
+            except StopIteration:
+                self.done = True
+            # pylint: disable=broad-except
+            except Exception as exc:
+                self.error = exc
+                self.done = True
+        if self.done or len(self.chunks) != nr_released:
+            self._cond.notify_all()
+
+    def _wait_for_chunk(self, index):
+        "Block until chunk index is released or there are no more chunks. Must be called with the lock held."
+        self._release_due_chunks(index)
+        while len(self.chunks) <= index and not self.done:
+            if self._has_leader:
+                self._cond.wait()
+            else:
+                self._has_leader = True
+                try:
+                    time_until_available = self.deadline(len(self.chunks)) - self.clock.monotonic()
+                    if time_until_available > 0:
+                        self.clock.wait(self._cond, time_until_available)
+                    self._release_due_chunks(index)
+                finally:
+                    self._has_leader = False
+                    self._cond.notify_all()
+
+    def subscribe(self):
+        "Generate the chunks for one connection. Already released chunks come immediately."
+        index = 0
+        while True:
+            with self._cond:
+                self._wait_for_chunk(index)
+                available = self.chunks[index:]
+            if not available:
+                if self.error is not None:
+                    raise ChunkProducerError("Chunk %d of %s: %s" % (index, self.key, self.error)) from self.error
+                break
+            for chunk in available:
+                yield chunk
+            index += len(available)
+
+
+class PendingProducer(object):
+    "A producer that is being made. Connections that want the same segment wait for it."
+
+    def __init__(self):
+        self.ready = threading.Event()
+        self.producer = None
+        self.error = None
+
+    def set_result(self, producer, error=None):
+        self.producer = producer
+        self.error = error
+        self.ready.set()
+
+    def result(self):
+        "Wait for the producer. Raise the error if it could not be made."
+        self.ready.wait()
+        if self.error is not None:
+            raise self.error
+        return self.producer
+
+
+class ChunkScheduler(object):
+    """Registry of ChunkProducers shared by all connections in this process.
+
+    Producers are keyed by the segment they deliver, and are dropped once their
+    last chunk has been released for a while. A producer is made without holding
+    the registry lock, so only connections for the same segment wait for it."""
+
+    def __init__(self):
+        self._producers = {}
+        self._pending = {}  # key -> PendingProducer
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._producers)
+
+    def nbytes(self):
+        "Bytes held in released chunks."
+        with self._lock:
+            producers = list(self._producers.values())
+        return sum(len(chunk) for producer in producers for chunk in producer.chunks)
+
+    def clear(self):
+        "Forget all producers. Connections that already subscribed continue with theirs."
+        with self._lock:
+            self._producers = {}
+            self._pending = {}  # Producers that are being made are not registered
+
+    def get_producer(self, key, make_chunks, seg_start, chunk_duration, now_float, clock=SYSTEM_CLOCK):
+        """Get the producer for key. make_chunks() is only called if there is none yet."""
+        # pylint: disable=too-many-arguments
+        with self._lock:
+            self._drop_expired()
+            producer = self._producers.get(key)
+            pending = self._pending.get(key)
+            cache_lookup("chunks", producer is not None or pending is not None)
+            if producer is not None:
+                return producer
+            if pending is None:
+                pending = self._pending[key] = PendingProducer()
+                is_maker = True
+            else:
+                is_maker = False
+        if not is_maker:
+            return pending.result()
+        try:
+            producer = ChunkProducer(key, make_chunks(), seg_start, chunk_duration, now_float, clock)
+        except Exception as exc:
+            with self._lock:
+                if self._pending.get(key) is pending:
+                    del self._pending[key]
+            pending.set_result(None, exc)
+            raise
+        with self._lock:
+            if self._pending.get(key) is pending:
+                del self._pending[key]
+                self._producers[key] = producer
+        pending.set_result(producer)
+        return producer
+
+    def _drop_expired(self):
+        "Drop producers that are done. Must be called with the lock held."
+        expired = [key for key, producer in self._producers.items() if producer.expiry < producer.clock.monotonic()]
+        for key in expired:
+            del self._producers[key]
+
+
+SCHEDULER = ChunkScheduler()
+register_cache("chunks", SCHEDULER)
@@ -0,0 +1,200 @@
+"""Clocks for the live simulation.
+
+All wall-clock and pacing times of the simulator are read from a clock. Normally this is
+the system clock, but a VirtualClock can run accelerated or jump to any time, so that long
+stretches of live behaviour can be tested and measured without waiting in real time.
+"""
+
+# The copyright in this software is being made available under the BSD License,
+# included below. This software may be subject to other third party and contributor
+# rights, including patent rights, and no such rights are granted under this license.
+#
+# Copyright (c) 2026, Dash Industry Forum.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#  * Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation and/or
+#  other materials provided with the distribution.
+#  * Neither the name of Dash Industry Forum nor the names of its
+#  contributors may be used to endorse or promote products derived from this software
+#  without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS AS IS AND ANY
+#  EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+#  WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+#  INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+#  WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+import threading
+import time
+from datetime import datetime, timezone
+
+CLOCK_ENVIRON_KEY = "dashlivesim.clock"  # WSGI environ key for injecting a clock object
+CLOCK_START_ENV = "CLOCK_START"
+CLOCK_SPEED_ENV = "CLOCK_SPEED"
+
+
+class ClockError(Exception):
+    "Bad clock configuration."
+
+
+class SystemClock(object):
+    "The real wall-clock and monotonic time."
+
+    def time(self):
+        "Wall-clock time in seconds since the epoch."
+        return time.time()
+
+    def monotonic(self):
+        "Monotonic time in seconds."
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        "Sleep for seconds."
+        time.sleep(seconds)
+
+    def wait(self, condition, timeout):
+        "Wait on a threading.Condition, whose lock is held, for at most timeout seconds."
+        return condition.wait(timeout)
+
+
+class VirtualClock(object):
+    """Clock starting at start (seconds since epoch) and running at speed times real time.
+
+    jump() sets the time to any value, but monotonic() never goes back. With speed 0,
+    the clock stands still, and sleep() and wait() advance it instead of blocking, so
+    paced output such as low-latency chunks is produced immediately."""
+
+    def __init__(self, start=None, speed=1.0):
+        if speed < 0:
+            raise ClockError("Clock speed must be >= 0, not %s" % speed)
+        self._lock = threading.Lock()
+        self._speed = float(speed)
+        self._real_base = time.monotonic()
+        self._time_base = time.time() if start is None else float(start)
+        self._monotonic_base = 0.0
+
+    @property
+    def speed(self):
+        "Virtual seconds per real second."
+        return self._speed
+
+    def _elapsed(self):
+        return (time.monotonic() - self._real_base) * self._speed
+
+    def time(self):
+        "Virtual wall-clock time in seconds since the epoch."
+        with self._lock:
+            return self._time_base + self._elapsed()
+
+    def monotonic(self):
+        "Virtual monotonic time in seconds."
+        with self._lock:
+            return self._monotonic_base + self._elapsed()
+
+    def _rebase(self, new_time, speed):
+        "Set the time and speed from now on. Must be called with the lock held."
+        elapsed = self._elapsed()
+        current_time = self._time_base + elapsed
+        self._monotonic_base += elapsed + max(new_time - current_time, 0)
+        self._time_base = new_time
+        self._real_base = time.monotonic()
+        self._speed = float(speed)
+
+    def jump(self, new_time):
+        "Set the time to new_time."
+        with self._lock:
+            self._rebase(float(new_time), self._speed)
+
+    def advance(self, seconds):
+        "Move the time forward by seconds."
+        with self._lock:
+            self._rebase(self._time_base + self._elapsed() + max(seconds, 0), self._speed)
+
+    def set_speed(self, speed):
+        "Change the speed, keeping the current time."
+        if speed < 0:
+            raise ClockError("Clock speed must be >= 0, not %s" % speed)
+        with self._lock:
+            self._rebase(self._time_base + self._elapsed(), speed)
+
+    def sleep(self, seconds):
+        "Sleep for seconds of virtual time."
+        if seconds <= 0:
+            return
+        if self._speed == 0:
+            self.advance(seconds)
+        else:
+            time.sleep(seconds / self._speed)
+
+    def wait(self, condition, timeout):
+        "Wait on a threading.Condition, whose lock is held, for at most timeout seconds of virtual time."
+        if timeout is None:
+            return condition.wait()
+        if self._speed == 0:
+            self.advance(timeout)
+            return False
+        return condition.wait(timeout / self._speed)
+
+
+SYSTEM_CLOCK = SystemClock()
+_default_clock = SYSTEM_CLOCK
+_configured_clocks = {}  # Clocks from CLOCK_START and CLOCK_SPEED, which must live as long as the process
+_configured_lock = threading.Lock()
+
+
+def set_default_clock(clock):
+    "Set the clock used by requests without a configured clock. Return the previous one."
+    global _default_clock  # pylint: disable=global-statement
+    previous = _default_clock
+    _default_clock = clock
+    return previous
+
+
+def parse_start_time(value):
+    "Parse seconds since the epoch or an ISO 8601 time (UTC if no offset is given)."
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        start = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise ClockError("Bad %s %r" % (CLOCK_START_ENV, value))
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    return start.timestamp()
+
+
+def get_clock(environ=None):
+    """Return the clock for a request.
+
+    It is the clock object in environ[CLOCK_ENVIRON_KEY], a VirtualClock configured by
+    CLOCK_START and/or CLOCK_SPEED in environ, or the default clock."""
+    if environ:
+        clock = environ.get(CLOCK_ENVIRON_KEY)
+        if clock is not None:
+            return clock
+        start = environ.get(CLOCK_START_ENV)
+        speed = environ.get(CLOCK_SPEED_ENV)
+        if start is not None or speed is not None:
+            with _configured_lock:
+                clock = _configured_clocks.get((start, speed))
+                if clock is None:
+                    try:
+                        speed_value = float(speed) if speed is not None else 1.0
+                    except ValueError:
+                        raise ClockError("Bad %s %r" % (CLOCK_SPEED_ENV, speed))
+                    clock = VirtualClock(parse_start_time(start) if start is not None else None, speed_value)
+                    _configured_clocks[(start, speed)] = clock
+            return clock
+    return _default_clock
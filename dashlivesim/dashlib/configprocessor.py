@@ -30,11 +30,13 @@
 #  POSSIBILITY OF SUCH DAMAGE.
 
 
-from os.path import join, splitext
+from os.path import splitext
 from collections import namedtuple
 import configparser
 
 from dashlivesim.dashlib.moduloperiod import ModuloPeriod
+from dashlivesim.dashlib.metrics import stage
+from dashlivesim.dashlib.storage import get_storage
 
 DEFAULT_AVAILABILITY_STARTTIME_IN_S = 0  # Jan 1 1970 00:00 UTC
 DEFAULT_AVAILABILITY_TIME_OFFSET_IN_S = 0
@@ -104,7 +106,8 @@ class Config(object):
         self.vod_nr_segments_in_loop = 0
         self.vod_default_tsbd_secs = 0
         self.publish_time = None
-        self.vod_cfg_dir = vod_cfg_dir
+        self.vod_cfg_dir = vod_cfg_dir  # A directory, URL or storage
+        self.vod_cfg_storage = get_storage(vod_cfg_dir)
         self.vod_wrap_seconds = None
         self.add_location = False
         self.start_time = None
@@ -113,6 +116,7 @@ class Config(object):
         self.insert_sidx = False
         self.segtimelineloss = False  # This flag is true only when there is /segtimelineloss_1/
         self.emsg_last_seg = False
+        self.url_options = []  # Option keys present in the URL
 
     def __str__(self):
         lines = ["%s=%s" % (k, v) for (k, v) in self.__dict__.items() if not k.startswith("_")]
@@ -128,15 +132,18 @@ class Config(object):
         self.filename = url_parts[-1]
         self.ext = splitext(self.filename)[1]
 
-    def update_with_reps(self, vod_cfg, url_parts, url_pos):
-        "Update config with representations and their data."
+    def update_with_reps(self, content, url_parts, url_pos):
+        "Update config with representations and their data from the ContentInfo of the catalogue."
         self.reps = []
         if len(url_parts) > url_pos + 2:  # More than just a manifest
             reps = url_parts[-2].split(MUX_DIVIDER)
             for rep in reps:
-                content_type = vod_cfg.content_type_for_rep(rep)
-                timescale = vod_cfg.media_data[content_type]['timescale']
-                rep_data = {'id': rep, 'content_type': content_type, 'timescale': timescale}
+                rep_info = content.representations.get(rep)
+                if rep_info is None:
+                    raise ConfigProcessorError("No representation %s in %s" % (rep, content.name))
+                if self.ext in (".mp4", ".m4s", ".jpg") and (rep_info.content_type == 'image') != (self.ext == ".jpg"):
+                    raise ConfigProcessorError("No %s in representation %s of %s" % (self.ext, rep, content.name))
+                rep_data = {'id': rep, 'content_type': rep_info.content_type, 'timescale': rep_info.timescale}
                 self.reps.append(rep_data)
 
     def update_with_vodcfg(self, vod_cfg):
@@ -158,6 +165,7 @@ class Config(object):
 
     def update_for_cont_update(self, now_int):
         "Set values for case of continuous MPD updates (3hours session)."
+        self.cont = True
         seg_dur = self.seg_duration
         self.availability_start_time_in_s = quantize(now_int - seg_dur, seg_dur)
         self.availability_end_time = self.availability_start_time_in_s + 10800
@@ -267,6 +275,16 @@ class VodConfig(object):
         "Read VoD config data."
         config = configparser.RawConfigParser()
         config.read(config_file)
+        self.parse_config(config)
+
+    def read_config_data(self, data):
+        "Read VoD config data from the bytes of a config file."
+        config = configparser.RawConfigParser()
+        config.read_string(data.decode('utf-8'))
+        self.parse_config(config)
+
+    def parse_config(self, config):
+        "Set the VoD config from a parsed config file."
         version = config.get('General', 'version')
         if version not in self.good_versions:
             raise ConfigProcessorError("Bad config file version: %s (should be in %s)" %
@@ -343,10 +361,11 @@ class ConfigProcessor(object):
                     "insertad", "mpdcallback", "continuous", "segtimeline",
                     "segtimelinenr", "baseurl", "peroff", "scte35", "utc",
                     "snr", "ato", "spd", "sidx", "segtimelineloss",
-                    "sts", "sid", "chunkdur")
+                    "sts", "sid", "chunkdur", "servertiming")
 
-    def __init__(self, vod_cfg_dir, base_url):
+    def __init__(self, vod_cfg_dir, base_url, catalogue):
         self.vod_cfg_dir = vod_cfg_dir
+        self.catalogue = catalogue  # The catalogue of vod_cfg_dir
         self.cfg = Config(vod_cfg_dir, base_url)
 
     def getconfig(self):
@@ -399,6 +418,7 @@ class ConfigProcessor(object):
             if cfg_parts[0] not in self.url_cfg_keys:  # Must handle content like testpic_2s
                 break
             key, value = cfg_parts
+            cfg.url_options.append(key)
             if key == "sts":  # Non-used session_start_time
                 # session_start_time = int(value)
                 pass
@@ -480,13 +500,14 @@ class ConfigProcessor(object):
             elif key == "segtimelineloss":  # If segment timeline loss case signalled.
                 if int(value) == 1:
                     cfg.segtimelineloss = True
+            elif key == "servertiming":  # Add Server-Timing header. Handled in mod_dashlivesim
+                pass
             elif key == "chunkdur":   # Chunkdur
                 try:
                     chunk_duration = float(value)
                     if chunk_duration > 0:
                         cfg.chunk_duration_in_s = chunk_duration
                         cfg.availability_time_complete = False
-                        print(cfg.chunk_duration_in_s)
                 except ValueError:
                     pass
             else:
@@ -494,11 +515,12 @@ class ConfigProcessor(object):
             url_pos += 1
 
         cfg.update_with_filedata(url_parts, url_pos)
-        vod_cfg_file = join(self.vod_cfg_dir, cfg.content_name) + ".cfg"
-        vod_cfg = VodConfig()
-        vod_cfg.read_config(vod_cfg_file)
-        cfg.update_with_reps(vod_cfg, url_parts, url_pos)
-        cfg.update_with_vodcfg(vod_cfg)
+        with stage("cfg_read"):
+            content = self.catalogue.get(cfg.content_name)
+        if content is None:
+            raise ConfigProcessorError("Unknown content %s" % cfg.content_name)
+        cfg.update_with_reps(content, url_parts, url_pos)
+        cfg.update_with_vodcfg(content.vod_cfg)
 
         if start_time is not None:
             if modulo_period is not None:
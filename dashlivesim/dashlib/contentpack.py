@@ -0,0 +1,277 @@
+"""Packed content archives.
+
+A VoD package has thousands of small files per content, so each request costs a path join, an
+open and a stat. The package can instead be compiled into one archive per content,
+<CONTENT_ROOT>/<content>.pack, with all init segments, media segments and thumbnails
+concatenated and an index at the end. The server maps the archive once per process, and the
+pages are shared between all processes via the page cache. MPDs are still read from the
+content directory.
+
+The index has the offset and size of each file and, for media segments, the tfdt, duration and
+sample count of the last moof, as well as the positions of its mfhd, tfdt and trun boxes and of
+the mdat payload, so that segments can be analyzed and patched without parsing them.
+"""
+
+# The copyright in this software is being made available under the BSD License,
+# included below. This software may be subject to other third party and contributor
+# rights, including patent rights, and no such rights are granted under this license.
+#
+# Copyright (c) 2026, Dash Industry Forum.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#  * Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation and/or
+#  other materials provided with the distribution.
+#  * Neither the name of Dash Industry Forum nor the names of its
+#  contributors may be used to endorse or promote products derived from this software
+#  without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS AS IS AND ANY
+#  EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+#  WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+#  INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+#  WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+
+import mmap
+import os
+import sys
+import threading
+from collections import namedtuple
+from struct import Struct
+
+from dashlivesim.dashlib.caches import register_cache
+from dashlivesim.dashlib.initsegmentfilter import InitFilter
+from dashlivesim.dashlib.mp4 import mp4_file
+
+MAGIC = b"DLSPACK1"
+PACK_EXTENSION = ".pack"
+PACKED_EXTENSIONS = (".mp4", ".m4s", ".jpg")  # Init segments, media segments and thumbnails
+HEADER = Struct(">8sQQI4x")  # magic, index offset, index size, number of entries
+ENTRY = Struct(">QQQIIIIIIH")  # offset, size, tfdt, duration, sample_count, 4 positions, path length
+
+PackEntry = namedtuple("PackEntry", "path offset size tfdt duration sample_count mfhd_pos tfdt_pos trun_pos "
+                                    "mdat_payload_pos")
+SegmentInfo = namedtuple("SegmentInfo", "tfdt duration sample_count mfhd_pos tfdt_pos trun_pos mdat_payload_pos")
+NO_SEGMENT_INFO = SegmentInfo(0, 0, 0, 0, 0, 0, 0)
+
+
+class ContentPackError(Exception):
+    "Error in a packed content archive."
+
+
+class SegmentInfoError(ContentPackError):
+    "Media segment whose timing cannot be read."
+
+
+def segment_info(data, default_sample_duration=None):
+    """Timing and box positions of the last moof and mdat in a media segment.
+
+    data is the segment data, or an mp4_file for it, so that only the boxes that are needed are read.
+    Positions are relative to the start of the segment, and 0 if the box is absent."""
+    reader = data if isinstance(data, mp4_file) else mp4_file(data)
+    moof_pos = moof_size = mdat_payload_pos = 0
+    for box_type, offset, size, header_size in reader.box_headers():
+        if box_type == b'moof':
+            moof_pos, moof_size = offset, size
+        elif box_type == b'mdat':
+            mdat_payload_pos = offset + header_size
+    if not moof_size:
+        return NO_SEGMENT_INFO
+    moof = reader.materialize(moof_pos, moof_size)
+    mfhd = moof.find(b'mfhd')
+    tfhd = moof.find(b'traf.tfhd')
+    tfdt = moof.find(b'traf.tfdt')
+    trun = moof.find(b'traf.trun')
+    if not trun:
+        raise SegmentInfoError("No trun in the moof at %d, so the duration is not known" % moof_pos)
+    if trun.has_sample_duration or (tfhd and tfhd.has_default_sample_duration):
+        duration = trun.total_duration
+    elif default_sample_duration is not None:
+        duration = trun.sample_count * default_sample_duration
+    else:
+        duration = 0
+    return SegmentInfo(tfdt.decode_time if tfdt else 0, duration, trun.sample_count,
+                       moof_pos + mfhd.offset if mfhd else 0, moof_pos + tfdt.offset if tfdt else 0,
+                       moof_pos + trun.offset, mdat_payload_pos)
+
+
+def find_files(content_dir):
+    "Paths relative to content_dir, with / as separator, of all files to pack, in sorted order."
+    rel_paths = []
+    for dir_path, dir_names, file_names in os.walk(content_dir):
+        dir_names.sort()
+        rel_dir = os.path.relpath(dir_path, content_dir)
+        for file_name in sorted(file_names):
+            if os.path.splitext(file_name)[1] in PACKED_EXTENSIONS:
+                rel_path = file_name if rel_dir == "." else os.path.join(rel_dir, file_name)
+                rel_paths.append(rel_path.replace(os.sep, "/"))
+    return rel_paths
+
+
+def write_pack(content_dir, pack_path=None):
+    """Pack the files of content_dir. Return (pack_path, number of files).
+
+    The archive is written to a temporary file that then replaces pack_path, so that servers that
+    have mapped an older archive continue to serve it until they reopen it."""
+    content_dir = content_dir.rstrip("/")
+    if pack_path is None:
+        pack_path = content_dir + PACK_EXTENSION
+    default_sample_durations = {}
+    entries = []
+    tmp_path = pack_path + ".tmp"
+    with open(tmp_path, 'wb') as ofh:
+        ofh.write(HEADER.pack(MAGIC, 0, 0, 0))
+        offset = HEADER.size
+        for rel_path in find_files(content_dir):
+            with open(os.path.join(content_dir, rel_path), 'rb') as ifh:
+                data = ifh.read()
+            info = NO_SEGMENT_INFO
+            if rel_path.endswith(".m4s"):
+                rep_dir = os.path.dirname(rel_path)
+                if rep_dir not in default_sample_durations:
+                    default_sample_durations[rep_dir] = read_default_sample_duration(
+                        os.path.join(content_dir, rep_dir, "init.mp4"))
+                info = segment_info(data, default_sample_durations[rep_dir])
+            entries.append(PackEntry(rel_path, offset, len(data), *info))
+            ofh.write(data)
+            offset += len(data)
+        index = b"".join(ENTRY.pack(*entry[1:], len(entry.path.encode('utf-8'))) + entry.path.encode('utf-8')
+                         for entry in entries)
+        ofh.write(index)
+        ofh.seek(0)
+        ofh.write(HEADER.pack(MAGIC, offset, len(index), len(entries)))
+    os.replace(tmp_path, pack_path)
+    return pack_path, len(entries)
+
+
+def read_default_sample_duration(init_path):
+    "default_sample_duration from the trex box of an init segment, or None if there is none."
+    if not os.path.isfile(init_path):
+        return None
+    init_filter = InitFilter(init_path)
+    init_filter.filter()
+    return getattr(init_filter, 'default_sample_duration', None)
+
+
+class ContentPack(object):
+    "A packed content archive, mapped into memory."
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as ifh:
+            if os.fstat(ifh.fileno()).st_size < HEADER.size:
+                raise ContentPackError("%s is too small to be a content pack" % path)
+            self.data = memoryview(mmap.mmap(ifh.fileno(), 0, access=mmap.ACCESS_READ))
+        magic, index_offset, index_size, nr_entries = HEADER.unpack_from(self.data)
+        if magic != MAGIC:
+            raise ContentPackError("%s is not a content pack" % path)
+        if index_offset + index_size > len(self.data):
+            raise ContentPackError("%s is truncated" % path)
+        self.entries = {}
+        pos = index_offset
+        for _ in range(nr_entries):
+            fields = ENTRY.unpack_from(self.data, pos)
+            pos += ENTRY.size
+            rel_path = bytes(self.data[pos:pos + fields[-1]]).decode('utf-8')
+            pos += fields[-1]
+            self.entries[rel_path] = PackEntry(rel_path, *fields[:-1])
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, rel_path):
+        return rel_path in self.entries
+
+    def get(self, rel_path):
+        "Index entry for the file at rel_path, or None if it is not in the pack."
+        return self.entries.get(rel_path)
+
+    def read(self, entry):
+        "The data of entry as a memoryview of the mapping. It is not copied."
+        return self.data[entry.offset:entry.offset + entry.size]
+
+
+def is_below(path, dir_path):
+    "True if path is dir_path or below it. Both are absolute."
+    return path == dir_path or path.startswith(dir_path.rstrip(os.sep) + os.sep)
+
+
+class PackCache(object):
+    """Content packs that are opened once per process.
+
+    Contents without a pack are remembered as well, so that they cost no stat after the first request."""
+
+    def __init__(self):
+        self.packs = {}
+        self.lock = threading.Lock()
+
+    def get(self, pack_path):
+        "The ContentPack at pack_path, or None if there is none."
+        try:
+            return self.packs[pack_path]
+        except KeyError:
+            pass
+        with self.lock:
+            if pack_path not in self.packs:
+                self.packs[pack_path] = ContentPack(pack_path) if os.path.isfile(pack_path) else None
+            return self.packs[pack_path]
+
+    def __len__(self):
+        return sum(1 for pack in list(self.packs.values()) if pack is not None)
+
+    def nbytes(self):
+        "Size of the mapped archives. The pages are in the page cache, and are shared between processes."
+        return sum(len(pack.data) for pack in list(self.packs.values()) if pack is not None)
+
+    def invalidate(self, path):
+        """Forget the pack at path, e.g. after it was created or replaced, or the packs in the directory path.
+
+        Return the number of dropped packs."""
+        path = os.path.abspath(path)
+        with self.lock:
+            dropped = [pack_path for pack_path in self.packs if is_below(os.path.abspath(pack_path), path)]
+            for pack_path in dropped:
+                del self.packs[pack_path]
+        return len(dropped)
+
+    def clear(self):
+        "Forget all packs. A mapping is unmapped when the last response that uses it is done."
+        with self.lock:
+            self.packs = {}
+
+
+PACKS = PackCache()
+register_cache("packs", PACKS)
+
+
+def main():
+    "Pack content directories into archives next to them."
+    from argparse import ArgumentParser
+    parser = ArgumentParser(description="Pack the init segments, media segments and thumbnails of VoD content "
+                                        "into <content>.pack archives.")
+    parser.add_argument("content_dirs", nargs="+", help="content directory, e.g. <CONTENT_ROOT>/testpic")
+    parser.add_argument("-o", "--output", help="archive path (only with one content directory)")
+    args = parser.parse_args()
+    if args.output is not None and len(args.content_dirs) > 1:
+        parser.error("--output can only be used with one content directory")
+    for content_dir in args.content_dirs:
+        if not os.path.isdir(content_dir):
+            print("%s is not a directory" % content_dir, file=sys.stderr)
+            sys.exit(1)
+        pack_path, nr_files = write_pack(content_dir, args.output)
+        print("Packed %d files from %s into %s (%d bytes)" % (nr_files, content_dir, pack_path,
+                                                             os.path.getsize(pack_path)))
+
+
+if __name__ == "__main__":
+    main()
@@ -62,15 +62,24 @@ For infinite content, the default is startNumber = 0, availabilityStartTime = 19
 #  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 #  POSSIBILITY OF SUCH DAMAGE.
 
-from os.path import splitext, join
+import os
+import threading
+from os.path import splitext
 from math import ceil
-from collections import namedtuple
+from collections import OrderedDict, namedtuple
 
 from dashlivesim.dashlib.initsegmentfilter import InitLiveFilter, InitFilter
 from dashlivesim.dashlib.mediasegmentfilter import MediaSegmentFilter
 from dashlivesim.dashlib import segmentmuxer
+from dashlivesim.dashlib.catalogue import get_catalogue
 from dashlivesim.dashlib.configprocessor import ConfigProcessor
+from dashlivesim.dashlib.storage import get_storage
 from dashlivesim.dashlib import chunker
+from dashlivesim.dashlib.clock import get_clock
+from dashlivesim.dashlib.chunkscheduler import SCHEDULER
+from dashlivesim.dashlib.metrics import stage, cache_lookup
+from dashlivesim.dashlib.caches import register_cache
+from dashlivesim.dashlib.contentpack import is_below
 
 SECS_IN_DAY = 24 * 3600
 DEFAULT_MINIMUM_UPDATE_PERIOD = "P100Y"
@@ -81,12 +90,164 @@ UTC_HEAD_PATH = "dash/time.txt"
 
 PUBLISH_TIME = False
 
+MMAP_READS_ENV = "MMAP_READS"  # setEnv MMAP_READS 1 to memory-map media segments instead of reading them
+MAX_CACHED_PAYLOADS = 4096  # SegmentPayloads kept for HEAD and Range requests
+
 ChunkedSegment = namedtuple("ChunkedSegment", "seg_start chunks")
 
 
-def createProvider(host_name, url_parts, args, vod_conf_dir, content_dir, now=None, req=None, is_https=0):
+class PayloadFile(object):
+    """File positioned at the start of a payload, that is not read beyond the end of the payload.
+
+    The file descriptor is available for sendfile, which is then limited by the Content-Length."""
+
+    def __init__(self, path, offset, size):
+        self.ifh = open(path, 'rb')
+        self.ifh.seek(offset)
+        self.remaining = size
+
+    def read(self, size=-1):
+        "Read at most size bytes of the rest of the payload."
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.ifh.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.ifh.fileno()
+
+    def tell(self):
+        return self.ifh.tell()
+
+    def close(self):
+        self.ifh.close()
+
+    @property
+    def closed(self):
+        return self.ifh.closed
+
+
+class SegmentPayload(object):
+    """Filtered segment whose mdat payload is left in the source file.
+
+    The prefix is the filtered output up to and including the mdat header
+    (empty for thumbnails, where the whole file is the payload).
+    The total length is known without reading the payload, and slices
+    only read the part of the file that is needed."""
+
+    def __init__(self, prefix, path, offset, size):
+        self.prefix = prefix
+        self.path = path
+        self.offset = offset
+        self.size = size
+
+    def __len__(self):
+        return len(self.prefix) + self.size
+
+    def __getitem__(self, item):
+        start, stop, step = item.indices(len(self))
+        assert step == 1, "Only contiguous slices supported"
+        if stop <= start:
+            return b""
+        prefix_len = len(self.prefix)
+        data = self.prefix[start:stop]
+        if stop > prefix_len:
+            file_start = max(start - prefix_len, 0)
+            data += self.read_payload(file_start, stop - prefix_len - file_start)
+        return data
+
+    def __bytes__(self):
+        return self.prefix + self.read_payload(0, self.size)
+
+    def open_payload(self):
+        "Open the file positioned at the start of the payload, e.g. in a content pack."
+        return PayloadFile(self.path, self.offset, self.size)
+
+    def read_payload(self, start, size):
+        "Read size bytes starting at start in the mdat payload."
+        with open(self.path, 'rb') as ifh:
+            ifh.seek(self.offset + start)
+            return ifh.read(size)
+
+    def fingerprint(self):
+        "Bytes that change if the output changes. Used instead of the full payload for ETags."
+        stat = os.stat(self.path)
+        return self.prefix + ("%s:%d:%d:%d" % (self.path, self.offset, self.size, stat.st_mtime_ns)).encode('utf-8')
+
+
+class PayloadCache(object):
+    """The SegmentPayloads of recent responses, for HEAD and Range requests.
+
+    A SegmentPayload only holds the filtered boxes and the place of the mdat payload, so the size, ETag and
+    any byte range of a response can be had from it without filtering the segment again. An entry is only
+    used if its file has not been modified since, and the least recently used entries are dropped first."""
+
+    def __init__(self, max_entries=MAX_CACHED_PAYLOADS):
+        self.max_entries = max_entries
+        self.payloads = OrderedDict()  # key -> (SegmentPayload, mtime_ns of its file)
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        "The SegmentPayload for key, or None if there is none or its file has changed."
+        with self.lock:
+            entry = self.payloads.get(key)
+            if entry is not None:
+                self.payloads.move_to_end(key)
+        if entry is not None:
+            payload, mtime_ns = entry
+            try:
+                if os.stat(payload.path).st_mtime_ns != mtime_ns:
+                    entry = None
+            except OSError:
+                entry = None
+        cache_lookup("payloads", entry is not None)
+        return entry[0] if entry is not None else None
+
+    def put(self, key, payload):
+        try:
+            mtime_ns = os.stat(payload.path).st_mtime_ns
+        except OSError:
+            return
+        with self.lock:
+            self.payloads[key] = (payload, mtime_ns)
+            self.payloads.move_to_end(key)
+            while len(self.payloads) > self.max_entries:
+                self.payloads.popitem(last=False)
+
+    def __len__(self):
+        return len(self.payloads)
+
+    def nbytes(self):
+        "Size of the filtered boxes. The payloads are in their files."
+        with self.lock:
+            payloads = list(self.payloads.values())
+        return sum(len(payload.prefix) for payload, _ in payloads)
+
+    def invalidate(self, path):
+        "Drop the payloads in the file path, or below the directory path. Return their number."
+        path = os.path.abspath(path)
+        with self.lock:
+            dropped = [key for key, (payload, _) in self.payloads.items()
+                       if is_below(os.path.abspath(payload.path), path)]
+            for key in dropped:
+                del self.payloads[key]
+        return len(dropped)
+
+    def clear(self):
+        with self.lock:
+            self.payloads = OrderedDict()
+
+
+PAYLOADS = PayloadCache()
+register_cache("payloads", PAYLOADS)
+
+
+def createProvider(host_name, url_parts, args, vod_conf_dir, content_dir, now=None, req=None, is_https=0,
+                   clock=None, mmap_reads=False):
     "Create DashProvider so that we can handle request later."
-    return DashProvider(host_name, url_parts, args, vod_conf_dir, content_dir, now, req, is_https)
+    return DashProvider(host_name, url_parts, args, vod_conf_dir, content_dir, now, req, is_https, clock,
+                        mmap_reads)
 
 
 class DashProxyError(Exception):
@@ -102,23 +263,52 @@ class DashProvider(object):
 
     # pylint: disable=too-many-instance-attributes,too-many-arguments
 
-    def __init__(self, host_name, url_parts, url_args, vod_conf_dir, content_dir, now=None, req=None, is_https=0):
+    def __init__(self, host_name, url_parts, url_args, vod_conf_dir, content_dir, now=None, req=None, is_https=0,
+                 clock=None, mmap_reads=False):
         protocol = is_https and "https" or "http"
         self.base_url = "%s://%s/%s/" % (protocol, host_name, url_parts[0])  # The start. Adding other parts later.
         self.utc_head_url = "%s://%s/%s" % (protocol, host_name, UTC_HEAD_PATH)
         self.url_parts = url_parts[1:]
         self.url_args = url_args
         self.vod_conf_dir = vod_conf_dir
-        self.content_dir = content_dir
+        self.content_dir = content_dir  # A directory, URL or storage
+        self.storage = get_storage(content_dir)
+        self.content_storage = None  # Set by get_content_storage()
+        self.clock = clock if clock is not None else get_clock()  # For pacing of chunks
+        self.mmap_reads = mmap_reads  # Memory-map media segments that are read in full
+        if now is None:
+            now = self.clock.time()
         self.now_float = now  # float
         self.now = int(now)
         self.req = req
         self.new_tfdt_value = None
-        self.cfg_processor = ConfigProcessor(self.vod_conf_dir, self.base_url)
-        self.cfg_processor.process_url(self.url_parts, self.now)
+        self.segment_ast = None  # Availability start time of the requested segment (set when processed)
+        self.cfg_processor = ConfigProcessor(self.vod_conf_dir, self.base_url, get_catalogue(self.vod_conf_dir))
+        with stage("config"):
+            self.cfg_processor.process_url(self.url_parts, self.now)
         self.cfg = self.cfg_processor.getconfig()
 
 
+def get_content_storage(dashProv):
+    "Storage for the files of the requested content, e.g. its directory or its pack."
+    if dashProv.content_storage is None:
+        dashProv.content_storage = dashProv.storage.content(dashProv.cfg.content_name)
+    return dashProv.content_storage
+
+
+def content_file(dashProv, rel_file):
+    """Return (file_name, data) for a file of the requested content.
+
+    rel_file is the path relative to the content directory. If the file is a part of a larger file,
+    e.g. a pack, data is its data and file_name is None. Otherwise data is None, and the file is
+    to be read from file_name."""
+    storage = get_content_storage(dashProv)
+    file_name = storage.local_file(rel_file)
+    if file_name is None:
+        return None, storage.read(rel_file)
+    return file_name, None
+
+
 def error_response(dashProv, msg):
     "Return a mod_python error response."
     if dashProv.req:
@@ -138,7 +328,12 @@ def get_init(dashProv):
     return response
 
 
-def get_media(dashProv, chunk=False):
+def get_media(dashProv, chunk=False, passthrough=False, cached=None, head=False):
+    """Get media segment or thumbnail.
+
+    With passthrough, a thumbnail or non-multiplexed segment may be returned as a SegmentPayload.
+    A cached SegmentPayload for the request is returned after the timing checks instead of filtering the
+    segment again. With head, a chunked segment is returned without chunks, so no producer is started."""
     cfg = dashProv.cfg
     if cfg.ext not in (".m4s", ".jpg"):  # Media segment or thumbnail
         raise ValueError(f"Extension {cfg.ext} not for media")
@@ -173,7 +368,8 @@ def get_media(dashProv, chunk=False):
                     elif now_mod_60 == i * total_dur + dur1:
                         # Just before down time starts, add emsg box to the segment.
                         cfg.emsg_last_seg = True
-                        response = process_media_segment(dashProv, dashProv.now_float, chunk)
+                        response = process_media_segment(dashProv, dashProv.now_float, chunk, passthrough,
+                                                         cached, head)
                         cfg.emsg_last_seg = False
             elif a_var[0] == 'd' and b_var[0] == 'u':
                 for i in range(num_loop):
@@ -181,9 +377,9 @@ def get_media(dashProv, chunk=False):
                         response = error_response(dashProv, "BaseURL server down at %d" % (dashProv.now))
                         break
         if response is None:
-            response = process_media_segment(dashProv, dashProv.now_float, chunk)
+            response = process_media_segment(dashProv, dashProv.now_float, chunk, passthrough, cached, head)
     else:  # cfg.ext == ".jpg"
-        response = process_thumbnail(dashProv, dashProv.now_float)
+        response = process_thumbnail(dashProv, dashProv.now_float, passthrough)
     return response
 
 
@@ -193,23 +389,27 @@ def process_init_segment(dashProv):
 
     nr_reps = len(cfg.reps)
     if nr_reps == 1:  # Not muxed
-        init_file = "%s/%s/%s/%s" % (dashProv.content_dir, cfg.content_name, cfg.rel_path, cfg.filename)
-        ilf = InitLiveFilter(init_file)
-        data = ilf.filter()
+        init_file, init_data = content_file(dashProv, "%s/%s" % (cfg.rel_path, cfg.filename))
+        ilf = InitLiveFilter(init_file, init_data)
+        with stage("filter"):
+            data = ilf.filter()
     elif nr_reps == 2:  # Something that can be muxed
-        com_path = "/".join(cfg.rel_path.split("/")[:-1])
-        init1 = "%s/%s/%s/%s/%s" % (dashProv.content_dir, cfg.content_name, com_path, cfg.reps[0]['id'], cfg.filename)
-        init2 = "%s/%s/%s/%s/%s" % (dashProv.content_dir, cfg.content_name, com_path, cfg.reps[1]['id'], cfg.filename)
-        muxed_inits = segmentmuxer.MultiplexInits(init1, init2)
-        data = muxed_inits.construct_muxed()
+        com_path_parts = cfg.rel_path.split("/")[:-1]
+        init1, data1 = content_file(dashProv, "/".join(com_path_parts + [cfg.reps[0]['id'], cfg.filename]))
+        init2, data2 = content_file(dashProv, "/".join(com_path_parts + [cfg.reps[1]['id'], cfg.filename]))
+        with stage("mux"):
+            muxed_inits = segmentmuxer.MultiplexInits(init1, init2, data1, data2)
+            data = muxed_inits.construct_muxed()
     else:
         data = error_response(dashProv, "Bad nr of representations: %d" % nr_reps)
     return data
 
 
-def process_media_segment(dashProv, now_float, chunk):
+def process_media_segment(dashProv, now_float, chunk, passthrough=False, cached=None, head=False):
     """Process media segment. Return error response if timing is not OK.
 
+    A cached SegmentPayload is returned as it is, and with head a chunked segment gets no chunks.
+
     Assumes that segment_ast = (seg_nr+1-startNumber)*seg_dur + ast."""
 
     # pylint: disable=too-many-locals
@@ -249,6 +449,7 @@ def process_media_segment(dashProv, now_float, chunk):
     media_time_at_ast = cfg.adjusted_pto(0, timescale)
     seg_time = (seg_nr - seg_start_nr) * seg_dur + media_time_at_ast
     seg_ast = (seg_time + seg_dur - media_time_at_ast) + cfg.availability_start_time_in_s
+    dashProv.segment_ast = seg_ast
 
     if cfg.availability_time_offset_in_s != -1:  # - 1 is infinity
         if now_float < seg_ast - cfg.availability_time_offset_in_s:
@@ -268,18 +469,32 @@ def process_media_segment(dashProv, now_float, chunk):
     rel_path = cfg.rel_path
     nr_reps = len(cfg.reps)
     if nr_reps == 1:  # Not muxed
+        if chunk and head:  # The length is not known in advance, so there is nothing to produce.
+            return ChunkedSegment(seg_ast - seg_dur, None)
         if chunk:
-            trex_data = get_trex_data(dashProv, rel_path)
-            seg_content = filter_media_segment(dashProv, cfg.reps[0], rel_path, vod_nr, seg_nr, seg_ext,
-                                               offset_at_loop_start, lmsg, trex_data)
-            # Here we shall return seg_time (when the segment start to be produced)
-            # and then each chunk should be delivered at seg_time + (i+1) * chunk_dur
-            dur = int(cfg.chunk_duration_in_s * cfg.reps[0]['timescale'])
-            chunks = [chk for chk in chunker.chunk(seg_content, dur, trex_data)]
-            return ChunkedSegment(seg_time, chunks)
+            def make_chunks():
+                """Filter the segment and return a lazy chunk generator. Only done once for all connections.
+
+                The filtering is done here, so that errors still result in a 404 response."""
+                trex_data = get_trex_data(dashProv, rel_path)
+                seg_content = filter_media_segment(dashProv, cfg.reps[0], rel_path, vod_nr, seg_nr, seg_ext,
+                                                   offset_at_loop_start, lmsg, trex_data)
+                dur = int(cfg.chunk_duration_in_s * cfg.reps[0]['timescale'])
+                return chunker.chunk(seg_content, dur, trex_data)
+            # The segment starts to be produced at seg_ast - seg_dur (wall-clock)
+            # and chunk i (1-based) is released at that time + i * chunk_dur.
+            seg_production_start = seg_ast - seg_dur
+            # The deadlines are on the request's clock, so requests with other clocks get other producers.
+            # The producer keeps its clock, so the id is not reused while the key is registered.
+            key = ("/".join(dashProv.url_parts), cfg.availability_start_time_in_s, id(dashProv.clock))
+            producer = SCHEDULER.get_producer(key, make_chunks, seg_production_start,
+                                              cfg.chunk_duration_in_s, now_float, dashProv.clock)
+            return ChunkedSegment(seg_production_start, producer.subscribe())
+        elif cached is not None:
+            seg_content = cached
         else:
             seg_content = filter_media_segment(dashProv, cfg.reps[0], rel_path, vod_nr, seg_nr, seg_ext,
-                                               offset_at_loop_start, lmsg)
+                                               offset_at_loop_start, lmsg, passthrough=passthrough)
     else:
         rel_path_parts = rel_path.split("/")
         common_path_parts = rel_path_parts[:-1]
@@ -289,25 +504,30 @@ def process_media_segment(dashProv, now_float, chunk):
                                     offset_at_loop_start, lmsg)
         seg2 = filter_media_segment(dashProv, cfg.reps[1], rel_path2, vod_nr, seg_nr, seg_ext,
                                     offset_at_loop_start, lmsg)
-        muxed = segmentmuxer.MultiplexMediaSegments(data1=seg1, data2=seg2)
-        seg_content = muxed.mux_on_sample_level()
+        with stage("mux"):
+            muxed = segmentmuxer.MultiplexMediaSegments(data1=seg1, data2=seg2)
+            seg_content = muxed.mux_on_sample_level()
     return seg_content
 
 
 def get_trex_data(dashProv, rel_path):
     "Get object which has default_sample_duration and other trex data."
-    cfg = dashProv.cfg
-    init_file = join(dashProv.content_dir, cfg.content_name, rel_path, "init.mp4")
-    init_filter = InitFilter(init_file)
-    init_filter.filter()
+    init_file, init_data = content_file(dashProv, "%s/init.mp4" % rel_path)
+    init_filter = InitFilter(init_file, init_data)
+    with stage("filter"):
+        init_filter.filter()
     return init_filter
 
 
 # pylint: disable=too-many-arguments
-def filter_media_segment(dashProv, rep, rel_path, vod_nr, seg_nr, seg_ext, offset_at_loop_start, lmsg, trex_data=None):
-    "Filter an actual media segment by using time-scale from init segment."
+def filter_media_segment(dashProv, rep, rel_path, vod_nr, seg_nr, seg_ext, offset_at_loop_start, lmsg, trex_data=None,
+                         passthrough=False):
+    """Filter an actual media segment by using time-scale from init segment.
+
+    With passthrough, the mdat payload is not read and a SegmentPayload is returned."""
     cfg = dashProv.cfg
-    media_seg_file = join(dashProv.content_dir, cfg.content_name, rel_path, "%d%s" % (vod_nr, seg_ext))
+    media_seg_rel_file = "%s/%d%s" % (rel_path, vod_nr, seg_ext)
+    media_seg_file, media_seg_data = content_file(dashProv, media_seg_rel_file)
     timescale = rep['timescale']
     scte35_per_minute = (rep['content_type'] == 'video') and cfg.scte35_per_minute or 0
     is_ttml = rep['content_type'] == 'subtitles'
@@ -317,15 +537,26 @@ def filter_media_segment(dashProv, rep, rel_path, vod_nr, seg_nr, seg_ext, offse
                                     is_ttml,
                                     default_sample_duration,
                                     insert_sidx=cfg.insert_sidx, emsg_last_seg=cfg.emsg_last_seg,
-                                    now=dashProv.now)
-    seg_content = seg_filter.filter()
+                                    now=dashProv.now, mdat_passthrough=passthrough,
+                                    mmap_reads=dashProv.mmap_reads,
+                                    data=media_seg_data)
+    with stage("filter"):
+        seg_content = seg_filter.filter()
     dashProv.new_tfdt_value = seg_filter.get_tfdt_value()  # Why set this in dashProv?? TODO
+    if seg_filter.mdat_payload is not None:
+        offset, size = seg_filter.mdat_payload
+        if media_seg_file is None:  # The segment is a part of a larger file
+            extent = get_content_storage(dashProv).extent(media_seg_rel_file)
+            media_seg_file, offset = extent.path, extent.offset + offset
+        seg_content = SegmentPayload(seg_content, media_seg_file, offset, size)
     return seg_content
 
 
-def process_thumbnail(dashProv, now_float):
+def process_thumbnail(dashProv, now_float, passthrough=False):
     """Process thumbnail. Return error response if timing is not OK.
 
+    With passthrough, a SegmentPayload for the file is returned instead of its content.
+
     Assumes that segment_ast = (seg_nr+1-startNumber)*seg_dur."""
 
     # pylint: disable=too-many-locals
@@ -352,22 +583,23 @@ def process_thumbnail(dashProv, now_float):
         seg_nr = int(seg_base)
     seg_start_nr = cfg.start_nr == -1 and 1 or cfg.start_nr
     if seg_nr < seg_start_nr:
-        return error_response("Request for segment %d before first %d" % (seg_nr, seg_start_nr))
+        return error_response(dashProv, "Request for segment %d before first %d" % (seg_nr, seg_start_nr))
     if len(cfg.last_segment_numbers) > 0:
         very_last_segment = cfg.last_segment_numbers[-1]
         if seg_nr > very_last_segment:
-            return error_response("Request for segment %d beyond last (%d)" % (seg_nr, very_last_segment))
+            return error_response(dashProv, "Request for segment %d beyond last (%d)" % (seg_nr, very_last_segment))
     # lmsg = seg_nr in cfg.last_segment_numbers
     # print cfg.last_segment_numbers
     seg_time = (seg_nr - seg_start_nr) * seg_dur + cfg.availability_start_time_in_s
     seg_ast = seg_time + seg_dur
+    dashProv.segment_ast = seg_ast
 
     if cfg.availability_time_offset_in_s != -1:  # -1 is infinity
         if now_float < seg_ast - cfg.availability_time_offset_in_s:
-            return error_response("Request for %s was %.1fs too early" % (seg_name, seg_ast - now_float))
+            return error_response(dashProv, "Request for %s was %.1fs too early" % (seg_name, seg_ast - now_float))
         if (now_float > seg_ast + seg_dur + cfg.timeshift_buffer_depth_in_s):
             diff = now_float - (seg_ast + seg_dur + cfg.timeshift_buffer_depth_in_s)
-            return error_response("Request for %s was %.1fs too late" % (seg_name, diff))
+            return error_response(dashProv, "Request for %s was %.1fs too late" % (seg_name, diff))
 
     time_since_ast = seg_time - cfg.availability_start_time_in_s
     loop_duration = cfg.seg_duration * cfg.vod_nr_segments_in_loop
@@ -376,8 +608,10 @@ def process_thumbnail(dashProv, now_float):
     vod_nr = seg_nr_in_loop + cfg.vod_first_segment_in_loop
     assert 0 <= vod_nr - cfg.vod_first_segment_in_loop < cfg.vod_nr_segments_in_loop
     rel_path = cfg.rel_path
-    thumb_path = join(dashProv.content_dir, cfg.content_name, rel_path,
-                      "%d%s" % (vod_nr, seg_ext))
-    with open(thumb_path, 'rb') as ifh:
-        seg_content = ifh.read()
+    thumb_file = "%s/%d%s" % (rel_path, vod_nr, seg_ext)
+    storage = get_content_storage(dashProv)
+    if passthrough:
+        return SegmentPayload(b"", *storage.extent(thumb_file))
+    with stage("read"):
+        seg_content = bytes(storage.read(thumb_file))
     return seg_content
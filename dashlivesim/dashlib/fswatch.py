@@ -0,0 +1,304 @@
+"""Watch content and config directories, and invalidate the caches when files change.
+
+With
+
+    setEnv WATCH_FILES 1
+
+each server process watches the local VOD_CONF_DIR and CONTENT_ROOT directories from its first request on.
+On Linux, inotify is used, so that changes are seen at once and unchanged files cost nothing. Elsewhere, or if
+inotify is not available, or with WATCH_FILES set to poll, the directories are scanned every WATCH_INTERVAL seconds
+and the modification times and sizes of the files are compared.
+
+Each changed file is passed to caches.invalidate(), which drops what depends on it from every registered cache.
+The changes and the dropped entries are counted in the metrics.
+"""
+
+# The copyright in this software is being made available under the BSD License,
+# included below. This software may be subject to other third party and contributor
+# rights, including patent rights, and no such rights are granted under this license.
+#
+# Copyright (c) 2026, Dash Industry Forum.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#  * Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation and/or
+#  other materials provided with the distribution.
+#  * Neither the name of Dash Industry Forum nor the names of its
+#  contributors may be used to endorse or promote products derived from this software
+#  without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS AS IS AND ANY
+#  EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+#  WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+#  INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+#  WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+
+from dashlivesim.dashlib import caches
+from dashlivesim.dashlib.metrics import REGISTRY, FILE_CHANGES
+from dashlivesim.dashlib.storage import is_url
+
+WATCH_FILES_ENV = "WATCH_FILES"  # setEnv WATCH_FILES 1 (or poll) to invalidate caches when files change
+WATCH_INTERVAL_ENV = "WATCH_INTERVAL"  # Seconds between scans when polling
+POLL = "poll"
+DEFAULT_INTERVAL = 5.0
+TEMPORARY_EXTENSION = ".tmp"  # Files that are being written, e.g. by contentpack, before they are renamed
+
+# From <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT = struct.Struct("iIII")  # wd, mask, cookie, len. Followed by len bytes of name.
+
+
+def file_changed(path, watcher_type):
+    "Invalidate the caches that depend on path. Return the number of dropped entries."
+    if path.endswith(TEMPORARY_EXTENSION):
+        return 0
+    REGISTRY.inc(FILE_CHANGES, (("watcher", watcher_type),))
+    return caches.invalidate(path)
+
+
+class PollingWatcher(object):
+    "Find changed files below some directories by comparing their modification times and sizes periodically."
+
+    watcher_type = POLL
+
+    def __init__(self, dirs, callback=file_changed, interval=DEFAULT_INTERVAL):
+        self.dirs = dirs
+        self.callback = callback
+        self.interval = interval
+        self.files = self.scan()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def scan(self):
+        "Return {path: (mtime_ns, size)} for all files below the directories."
+        files = {}
+        for top_dir in self.dirs:
+            for dir_path, _, file_names in os.walk(top_dir):
+                for file_name in file_names:
+                    path = os.path.join(dir_path, file_name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:  # Removed during the scan
+                        continue
+                    files[path] = (stat.st_mtime_ns, stat.st_size)
+        return files
+
+    def check(self):
+        "Scan once, and call back for each created, changed or removed file. Return the changed paths."
+        files = self.scan()
+        changed = sorted(path for path in set(self.files) | set(files) if self.files.get(path) != files.get(path))
+        self.files = files
+        for path in changed:
+            self.callback(path, self.watcher_type)
+        return changed
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.check()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="fswatch", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+
+
+class InotifyWatcher(object):
+    """Get changed files below some directories from Linux inotify.
+
+    Every directory is watched, including new ones. A directory that is created, moved or removed is reported as
+    changed, which stands for all files below it, and the watches of a moved or removed directory are dropped.
+    If the kernel event queue overflows, the changes are not known, and all caches are cleared instead."""
+
+    watcher_type = "inotify"
+
+    def __init__(self, dirs, callback=file_changed, timeout=1.0):
+        self.dirs = dirs
+        self.callback = callback
+        self.timeout = timeout  # How often the thread checks if it is stopped
+        self.libc = load_libc()
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches = {}  # Watch descriptor -> directory
+        try:
+            for top_dir in dirs:
+                self.add_tree(top_dir)
+        except OSError:
+            os.close(self.fd)
+            raise
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def add_watch(self, dir_path):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(dir_path), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, "inotify_add_watch failed for %s: %s" % (dir_path, os.strerror(err)))
+        self.watches[wd] = dir_path
+
+    def add_tree(self, top_dir):
+        "Watch top_dir and all directories below it."
+        for dir_path, _, _ in os.walk(top_dir):
+            self.add_watch(dir_path)
+
+    def remove_tree(self, top_dir):
+        "Stop watching top_dir and all directories below it, e.g. after it was moved away."
+        prefix = top_dir + os.sep
+        for wd, dir_path in list(self.watches.items()):
+            if dir_path == top_dir or dir_path.startswith(prefix):
+                self.libc.inotify_rm_watch(self.fd, wd)  # Fails harmlessly if the directory was removed
+                del self.watches[wd]
+
+    def read_events(self):
+        "Read the pending events. Return the changed paths, in order, or None if events were lost."
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return []
+        changed = []
+        pos = 0
+        while pos < len(data):
+            wd, mask, _, name_len = EVENT.unpack_from(data, pos)
+            name = data[pos + EVENT.size:pos + EVENT.size + name_len].rstrip(b"\0")
+            pos += EVENT.size + name_len
+            if mask & IN_Q_OVERFLOW:
+                return None
+            if mask & IN_IGNORED:  # The directory was removed
+                self.watches.pop(wd, None)
+                continue
+            dir_path = self.watches.get(wd)
+            if dir_path is None or not name:
+                continue
+            path = os.path.join(dir_path, os.fsdecode(name))
+            if mask & IN_ISDIR:
+                if mask & (IN_MOVED_FROM | IN_DELETE):
+                    self.remove_tree(path)
+                elif mask & (IN_CREATE | IN_MOVED_TO):
+                    try:
+                        self.add_tree(path)
+                    except OSError:  # Already removed again
+                        pass
+            elif mask & IN_CREATE:  # Wait for IN_CLOSE_WRITE, when the file has been written
+                continue
+            if path not in changed:
+                changed.append(path)
+        return changed
+
+    def check(self, timeout=0):
+        "Wait at most timeout seconds for events, and call back for each changed path. Return the changed paths."
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        changed = self.read_events()
+        if changed is None:
+            REGISTRY.inc(FILE_CHANGES, (("watcher", self.watcher_type),))
+            caches.clear_caches()
+            return []
+        for path in changed:
+            self.callback(path, self.watcher_type)
+        return changed
+
+    def run(self):
+        try:
+            while not self.stopped.is_set():
+                self.check(self.timeout)
+        finally:
+            os.close(self.fd)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="fswatch", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+        else:
+            os.close(self.fd)
+
+
+def load_libc():
+    "The C library with the inotify functions. Raise OSError if there is none."
+    if not sys.platform.startswith("linux"):
+        raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+    libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    if not hasattr(libc, "inotify_init1"):
+        raise OSError(errno.ENOSYS, "No inotify in the C library")
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+    return libc
+
+
+def make_watcher(dirs, poll=False, interval=DEFAULT_INTERVAL):
+    "An InotifyWatcher for dirs, or a PollingWatcher if poll is set or inotify cannot be used."
+    if not poll:
+        try:
+            return InotifyWatcher(dirs)
+        except OSError as exc:
+            print("fswatch: %s. Polling every %gs instead." % (exc, interval))
+    return PollingWatcher(dirs, interval=interval)
+
+
+WATCHERS = {}  # Watched directory tuples -> running watcher
+WATCHED = {}  # (VOD_CONF_DIR, CONTENT_ROOT) -> running watcher, or None if they are not local directories
+_lock = threading.Lock()
+
+
+def watch(environ):
+    """Start watching the local VOD_CONF_DIR and CONTENT_ROOT of environ, unless they are already watched.
+
+    Called on each request, so the check for a running watcher is a dictionary lookup. The directories are
+    resolved on the first request with each pair of locations. A directory that does not exist then is not
+    watched until the server is restarted."""
+    locations = (environ.get('VOD_CONF_DIR'), environ.get('CONTENT_ROOT'))
+    if locations in WATCHED:
+        return WATCHED[locations]
+    with _lock:
+        if locations not in WATCHED:
+            dirs = tuple(location for location in locations
+                         if location and not is_url(location) and os.path.isdir(location))
+            watcher = WATCHERS.get(dirs)
+            if dirs and watcher is None:
+                poll = environ.get(WATCH_FILES_ENV, "").lower() == POLL
+                interval = float(environ.get(WATCH_INTERVAL_ENV, DEFAULT_INTERVAL))
+                watcher = WATCHERS[dirs] = make_watcher(dirs, poll, interval)
+                watcher.start()
+            WATCHED[locations] = watcher
+    return WATCHED[locations]
+
@@ -32,14 +32,24 @@
 from dashlivesim.dashlib import emsg
 from dashlivesim.dashlib import scte35
 from dashlivesim.dashlib.mp4filter import MP4Filter
+from array import array
+from functools import partial
+from struct import pack_into, unpack_from
+
 from dashlivesim.dashlib.structops import str_to_uint32, uint32_to_str, str_to_uint64,\
-                                uint64_to_str, str_to_sint32, sint32_to_str
+                                uint64_to_str, str_to_uint32_array, str_to_uint64_array, uint_array_to_str
 from dashlivesim.dashlib.ttml_timing_offset import adjust_ttml_content
 from dashlivesim.dashlib.timeformatconversions import make_timestamp
+from dashlivesim.dashlib.tracing import traced
 
 KEEP_SIDX = False
 
 
+def shift_data_offset(buf, offset, size_change):
+    "Shift a trun data_offset, which is relative to the moof, by the size change of the moof."
+    pack_into(">i", buf, offset, unpack_from(">i", buf, offset)[0] + size_change)
+
+
 class MediaSegmentFilterError(Exception):
     "Error in MediaSegmentFilter."
 
@@ -52,9 +62,13 @@ class MediaSegmentFilter(MP4Filter):
     # pylint: disable=too-many-instance-attributes, too-many-arguments
     def __init__(self, file_name, seg_nr=None, seg_duration=1, offset=0, lmsg=False, track_timescale=None,
                  scte35_per_minute=0, rel_path=None, is_ttml=False,
-                 default_sample_duration=None, insert_sidx=False, emsg_last_seg=False, now=False):
-        MP4Filter.__init__(self, file_name)
-        self.top_level_boxes_to_parse = [b'styp', b'sidx', b'moof', b'mdat']
+                 default_sample_duration=None, insert_sidx=False, emsg_last_seg=False, now=False,
+                 mdat_passthrough=False, mmap_reads=False, data=None):
+        MP4Filter.__init__(self, file_name, data, mdat_passthrough=mdat_passthrough and not is_ttml,
+                           mmap_reads=mmap_reads)
+        self.top_level_boxes_to_parse = [b'styp', b'sidx', b'moof']
+        if is_ttml:  # Other mdat boxes are passed on without a copy
+            self.top_level_boxes_to_parse.append(b'mdat')
         self.composite_boxes_to_parse = [b'moof', b'traf']
         self.seg_nr = seg_nr
         self.seg_duration = seg_duration
@@ -73,34 +87,20 @@ class MediaSegmentFilter(MP4Filter):
         self.ttml_size = None
         self.emsg_last_seg = emsg_last_seg
         self.now = now
-        if self.is_ttml:
-            self.data = self.find_and_process_mdat(self.data)
 
     def finalize(self):
+        moof_index = 0
+        for i, part in enumerate(self.output_parts):
+            if part[4:8] == b'moof':
+                moof_index = i
         if self.insert_sidx:
             seg_size = 0
-            pos = 0
-            moof_start = 0
             for size, box in self.output_top_level_boxes:
-                if box == b'moof':
-                    moof_start = pos
-                    seg_size += size
-                elif box == b'mdat':
+                if box in (b'moof', b'mdat'):
                     seg_size += size
-                pos += size
-            sidx = self.create_sidx(seg_size)
-            self.output = (self.output[:moof_start] + sidx +
-                           self.output[moof_start:])
+            self.output_parts.insert(moof_index, self.create_sidx(seg_size))
         if self.emsg_last_seg:
-            pos = 0
-            moof_start = 0
-            for size, box in self.output_top_level_boxes:
-                if box == b'moof':
-                    moof_start = pos
-                pos += size
-            emsg_box = self.create_emsg()
-            self.output = (self.output[:moof_start] + emsg_box +
-                           self.output[moof_start:])
+            self.output_parts.insert(moof_index, self.create_emsg())
 
     # pylint: disable=no-self-use
 
@@ -128,7 +128,7 @@ class MediaSegmentFilter(MP4Filter):
         return output
 
     def process_tfhd(self, data):
-        "Process tfhd (assuming that we know the ttml size size)."
+        "Process tfhd and set the ttml sample size, when the mdat has been processed."
         tf_flags = str_to_uint32(data[8:12]) & 0xffffff
         pos = 16
         if tf_flags & 0x01:
@@ -138,22 +138,19 @@ class MediaSegmentFilter(MP4Filter):
         if tf_flags & 0x08:
             self.default_sample_duration = str_to_uint32(data[pos:pos+4])
             pos += 4
-        elif self.ttml_size:
+        elif self.is_ttml:
             raise MediaSegmentFilterError("Cannot handle ttml segments with default_sample_duration absent")
-        output = data[:pos]
-        if self.ttml_size:
-            if tf_flags & 0x10:
-                # old_ttml__size = str_to_uint32(data[pos:pos+4])
-                output += uint32_to_str(self.ttml_size)
-                # print("Changed ttml sample size from %d to %d" % (old_ttml__size, self.ttml_size))
-                pos += 4
-            else:
+        if self.is_ttml:
+            if not tf_flags & 0x10:
                 raise MediaSegmentFilterError("Cannot handle ttml segments if default_sample_size_offset is absent")
-        if self.ttml_size:
-            output += data[pos:]
-        else:
-            output = data
-        return output
+            # The new ttml size is known when the mdat has been processed
+            self.defer_fixup(self.output_pos + pos, self._set_ttml_size)
+        return data
+
+    def _set_ttml_size(self, buf, offset, size_change):  # pylint: disable=unused-argument
+        "Set default_sample_size in tfhd to the size of the updated ttml sample."
+        if self.ttml_size is not None:
+            pack_into(">I", buf, offset, self.ttml_size)
 
     def process_mfhd(self, data):
         "Process mfhd box and set segmentNumber if requested."
@@ -162,8 +159,9 @@ class MediaSegmentFilter(MP4Filter):
         else:
             return data[0:12] + uint32_to_str(self.seg_nr)
 
+    @traced("process_trun")
     def process_trun(self, data):
-        "Get total duration from trun. Fix offset if self.size_change is non-zero."
+        "Get total duration from trun. The data offset is shifted by the size change of the moof."
         flags = str_to_uint32(data[8:12]) & 0xffffff
         sample_count = str_to_uint32(data[12:16])
         pos = 16
@@ -173,38 +171,21 @@ class MediaSegmentFilter(MP4Filter):
             pos += 4
         if flags & 0x4:
             pos += 4  # First sample flags present
-        sample_duration_present = flags & 0x100
-        sample_size_present = flags & 0x200
-        sample_flags_present = flags & 0x400
-        sample_comp_time_present = flags & 0x800
-        duration = 0
-        for _ in range(sample_count):
-            if sample_duration_present:
-                duration += str_to_uint32(data[pos:pos+4])
-                pos += 4
-            elif self.default_sample_duration is not None:
-                duration += self.default_sample_duration
-            if sample_size_present:
-                pos += 4
-            if sample_flags_present:
-                pos += 4
-            if sample_comp_time_present:
-                pos += 4
-        self.duration = duration
-
-        # Modify data_offset
-        output = data[:16]
-        if data_offset_present and self.size_change > 0:
-            offset = str_to_sint32(data[16:20])
-            offset += self.size_change
-            output += sint32_to_str(offset)
+        nr_sample_fields = sum(1 for flag in (0x100, 0x200, 0x400, 0x800) if flags & flag)
+        if flags & 0x100:  # Sample duration present. It is the first field of each sample.
+            table = str_to_uint32_array(data[pos:pos + 4 * nr_sample_fields * sample_count])
+            duration = sum(table[::nr_sample_fields])
+        elif self.default_sample_duration is not None:
+            duration = sample_count * self.default_sample_duration
         else:
-            output += data[16:20]
-        output += data[20:]
-        return output
+            duration = 0
+        self.duration = duration
+        if data_offset_present:
+            self.defer_fixup(self.output_pos + 16, shift_data_offset)
+        return data
 
     def process_saio(self, data):
-        "Process saio and possibly change offset by size_change if needed."
+        "Process saio. The offsets are shifted by the size change of the moof."
         version_flags = str_to_uint32(data[8:12])
         version = version_flags >> 24
         flags = version_flags & 0xffffff
@@ -213,23 +194,21 @@ class MediaSegmentFilter(MP4Filter):
             pos += 8
         entry_count = str_to_uint32(data[pos:pos + 4])
         pos += 4
-        output = data[:pos]
-        delta_offset = self.size_change
+        if entry_count > 0:
+            self.defer_fixup(self.output_pos + pos, partial(self._shift_saio_offsets, version, entry_count))
+        return data
+
+    def _shift_saio_offsets(self, version, entry_count, buf, offset, size_change):
+        "Shift the saio offsets, which are relative to the moof, by the size change of the moof."
+        end = offset + (4 if version == 0 else 8) * entry_count
         if version == 0:
-            for i in range(entry_count):
-                offset = str_to_uint32(data[pos:pos + 4])
-                pos += 4
-                output += uint32_to_str(offset + delta_offset)
-                if i == 0:
-                    self.new_saio_value = offset + delta_offset
+            offsets = str_to_uint32_array(buf[offset:end])
         else:
-            for i in range(entry_count):
-                offset = str_to_uint64(data[pos:pos + 8])
-                pos += 8
-                output += uint64_to_str(offset + delta_offset)
-                if i == 0:
-                    self.new_saio_value = offset + delta_offset
-        return output
+            offsets = str_to_uint64_array(buf[offset:end])
+        if size_change:
+            offsets = array(offsets.typecode, [saio_offset + size_change for saio_offset in offsets])
+            buf[offset:end] = uint_array_to_str(offsets)
+        self.new_saio_value = offsets[0]
 
     def process_sidx(self, data):
         "Process sidx data and add to output."
@@ -339,6 +318,7 @@ class MediaSegmentFilter(MP4Filter):
         "Get total duration from trun."
         return self.duration
 
+    @traced("create_scte35box")
     def create_scte35box(self):
         """Create an Scte35 emsg box if at the right instance.
 
@@ -383,19 +363,11 @@ class MediaSegmentFilter(MP4Filter):
         # print "Made scte35 emsg %d" % len(emsg)
         return emsg
 
-    def find_and_process_mdat(self, data):
-        "Change the ttml part of mdat and update mdat size. Return full new data."
-        pos = 0
-        output = b""
-        while pos < len(data):
-            size = str_to_uint32(data[pos:pos+4])
-            boxtype = data[pos+4:pos+8]
-            if boxtype != b'mdat':
-                output += data[pos:pos+size]
-            else:
-                output += self.update_ttml_mdat(data[pos:pos+size])
-            pos += size
-        return output
+    def process_mdat(self, data):
+        "Update the ttml payload of mdat. Other mdat boxes are not changed."
+        if self.is_ttml:
+            return self.update_ttml_mdat(data)
+        return data
 
     def update_ttml_mdat(self, data):
         "Update the ttml payload of mdat and its size."
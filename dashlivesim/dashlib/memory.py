@@ -0,0 +1,128 @@
+"""Memory accounting with tracemalloc.
+
+With MEMORY_TRACKING set to the number of frames to keep per allocation (e.g. 1),
+tracemalloc is started and the peak traced memory during each request is added to
+the dashlivesim_request_peak_bytes metric per resource type (needs METRICS as well).
+Since tracemalloc counts all threads, peaks of concurrent requests overlap.
+
+The protected endpoint /<prefix>/memory returns the top-N allocation sites, or the
+top-N differences since the previous call, together with the sizes of all caches.
+"""
+
+# The copyright in this software is being made available under the BSD License,
+# included below. This software may be subject to other third party and contributor
+# rights, including patent rights, and no such rights are granted under this license.
+#
+# Copyright (c) 2026, Dash Industry Forum.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#  * Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation and/or
+#  other materials provided with the distribution.
+#  * Neither the name of Dash Industry Forum nor the names of its
+#  contributors may be used to endorse or promote products derived from this software
+#  without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS AS IS AND ANY
+#  EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+#  WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+#  INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+#  WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+import threading
+import tracemalloc
+
+from dashlivesim.dashlib import metrics
+from dashlivesim.dashlib.caches import cache_stats
+
+MEMORY_TRACKING_ENV = "MEMORY_TRACKING"
+MEMORY_PATH_NAME = "memory"  # Reserved path /<prefix>/memory
+DEFAULT_TOP = 20
+KEY_TYPES = ("lineno", "filename", "traceback")
+
+_lock = threading.Lock()
+_peak_lock = threading.Lock()  # Held while a request is measured
+_previous = {'snapshot': None}
+
+
+def is_enabled(environ):
+    "Check if memory tracking is enabled in the WSGI environment."
+    return metrics.is_enabled(environ, MEMORY_TRACKING_ENV)
+
+
+def ensure_tracing(nframes=1):
+    "Start tracemalloc if it is not running."
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(nframes)
+
+
+def track_request(request, environ):
+    """Measure the peak traced memory until the headers and first body of the request are produced.
+
+    The tracemalloc peak is global, so only one request at a time is measured. Requests that
+    start while another one is measured are not tracked. The rest of a chunked response is
+    paced by the chunk scheduler, so it is not measured, and does not keep other requests
+    from being measured."""
+    if not _peak_lock.acquire(blocking=False):
+        return
+    try:
+        try:
+            nframes = max(int(environ.get(MEMORY_TRACKING_ENV, 1)), 1)
+        except ValueError:
+            nframes = 1
+        ensure_tracing(nframes)
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+    except BaseException:
+        _peak_lock.release()
+        raise
+
+    def finish(request, status_code, registry):
+        "Add the peak to the registry."
+        try:
+            if request.record:
+                peak = max(tracemalloc.get_traced_memory()[1] - baseline, 0)
+                registry.observe(metrics.PEAK_BYTES, (("resource", request.resource), ("flags", request.flags)),
+                                 peak, metrics.BYTE_BUCKETS)
+        finally:
+            _peak_lock.release()
+
+    request.response_hooks.append(finish)
+
+
+def snapshot_report(top=DEFAULT_TOP, key_type="lineno"):
+    "Take a snapshot and report the top allocations, or the top differences since the previous report."
+    if key_type not in KEY_TYPES:
+        raise ValueError("key must be one of %s" % ", ".join(KEY_TYPES))
+    lines = ["Caches (name entries bytes):"]
+    lines.extend("  %s %d %d" % stats for stats in cache_stats())
+    if not tracemalloc.is_tracing():
+        ensure_tracing()
+        lines.append("tracemalloc was not running. Started now, so the next report has data.")
+        return "\n".join(lines) + "\n"
+    current, peak = tracemalloc.get_traced_memory()
+    lines.append("Traced memory: current %d bytes, peak %d bytes" % (current, peak))
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+    with _lock:
+        previous = _previous['snapshot']
+        _previous['snapshot'] = snapshot
+    if previous is None:
+        lines.append("Top %d allocations by %s:" % (top, key_type))
+        stats = snapshot.statistics(key_type)
+    else:
+        lines.append("Top %d differences by %s since previous report:" % (top, key_type))
+        stats = snapshot.compare_to(previous, key_type)
+    lines.extend("  %s" % stat for stat in stats[:top])
+    return "\n".join(lines) + "\n"
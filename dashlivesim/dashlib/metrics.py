@@ -0,0 +1,377 @@
+"""Lightweight per-stage latency metrics, exported in Prometheus text format.
+
+Hot-path code marks stages with
+
+    with metrics.stage("filter"):
+        ...
+
+The timings are collected per request in a thread-local RequestMetrics object,
+and added to the process-wide REGISTRY when the request ends. Stages may be nested,
+so that e.g. "config" includes "cfg_read". When no request is measured in the current
+thread (metrics disabled), stage() returns a shared no-op context.
+
+Cache lookups are reported with cache_lookup(). The same per-request data is used for
+Server-Timing response headers, so that those and the metrics never disagree.
+"""
+
+# The copyright in this software is being made available under the BSD License,
+# included below. This software may be subject to other third party and contributor
+# rights, including patent rights, and no such rights are granted under this license.
+#
+# Copyright (c) 2026, Dash Industry Forum.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#  * Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation and/or
+#  other materials provided with the distribution.
+#  * Neither the name of Dash Industry Forum nor the names of its
+#  contributors may be used to endorse or promote products derived from this software
+#  without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS AS IS AND ANY
+#  EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+#  WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+#  INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+#  WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+import threading
+from bisect import bisect_left
+from time import perf_counter
+
+METRICS_ENV = "METRICS"  # setEnv METRICS 1 to enable
+SERVER_TIMING_ENV = "SERVER_TIMING"  # setEnv SERVER_TIMING 1 to add Server-Timing headers to all responses
+SERVER_TIMING_OPTION = "servertiming_1"  # URL option to add Server-Timing headers to one response
+METRICS_PATH_NAME = "metrics"  # Reserved path /<prefix>/metrics
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds (in seconds) for histogram buckets
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+RESOURCE_TYPES = {".mpd": "mpd", ".period": "period", ".mp4": "init", ".m4s": "media", ".jpg": "thumb"}
+NO_FLAGS = "none"
+
+STAGE_DURATION = "dashlivesim_stage_duration_seconds"
+REQUEST_DURATION = "dashlivesim_request_duration_seconds"
+REQUESTS = "dashlivesim_requests_total"
+CACHE_LOOKUPS = "dashlivesim_cache_lookups_total"
+CACHE_BYTES = "dashlivesim_cache_bytes"
+CACHE_ENTRIES = "dashlivesim_cache_entries"
+CACHE_INVALIDATIONS = "dashlivesim_cache_invalidations_total"
+FILE_CHANGES = "dashlivesim_file_changes_total"
+PEAK_BYTES = "dashlivesim_request_peak_bytes"
+
+# Upper bounds (in bytes) for memory histograms
+BYTE_BUCKETS = (16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864, 268435456)
+
+DESCRIPTIONS = {
+    STAGE_DURATION: "Time spent in a processing stage of a request.",
+    REQUEST_DURATION: "Time from request start until the response is handed to the server.",
+    REQUESTS: "Number of handled requests.",
+    CACHE_LOOKUPS: "Number of cache lookups by cache and result (hit/miss).",
+    CACHE_BYTES: "Bytes held by a cache.",
+    CACHE_ENTRIES: "Number of entries in a cache.",
+    CACHE_INVALIDATIONS: "Number of cache entries dropped after file changes.",
+    FILE_CHANGES: "Number of changed files reported by the file watcher.",
+    PEAK_BYTES: "Peak traced memory allocated during a request (needs MEMORY_TRACKING).",
+}
+
+
+def is_enabled(environ, name=METRICS_ENV):
+    "Check if metrics (or another feature given by name) are enabled in the WSGI environment."
+    return environ.get(name, "0").lower() not in ("", "0", "false", "no", "off")
+
+
+def resource_label(ext):
+    "Resource type label for a file extension."
+    return RESOURCE_TYPES.get(ext, "other")
+
+
+def flags_label(url_options):
+    "Label value for the set of URL options in use."
+    return "+".join(sorted(set(url_options))) or NO_FLAGS
+
+
+class Histogram(object):
+    "Cumulative histogram with fixed buckets."
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        "Add one observation."
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry(object):
+    "Process-wide histograms and counters keyed by name and labels."
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+        self.gauge_callbacks = []  # Functions returning [(name, labels, value)] at render time
+
+    def observe(self, name, labels, value, buckets=BUCKETS):
+        "Add an observation to the histogram name with labels (a tuple of (key, value) pairs)."
+        with self._lock:
+            histogram = self.histograms.get((name, labels))
+            if histogram is None:
+                histogram = self.histograms[(name, labels)] = Histogram(buckets)
+            histogram.observe(value)
+
+    def inc(self, name, labels, amount=1):
+        "Increase a counter."
+        with self._lock:
+            self.counters[(name, labels)] = self.counters.get((name, labels), 0) + amount
+
+    def add_gauge_callback(self, callback):
+        "Add a function that returns current gauge values as [(name, labels, value)]."
+        self.gauge_callbacks.append(callback)
+
+    def reset(self):
+        "Remove all data."
+        with self._lock:
+            self.histograms = {}
+            self.counters = {}
+
+    def render(self):
+        "Return all metrics in Prometheus text exposition format."
+        lines = []
+        gauges = [gauge for callback in self.gauge_callbacks for gauge in callback()]
+        for name in sorted(set(n for n, _, _ in gauges)):
+            add_header(lines, name, "gauge")
+            for n, labels, value in sorted(gauges):
+                if n == name:
+                    lines.append("%s%s %s" % (name, format_labels(labels), value))
+        with self._lock:
+            for name in sorted(set(n for n, _ in self.counters)):
+                add_header(lines, name, "counter")
+                for (n, labels), value in sorted(self.counters.items()):
+                    if n == name:
+                        lines.append("%s%s %s" % (name, format_labels(labels), value))
+            for name in sorted(set(n for n, _ in self.histograms)):
+                add_header(lines, name, "histogram")
+                for (n, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0]):
+                    if n != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets + ("+Inf",), histogram.counts):
+                        cumulative += count
+                        lines.append("%s_bucket%s %d" % (name, format_labels(labels + (("le", str(bound)),)),
+                                                         cumulative))
+                    lines.append("%s_sum%s %.9f" % (name, format_labels(labels), histogram.sum))
+                    lines.append("%s_count%s %d" % (name, format_labels(labels), histogram.count))
+        return "\n".join(lines) + "\n"
+
+
+def add_header(lines, name, metric_type):
+    "Add HELP and TYPE lines for a metric."
+    if name in DESCRIPTIONS:
+        lines.append("# HELP %s %s" % (name, DESCRIPTIONS[name]))
+    lines.append("# TYPE %s %s" % (name, metric_type))
+
+
+def format_labels(labels):
+    'Format labels as {k1="v1",k2="v2"}.'
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append('%s="%s"' % (key, value))
+    return "{%s}" % ",".join(parts)
+
+
+REGISTRY = MetricsRegistry()
+
+
+class RequestMetrics(object):
+    "Stage timings for one request."
+
+    def __init__(self, resource="other", record=True, server_timing=False):
+        self.start = perf_counter()
+        self.resource = resource
+        self.flags = NO_FLAGS
+        self.record = record  # Add to registry at the end
+        self.server_timing = server_timing  # Add Server-Timing header to the response
+        self.stages = []  # (name, duration) in the order they finished
+        self.cache_lookups = []  # (cache, hit)
+        self.trace = None  # tracing.Trace if the request is traced
+        self.response_hooks = []  # Called as hook(request, status_code, registry) when the first body is produced
+        self.finish_hooks = []  # Called as hook(request, status_code, registry) when the request ends
+
+    def set_config(self, cfg):
+        "Take resource type and flags from a Config object."
+        self.resource = resource_label(cfg.ext)
+        self.flags = flags_label(cfg.url_options)
+
+    def add_stage(self, name, duration):
+        "Record the duration of a stage."
+        self.stages.append((name, duration))
+
+    def server_timing_header(self):
+        "Server-Timing header value with stage durations (summed per stage) in ms, cache results and total."
+        durations = {}
+        for name, duration in self.stages:
+            durations[name] = durations.get(name, 0) + duration
+        parts = ["%s;dur=%.3f" % (name, duration * 1000) for name, duration in durations.items()]
+        parts.extend('%s-cache;desc="%s"' % (cache, "hit" if hit else "miss") for cache, hit in self.cache_lookups)
+        parts.append("total;dur=%.3f" % ((perf_counter() - self.start) * 1000))
+        return ", ".join(parts)
+
+
+class _Stage(object):
+    "Context manager timing a stage for a request."
+
+    __slots__ = ("request", "name", "start")
+
+    def __init__(self, request, name):
+        self.request = request
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        duration = perf_counter() - self.start
+        self.request.add_stage(self.name, duration)
+        if self.request.trace is not None:
+            self.request.trace.add(self.name, self.start, duration)
+
+
+class _NoStage(object):
+    "No-op stage used when no request is measured."
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        pass
+
+
+NO_STAGE = _NoStage()
+
+_local = threading.local()
+
+
+def current_request():
+    "The RequestMetrics for the current thread, or None."
+    return getattr(_local, "request", None)
+
+
+def stage(name):
+    "Context manager that times a stage of the current request (if any)."
+    request = getattr(_local, "request", None)
+    if request is None:
+        return NO_STAGE
+    return _Stage(request, name)
+
+
+def cache_lookup(cache, hit):
+    "Report a lookup in the named cache for the current request (if any)."
+    request = getattr(_local, "request", None)
+    if request is not None:
+        request.cache_lookups.append((cache, hit))
+
+
+def begin_request(resource="other", record=True, server_timing=False):
+    "Start measuring a request in the current thread."
+    request = RequestMetrics(resource, record, server_timing)
+    _local.request = request
+    return request
+
+
+def response_produced(request, status_code, registry=REGISTRY):
+    "Call the response hooks, once, when the headers and the first body of the request are produced."
+    hooks, request.response_hooks = request.response_hooks, []
+    for hook in hooks:
+        hook(request, status_code, registry)
+
+
+def end_request(request, status_code, registry=REGISTRY):
+    "Stop measuring and add the request's timings to the registry."
+    if getattr(_local, "request", None) is request:
+        _local.request = None
+    response_produced(request, status_code, registry)
+    for hook in request.finish_hooks:
+        hook(request, status_code, registry)
+    if not request.record:
+        return
+    labels = (("resource", request.resource), ("flags", request.flags))
+    for name, duration in request.stages:
+        registry.observe(STAGE_DURATION, (("stage", name),) + labels, duration)
+    registry.observe(REQUEST_DURATION, labels, perf_counter() - request.start)
+    registry.inc(REQUESTS, labels + (("status", str(status_code)),))
+    for cache, hit in request.cache_lookups:
+        registry.inc(CACHE_LOOKUPS, (("cache", cache), ("result", "hit" if hit else "miss")))
+
+
+class MeasuredIterable(object):
+    "Items produced with a request as the current one in this thread. See iterate_measured()."
+
+    def __init__(self, request, iterable, status_code, registry=REGISTRY):
+        self.request = request
+        self.iterator = iter(iterable)
+        self.status_code = status_code
+        self.registry = registry
+        self.ended = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.ended:
+            raise StopIteration
+        _local.request = self.request
+        try:
+            item = next(self.iterator)
+        except StopIteration:
+            _local.request = None
+            self.close()
+            raise
+        except Exception:
+            _local.request = None
+            self.status_code = 500
+            self.close()
+            raise
+        _local.request = None
+        response_produced(self.request, self.status_code, self.registry)
+        return item
+
+    def close(self):
+        "End the request, and close the items."
+        if self.ended:
+            return
+        self.ended = True
+        try:
+            close = getattr(self.iterator, "close", None)
+            if close is not None:
+                close()
+        finally:
+            end_request(self.request, self.status_code, self.registry)
+
+
+def iterate_measured(request, iterable, status_code, registry=REGISTRY):
+    """Iterate with request as the current one in this thread while producing items. End it when done.
+
+    The request is ended when the items run out, when producing one fails (counted with status 500),
+    or when the server closes the response, also if that is before the first item."""
+    return MeasuredIterable(request, iterable, status_code, registry)
@@ -37,15 +37,17 @@ https://github.com/Dash-Industry-Forum/media-tools/tree/master/python/content_an
 #  POSSIBILITY OF SUCH DAMAGE.
 
 
+from array import array
 import base64
 import bisect
-from collections import namedtuple
+from collections import deque, namedtuple
 import functools
 import itertools
 from struct import Struct
 import struct
 
 from dashlivesim.dashlib import bitreader
+from dashlivesim.dashlib.structops import INT32_TYPECODE, str_to_uint32_array
 
 REGISTERED_BOXES = {}
 CONTAINER_BOXES = set([b'root',
@@ -79,6 +81,14 @@ CONTAINER_BOXES = set([b'root',
 UNPACK_U32 = Struct('>I').unpack
 UNPACK_U64 = Struct('>Q').unpack
 UNPACK_SIZE_TYPE = Struct('>I4s').unpack
+UNPACK_FROM_U32 = Struct('>I').unpack_from
+UNPACK_FROM_S32 = Struct('>i').unpack_from
+UNPACK_FROM_U64 = Struct('>Q').unpack_from
+UNPACK_FROM_SIZE_TYPE = Struct('>I4s').unpack_from
+
+BOX_CLASSES = {}  # Box type to registered class, filled on first use
+# Need to set allowed characters for some boxes
+BOX_TYPE_ALIASES = {b'ac-3': b'ac_3', b'ec-3': b'ec_3'}
 
 
 def parse_generator(data):
@@ -117,7 +127,58 @@ def match_box(obj, criteria='xxxx'):
                                                             criteria[5:-1])
 
 
+def get_box_class(box_type):
+    """ get registered class for box_type, or box """
+    try:
+        return BOX_CLASSES[box_type]
+    except KeyError:
+        box_class_name = f"{box_type.replace(b' ', b'_').decode()}_box"
+        box_class = REGISTERED_BOXES.get(box_class_name, box)
+        BOX_CLASSES[box_type] = box_class
+        return box_class
+
+
+def read_box_header(fmap, offset):
+    """ read_box_header: return (size, type, header size) at offset """
+    size, box_type = UNPACK_FROM_SIZE_TYPE(fmap, offset)
+    box_type = BOX_TYPE_ALIASES.get(box_type, box_type)
+    if size == 1:  # Extended size
+        return UNPACK_FROM_U64(fmap, offset + 8)[0], box_type, 16
+    return size, box_type, 8
+
+
+def index_boxes(fmap, size=0, offset=0):
+    """ index_boxes: map path to list of (offset, size) of all boxes
+
+    Only the box headers are read, in one scan that descends into the
+    container boxes. Paths are the ones used by box.find, e.g.
+    b'moof.traf.trun'.
+    """
+    if not size:
+        size = len(fmap)
+    index = {}
+    stack = [(b'', offset, offset + size)]
+    while stack:
+        path, next_offset, end_offset = stack.pop()
+        while next_offset + 8 <= end_offset:
+            box_size, box_type, header_size = read_box_header(fmap,
+                                                              next_offset)
+            if box_size == 0:  # Box extends to end of file
+                box_size = end_offset - next_offset
+            if box_size < header_size or next_offset + box_size > end_offset:
+                break
+            box_path = path + b'.' + box_type if path else box_type
+            index.setdefault(box_path, []).append((next_offset, box_size))
+            if box_type in CONTAINER_BOXES and box_size >= 16:
+                stack.append((box_path, next_offset + header_size,
+                              next_offset + box_size))
+            next_offset += box_size
+    return index
+
+
 class box:
+    __slots__ = ('fmap', 'type', 'size', 'offset', 'children', 'parent')
+
     def __init__(self, fmap, box_type, size, offset, parent=None):
         self.fmap = fmap
         self.type = box_type
@@ -185,10 +246,10 @@ class box:
                 return [c for c in self.children if c.type == path]
 
         # general find algorithm
-        queue = [(self, path.split(b'.'))]
+        queue = deque([(self, path.split(b'.'))])
         matches = []
         while queue:
-            obj, parts = queue.pop(0)
+            obj, parts = queue.popleft()
             # check if children are parsed
             if obj.is_unparsed:
                 obj.parse_children(recurse=False)
@@ -213,7 +274,7 @@ class box:
                 else:
                     new_items = [(child, parts[1:])
                                  for child in matching_children]
-                    queue = new_items + queue
+                    queue.extendleft(reversed(new_items))
                     # for child in matching_children:
                     #     queue.append((child, parts[1:]))
 
@@ -228,21 +289,15 @@ class box:
 
         next_offset = self.childpos
         end_offset = self.offset + self.size
+        fmap = self.fmap
+        children = self.children
 
         while True:
-            box_class = box
-            size, box_type = UNPACK_SIZE_TYPE(self.fmap[next_offset:
-                                                        next_offset + 8])
-
-            # Need to set allowed characters for some boxes
-            if box_type == b'ac-3':
-                box_type = b'ac_3'
-            elif box_type == b'ec-3':
-                box_type = b'ec_3'
+            size, box_type = UNPACK_FROM_SIZE_TYPE(fmap, next_offset)
+            box_type = BOX_TYPE_ALIASES.get(box_type, box_type)
 
             if size == 1:  # Extended size
-                size = UNPACK_U64(self.fmap[next_offset + 8:
-                                            next_offset + 16])[0]
+                size = UNPACK_FROM_U64(fmap, next_offset + 8)[0]
             if size > self.size or size < 8:
                 print(f"WARNING: Box '{box_type}' in '{self.path}' at offset "
                       f"{next_offset} has faulty size {size} "
@@ -250,16 +305,9 @@ class box:
                 # raise Exception
                 return
 
-            normalized_box_type = box_type.replace(b' ', b'_').decode()
-            box_class_name = f"{normalized_box_type}_box"
-            if box_class_name in REGISTERED_BOXES:
-                box_class = REGISTERED_BOXES[box_class_name]
-            else:
-                # print('no box:', box_class_name)
-                pass
-
-            new_box = box_class(self.fmap, box_type, size, next_offset, self)
-            self.children += [new_box]
+            new_box = get_box_class(box_type)(fmap, box_type, size,
+                                              next_offset, self)
+            children.append(new_box)
             # next_offset = new_box.endpos
             next_offset += size
 
@@ -280,20 +328,17 @@ class box:
 
 
 class full_box(box):
+    __slots__ = ('version', 'flags', 'extended_type')
+
     def __init__(self, *args):
         super().__init__(*args)
         if self.type == b'uuid':
             self.extended_type = self.fmap[self.offset + 8:self.offset + 24]
-            self.version = struct.unpack(
-                'B', self.fmap[self.offset + 24:self.offset + 25])[0]
-            self.flags = struct.unpack(
-                '>i', b'\x00' +
-                self.fmap[self.offset + 25:self.offset + 28])[0]
+            version_and_flags = UNPACK_FROM_U32(self.fmap, self.offset + 24)[0]
         else:
-            self.version = struct.unpack(
-                'B', self.fmap[self.offset + 8:self.offset + 9])[0]
-            self.flags = struct.unpack(
-                '>i', b'\x00' + self.fmap[self.offset + 9:self.offset + 12])[0]
+            version_and_flags = UNPACK_FROM_U32(self.fmap, self.offset + 8)[0]
+        self.version = version_and_flags >> 24
+        self.flags = version_and_flags & 0xffffff
 
 
 class bridged_box:
@@ -309,6 +354,8 @@ class bridged_box:
 
 
 class mp4(box):
+    __slots__ = ('key', 'encrypted')
+
     def __init__(self,
                  fmap,
                  size=0,
@@ -358,7 +405,125 @@ class mp4(box):
         return self.offset
 
 
+def read_box_headers(fileobj, offset=0, end=None):
+    """ read_box_headers: iterate over (type, offset, size, header size)
+
+    Only the headers of the boxes between offset and end in fileobj are
+    read, using seek and readinto.
+    """
+    if end is None:
+        end = fileobj.seek(0, 2)
+    header = bytearray(16)
+    while offset + 8 <= end:
+        fileobj.seek(offset)
+        nr_read = fileobj.readinto(header)
+        if nr_read < 8:
+            return
+        box_size, box_type = UNPACK_FROM_SIZE_TYPE(header)
+        box_type = BOX_TYPE_ALIASES.get(box_type, box_type)
+        header_size = 8
+        if box_size == 1:  # Extended size
+            if nr_read < 16:
+                return
+            box_size = UNPACK_FROM_U64(header, 8)[0]
+            header_size = 16
+        elif box_size == 0:  # Box extends to end of file
+            box_size = end - offset
+        if box_size < header_size or offset + box_size > end:
+            return
+        yield box_type, offset, box_size, header_size
+        offset += box_size
+
+
+class mp4_file:
+    """ mp4_file: boxes of a large file that are read when asked for
+
+    fileobj is a file opened in binary mode, or an mmap or other buffer. To
+    find boxes, only the headers along the path are read, so the media data
+    is never read. The boxes that are found are materialized as box trees of
+    their own data, with offsets relative to the start of the box. Find the
+    enclosing box, e.g. b'moof', if fields of sibling boxes are needed.
+    """
+
+    def __init__(self, fileobj, size=0):
+        self.fileobj = fileobj
+        self.is_buffer = not hasattr(fileobj, 'readinto')
+        if not size:
+            size = len(fileobj) if self.is_buffer else fileobj.seek(0, 2)
+        self.size = size
+
+    def box_headers(self, offset=0, end=None):
+        """ box_headers: iterate over (type, offset, size, header size) """
+        if end is None:
+            end = self.size
+        if not self.is_buffer:
+            yield from read_box_headers(self.fileobj, offset, end)
+            return
+        while offset + 8 <= end:
+            box_size, box_type, header_size = read_box_header(self.fileobj,
+                                                              offset)
+            if box_size == 0:
+                box_size = end - offset
+            if box_size < header_size or offset + box_size > end:
+                return
+            yield box_type, offset, box_size, header_size
+            offset += box_size
+
+    def index(self, path, return_first=False):
+        """ index: list of (offset, size) of the boxes matching path
+
+        path is a sequence of box types separated by dots, e.g.
+        b'moof.traf.tfdt'. Only the boxes along the path are looked into.
+        """
+        matches = []
+        queue = deque([(0, self.size, path.split(b'.'))])
+        while queue:
+            offset, end, parts = queue.popleft()
+            new_items = []
+            for box_type, box_offset, box_size, header_size in \
+                    self.box_headers(offset, end):
+                if box_type != parts[0]:
+                    continue
+                if len(parts) == 1:
+                    matches.append((box_offset, box_size))
+                    if return_first:
+                        return matches
+                else:
+                    new_items.append((box_offset + header_size,
+                                      box_offset + box_size, parts[1:]))
+            queue.extendleft(reversed(new_items))
+        return matches
+
+    def read(self, offset, size):
+        """ read: data of size bytes at offset """
+        if self.is_buffer:
+            return self.fileobj[offset:offset + size]
+        self.fileobj.seek(offset)
+        return self.fileobj.read(size)
+
+    def materialize(self, offset, size):
+        """ materialize: box tree of the box at offset """
+        data = self.read(offset, size)
+        box_type = BOX_TYPE_ALIASES.get(data[4:8], data[4:8])
+        root = mp4(data, recurse=False)
+        root.children.append(get_box_class(box_type)(data, box_type, size, 0,
+                                                     root))
+        return root.children[0]
+
+    def find_all(self, path):
+        return self.find(path, return_first=False)
+
+    def find(self, path, return_first=True):
+        matches = [self.materialize(offset, size) for offset, size in
+                   self.index(path, return_first)]
+        if return_first:
+            return matches[0] if matches else []
+        return matches
+
+
 class moov_box(box):
+    __slots__ = ()
+
     def __init__(self, fmap, box_type, size, offset, parent=None):
         super().__init__(fmap, box_type, size, offset, parent)
 
@@ -1117,6 +1282,8 @@ class hdlr_box(full_box):
 
 
 class moof_box(box):
+    __slots__ = ()
+
     def __init__(self, fmap, box_type, size, offset, parent=None):
         super().__init__(fmap, box_type, size, offset, parent)
 
@@ -1133,21 +1300,26 @@ class moof_box(box):
 
 
 class trex_box(full_box):
+    __slots__ = ('track_id', 'default_sample_description_index',
+                 'default_sample_duration', 'default_sample_size',
+                 'default_sample_flags')
+
     def __init__(self, *args):
         super().__init__(*args)
-        data = self.fmap[self.offset + 12:self.offset + 32]
         (self.track_id,
          self.default_sample_description_index,
          self.default_sample_duration,
          self.default_sample_size,
-         self.default_sample_flags) = struct.unpack('>IIIII', data)
+         self.default_sample_flags) = struct.unpack_from('>IIIII', self.fmap,
+                                                         self.offset + 12)
 
 
 class mfhd_box(box):
+    __slots__ = ('seqno',)
+
     def __init__(self, *args):
         super().__init__(*args)
-        self.seqno = UNPACK_U32(self.fmap[self.offset + 12:
-                                          self.offset + 16])[0]
+        self.seqno = UNPACK_FROM_U32(self.fmap, self.offset + 12)[0]
 
     def get_track_duration(self, track_id, timescale):
         truns = self.find(b'.traf.tfhd[track_id=%d]..trun' % track_id,
@@ -1182,6 +1354,12 @@ class mfhd_box(box):
 
 
 class tfhd_box(full_box):
+    __slots__ = ('has_base_data_offset', 'has_sample_description_index',
+                 'has_default_sample_duration', 'has_default_sample_size',
+                 'has_default_sample_flags', 'base_data_offset',
+                 'sample_description_index', 'default_sample_duration',
+                 'default_sample_size', 'default_sample_flags')
+
     def __init__(self, *args):
         super().__init__(*args)
 
@@ -1197,45 +1375,42 @@ class tfhd_box(full_box):
         self.default_sample_size = 0
         self.default_sample_flags = 0
 
-        offset = 16
+        offset = self.offset + 16
 
         if self.has_base_data_offset:
-            self.base_data_offset = struct.unpack(
-                '>Q', self.fmap[self.offset + offset:
-                                self.offset + offset + 8])[0]
+            self.base_data_offset = UNPACK_FROM_U64(self.fmap, offset)[0]
             offset = offset + 8
 
         if self.has_sample_description_index:
-            self.sample_description_index = struct.unpack(
-                '>I', self.fmap[self.offset + offset:
-                                self.offset + offset + 4])[0]
+            self.sample_description_index = UNPACK_FROM_U32(self.fmap,
+                                                            offset)[0]
             offset = offset + 4
 
         if self.has_default_sample_duration:
-            self.default_sample_duration = struct.unpack(
-                '>I', self.fmap[self.offset + offset:
-                                self.offset + offset + 4])[0]
+            self.default_sample_duration = UNPACK_FROM_U32(self.fmap,
+                                                           offset)[0]
             offset = offset + 4
 
         if self.has_default_sample_size:
-            self.default_sample_size = struct.unpack(
-                '>I', self.fmap[self.offset + offset:
-                                self.offset + offset + 4])[0]
+            self.default_sample_size = UNPACK_FROM_U32(self.fmap, offset)[0]
             offset = offset + 4
 
         if self.has_default_sample_flags:
-            self.default_sample_flags = struct.unpack(
-                '>I', self.fmap[self.offset + offset:
-                                self.offset + offset + 4])[0]
+            self.default_sample_flags = UNPACK_FROM_U32(self.fmap, offset)[0]
             offset = offset + 4
 
     @property
     def track_id(self):
-        return struct.unpack(
-            '>I', self.fmap[self.offset + 12:self.offset + 16])[0]
+        return UNPACK_FROM_U32(self.fmap, self.offset + 12)[0]
 
 
 class trun_box(full_box):
+    __slots__ = ('has_data_offset', 'has_first_sample_flags',
+                 'has_sample_duration', 'has_sample_size', 'has_sample_flags',
+                 'has_sample_composition_time_offset', 'data_offset',
+                 'first_sample_flags', 'sample_array_offset',
+                 'sample_row_size', '_total_duration')
+
     def __init__(self, *args):
         super().__init__(*args)
 
@@ -1245,7 +1420,6 @@ class trun_box(full_box):
         self.has_sample_size = self.flags & 0x0200
         self.has_sample_flags = self.flags & 0x0400
         self.has_sample_composition_time_offset = self.flags & 0x0800
-        self.first_cto = 0
 
         # self.sample_count = struct.unpack(
         #    '>I', self.fmap[self.offset + 12:self.offset + 16])[0]
@@ -1255,15 +1429,13 @@ class trun_box(full_box):
 
         self.sample_array_offset = 16
         if self.has_data_offset:
-            self.data_offset = struct.unpack(
-                '>i', self.fmap[self.offset + self.sample_array_offset:
-                                self.offset + self.sample_array_offset + 4])[0]
+            self.data_offset = UNPACK_FROM_S32(
+                self.fmap, self.offset + self.sample_array_offset)[0]
             self.sample_array_offset += 4
 
         if self.has_first_sample_flags:
-            self.first_sample_flags = struct.unpack(
-                '>I', self.fmap[self.offset + self.sample_array_offset:
-                                self.offset + self.sample_array_offset + 4])[0]
+            self.first_sample_flags = UNPACK_FROM_U32(
+                self.fmap, self.offset + self.sample_array_offset)[0]
             self.sample_array_offset += 4
 
         self.sample_row_size = (
@@ -1272,24 +1444,69 @@ class trun_box(full_box):
             (self.has_sample_flags and 4) +
             (self.has_sample_composition_time_offset and 4))
 
-        if self.has_sample_duration:
-            self.total_duration = 0
-            for i in range(self.sample_count):
-                offset = (self.offset + self.sample_array_offset +
-                          i * self.sample_row_size)
-                self.total_duration += struct.unpack(
-                    '>I', self.fmap[offset:offset + 4])[0]
-        else:
-            sample_duration = self.parent.find(b'tfhd').default_sample_duration
-            self.total_duration = sample_duration * self.sample_count
+        # Decoded from the sample table when first asked for
+        self._total_duration = None
 
-        if self.has_sample_composition_time_offset:
-            offset = (self.offset + self.sample_array_offset +
-                      (self.has_sample_duration and 4) +
-                      (self.has_sample_size and 4) +
-                      (self.has_sample_flags and 4))
-            self.first_cto = (struct.unpack('>i',  # always read as unsigned
-                                            self.fmap[offset:offset + 4])[0])
+    @property
+    def total_duration(self):
+        if self._total_duration is None:
+            if self.has_sample_duration:
+                self._total_duration = sum(self.sample_column(0))
+            else:
+                sample_duration = self.parent.find(
+                    b'tfhd').default_sample_duration
+                self._total_duration = sample_duration * self.sample_count
+        return self._total_duration
+
+    @property
+    def first_cto(self):
+        if not (self.has_sample_composition_time_offset and
+                self.sample_count):
+            return 0
+        offset = (self.offset + self.sample_array_offset +
+                  (self.has_sample_duration and 4) +
+                  (self.has_sample_size and 4) +
+                  (self.has_sample_flags and 4))
+        return UNPACK_FROM_S32(self.fmap, offset)[0]  # always read as signed
+
+    def sample_column(self, column):
+        """ sample_column: array of one field of all samples
+
+        column is the index of the field in a sample row. Composition time
+        offsets are read as signed, as in sample_entry.
+        """
+        start = self.offset + self.sample_array_offset
+        end = start + self.sample_count * self.sample_row_size
+        rows = str_to_uint32_array(memoryview(self.fmap)[start:end])
+        values = rows[column::self.sample_row_size // 4]
+        if (self.has_sample_composition_time_offset and
+                column == self.sample_row_size // 4 - 1):
+            values = array(INT32_TYPECODE, values.tobytes())
+        return values
+
+    def samples(self, default_sample_duration=0, default_sample_size=0,
+                default_sample_flags=0):
+        """ samples: iterate over (duration, size, flags, time_offset)
+
+        The fields that are not in the sample table are set to the defaults,
+        and to 0 for time_offset. The table is decoded column by column
+        instead of sample by sample.
+        """
+        sample_count = self.sample_count
+        present = (self.has_sample_duration, self.has_sample_size,
+                   self.has_sample_flags,
+                   self.has_sample_composition_time_offset)
+        defaults = (default_sample_duration, default_sample_size,
+                    default_sample_flags, 0)
+        columns = []
+        column = 0
+        for has_field, default in zip(present, defaults):
+            if has_field:
+                columns.append(self.sample_column(column))
+                column += 1
+            else:
+                columns.append(itertools.repeat(default, sample_count))
+        return zip(*columns)
 
     def get_durations(self, default_sample_duration):
         """Returns total duration of samples and presentation range as lowest
@@ -1361,29 +1578,25 @@ class trun_box(full_box):
 
     @property
     def sample_count(self):
-        return struct.unpack('>I', self.fmap[self.offset + 12:
-                                             self.offset + 16])[0]
+        return UNPACK_FROM_U32(self.fmap, self.offset + 12)[0]
 
     def sample_entry(self, i):
         row = {}
         offset = (self.offset + self.sample_array_offset +
                   i * self.sample_row_size)
         if self.has_sample_duration:
-            row['duration'] = struct.unpack(
-                '>I', self.fmap[offset:offset + 4])[0]
+            row['duration'] = UNPACK_FROM_U32(self.fmap, offset)[0]
             offset += 4
         if self.has_sample_size:
-            row['size'] = struct.unpack(
-                '>I', self.fmap[offset:offset + 4])[0]
+            row['size'] = UNPACK_FROM_U32(self.fmap, offset)[0]
             offset += 4
         if self.has_sample_flags:
-            flags = struct.unpack('>I', self.fmap[offset:offset + 4])[0]
+            flags = UNPACK_FROM_U32(self.fmap, offset)[0]
             row['flags'] = f"0x{flags:x}"
             offset += 4
         if self.has_sample_composition_time_offset:
             # Using >i to support v0 & v1 assuming small enough numbers
-            row['time_offset'] = struct.unpack(
-                '>i', self.fmap[offset:offset + 4])[0]
+            row['time_offset'] = UNPACK_FROM_S32(self.fmap, offset)[0]
             offset += 4
 
         return row
@@ -1904,13 +2117,12 @@ class meta_box(box):
 
 
 class tfdt_box(full_box):
+    __slots__ = ('decode_time',)
+
     def __init__(self, *args):
         super().__init__(*args)
-        i = parse_generator(self.fmap[self.offset + 12:
-                                      self.offset + self.size])
-        next(i)  # prime
-
-        self.decode_time = i.send(self.version and '>Q' or '>I')[0]
+        unpack_from = UNPACK_FROM_U64 if self.version else UNPACK_FROM_U32
+        self.decode_time = unpack_from(self.fmap, self.offset + 12)[0]
 
 
 class afra_box(full_box):
@@ -2096,6 +2308,8 @@ class abst_box(full_box):
 
 
 class mdat_box(box):
+    __slots__ = ()
+
     def __init__(self, *args):
         super().__init__(*args)
 
@@ -32,69 +32,153 @@ The filter is streamlined for DASH or other content with one track per file.
 #  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 #  POSSIBILITY OF SUCH DAMAGE.
 
+import mmap
+import os
+from bisect import bisect_right
+
 from dashlivesim.dashlib.structops import str_to_uint32, uint32_to_str
+from dashlivesim.dashlib.metrics import stage
+from dashlivesim.dashlib.tracing import span
 
 
 class MP4FilterError(BaseException):
     "Error in MP4Filter or subclass."
 
 
+def map_file(filename):
+    """Memory-map a file for reading and return a read-only memoryview of it.
+
+    The pages are then shared with the page cache, and slices of the view are not copied."""
+    with open(filename, 'rb') as ifh:
+        if os.fstat(ifh.fileno()).st_size == 0:  # Empty files cannot be mapped
+            return memoryview(b"")
+        return memoryview(mmap.mmap(ifh.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def read_until_mdat_payload(ifh):
+    """Read all boxes of a file up to and including the header of a final mdat box.
+
+    Return (data, (payload_offset, payload_size)) if the file ends with an mdat box,
+    otherwise (all_data, None)."""
+    file_size = os.fstat(ifh.fileno()).st_size
+    parts = []
+    pos = 0
+    while pos < file_size:
+        header = ifh.read(8)
+        size = str_to_uint32(header[:4])
+        if size < 8:  # 64-bit size or box to end of file. Just read everything.
+            parts += [header, ifh.read()]
+            return b"".join(parts), None
+        if header[4:8] == b'mdat' and pos + size == file_size:
+            parts.append(header)
+            return b"".join(parts), (pos + 8, size - 8)
+        parts += [header, ifh.read(size - 8)]
+        pos += size
+    return b"".join(parts), None
+
+
+def split_mdat_payload(data):
+    """As read_until_mdat_payload, but for data in memory, e.g. a mapped file.
+
+    Return (data up to and including the mdat header, (payload_offset, payload_size)) if
+    data ends with an mdat box, otherwise (data, None)."""
+    pos = 0
+    while pos + 8 <= len(data):
+        size = str_to_uint32(data[pos:pos+4])
+        if size < 8:  # 64-bit size or box to end of file. Keep everything.
+            return data, None
+        if data[pos+4:pos+8] == b'mdat' and pos + size == len(data):
+            return data[:pos+8], (pos + 8, size - 8)
+        pos += size
+    return data, None
+
+
 class MP4Filter(object):
     """Base class for filters.
 
-    Call filter() to get a filtered version of the file."""
+    Call filter() to get a filtered version of the file.
+
+    With mdat_passthrough, the payload of a final mdat box is not read. The filtered
+    output then ends with the mdat header, and mdat_payload gives the offset and size
+    of the payload in the file (or data), so that it can be sent or sliced directly from there.
+
+    With mmap_reads, the file is memory-mapped instead of read. Only the boxes that
+    are filtered are copied, and the other boxes are joined into the output directly
+    from the mapping. mdat_passthrough takes precedence, since it reads no payload.
+
+    The filtering is done in one pass. Values that depend on later parts of the output,
+    like offsets from a moof to its mdat, are patched with defer_fixup()."""
 
     # pylint: disable=no-self-use, unused-argument, too-many-instance-attributes
 
-    def __init__(self, filename=None, data=None):
+    def __init__(self, filename=None, data=None, mdat_passthrough=False, mmap_reads=False):
         self.filename = filename
+        self.mdat_payload = None
         if filename is not None:
-            with open(filename, 'rb') as ifh:
-                self.data = ifh.read()
+            if mdat_passthrough:
+                with stage("read"), open(filename, 'rb') as ifh:
+                    self.data, self.mdat_payload = read_until_mdat_payload(ifh)
+            elif mmap_reads:
+                with stage("read"):
+                    self.data = map_file(filename)
+            else:
+                with stage("read"), open(filename, 'rb') as ifh:
+                    self.data = ifh.read()
+        elif mdat_passthrough:
+            self.data, self.mdat_payload = split_mdat_payload(data)
         else:
             self.data = data
         self.emsg = None
         self.output = b""
+        self.output_parts = []  # Output of each top-level box
         self.top_level_boxes_to_parse = []  # Boxes at top-level to filter
         self.composite_boxes_to_parse = []  # Composite boxes to look into
-        self.next_phase_data = {}
-        self.nr_iterations_done = 0
         self.output_top_level_boxes = []  # Boxes with size and type
+        self.output_pos = 0  # Output position of the box being processed
+        self.fixups = []  # (output position, function) to call when all boxes are filtered
+        self._size_changes = []  # Output minus input size of each top-level box
         # print "MP4Filter with %s" % filename
 
     def check_box(self, data):
         "Check the type of box starting at position pos."
         size = str_to_uint32(data[:4])
-        boxtype = data[4:8]
+        boxtype = bytes(data[4:8])
         return (size, boxtype)
 
     def filter(self):
         "Top level box parsing. The lower-level parsing is done in self.filter_box(). "
-        self.output = b""
+        self.output_parts = []
+        self.output_top_level_boxes = []
+        self.fixups = []
+        self._size_changes = []
+        output_pos = 0
         pos = 0
-        prev_output_pos = 0
-        while pos < len(self.data):
-            size, boxtype = self.check_box(self.data[pos:pos+8])
-            boxdata = self.data[pos:pos+size]
+        data = memoryview(self.data)  # Boxes that are not filtered are not copied until joined
+        while pos < len(data):
+            size, boxtype = self.check_box(data[pos:pos+8])
+            boxdata = data[pos:pos+size]
             if boxtype in self.top_level_boxes_to_parse:
-                self.output += self.filter_box(boxtype, boxdata, len(self.output))
+                output = self.filter_box(boxtype, bytes(boxdata), output_pos)
             else:
-                self.output += boxdata
-            output_len = len(self.output)
-            if output_len > prev_output_pos:
-                output_box_len = output_len - prev_output_pos
+                output = boxdata
+            self.output_parts.append(output)
+            self._size_changes.append(len(output) - len(boxdata))
+            if output:
+                output_box_len = len(output)
+                if boxtype == b'mdat' and self.mdat_payload is not None:
+                    output_box_len += self.mdat_payload[1]  # Payload is left in file
                 self.output_top_level_boxes.append((output_box_len, boxtype))
-                prev_output_pos = output_len
+            output_pos += len(output)
             pos += size
-        if self.next_phase_data:
-            self.nr_iterations_done += 1
-            self.data = self.output
-            self.output = self.filter()
+        self.apply_fixups()
         self.finalize()
+        self.output = b"".join(self.output_parts)
         return self.output
 
     def filter_box(self, boxtype, data, file_pos, path=b""):
-        "Filter box or tree of boxes recursively."
+        """Filter box or tree of boxes recursively.
+
+        file_pos is the position of the box in the output."""
 
         if boxtype == b"moof":
             self.moof_start = file_pos
@@ -106,26 +190,59 @@ class MP4Filter(object):
         else:
             path = b"%s.%s" % (path, boxtype)
 
-        if boxtype in self.composite_boxes_to_parse:
-            # print("Parsing %s" % path)
-            output = data[:8]
-            pos = 8
-            while pos < len(data):
-                child_size, child_box_type = self.check_box(data[pos:pos+8])
-                output_child_box = self.filter_box(child_box_type, data[pos:pos+child_size], file_pos+pos, path)
-                output += output_child_box
-                pos += child_size
-            if len(output) != len(data):
-                output = uint32_to_str(len(output)) + output[4:]
-        else:
-            method_name = "process_%s" % boxtype.decode('utf-8')
-            method = getattr(self, method_name, None)
-            if method is not None:
-                output = method(data)
+        with span("filter_box", box=path):
+            if boxtype in self.composite_boxes_to_parse:
+                # print("Parsing %s" % path)
+                output = [None]  # Header with the output size
+                output_size = 8
+                pos = 8
+                while pos < len(data):
+                    child_size, child_box_type = self.check_box(data[pos:pos+8])
+                    output_child_box = self.filter_box(child_box_type, data[pos:pos+child_size],
+                                                       file_pos + output_size, path)
+                    output.append(output_child_box)
+                    output_size += len(output_child_box)
+                    pos += child_size
+                output[0] = uint32_to_str(output_size) + data[4:8]
+                output = b"".join(output)
             else:
-                output = data
+                method_name = "process_%s" % boxtype.decode('utf-8')
+                method = getattr(self, method_name, None)
+                if method is not None:
+                    self.output_pos = file_pos
+                    output = method(data)
+                else:
+                    output = data
         return output
 
+    def defer_fixup(self, pos, fixup):
+        """Patch the output at position pos when all boxes have been filtered.
+
+        fixup(buf, offset, size_change) is called with the output of the top-level box
+        that contains pos as a bytearray, the offset of pos in it, and the output minus
+        the input size of that box, e.g. to shift offsets from a moof to its mdat."""
+        self.fixups.append((pos, fixup))
+
+    def apply_fixups(self):
+        "Patch the output parts with the deferred fixups."
+        if not self.fixups:
+            return
+        starts = []
+        pos = 0
+        for part in self.output_parts:
+            starts.append(pos)
+            pos += len(part)
+        buffers = {}
+        for pos, fixup in self.fixups:
+            index = bisect_right(starts, pos) - 1
+            buf = buffers.get(index)
+            if buf is None:
+                buf = buffers[index] = bytearray(self.output_parts[index])
+            fixup(buf, pos - starts[index], self._size_changes[index])
+        for index, buf in buffers.items():
+            self.output_parts[index] = bytes(buf)
+        self.fixups = []
+
     def finalize(self):
-        "Do any final adjustments, if needed."
+        "Do any final adjustments of output_parts, if needed."
         pass
@@ -1,9 +1,11 @@
+from io import BytesIO
 from re import findall
 from math import ceil
 from xml.etree import ElementTree as ET
 
-from dashlivesim.dashlib.dash_proxy import DEFAULT_MINIMUM_UPDATE_PERIOD
+from dashlivesim.dashlib.dash_proxy import DEFAULT_MINIMUM_UPDATE_PERIOD, get_content_storage
 from dashlivesim.dashlib import mpdprocessor
+from dashlivesim.dashlib.metrics import stage
 from dashlivesim.dashlib.timeformatconversions import make_timestamp, seconds_to_iso_duration
 
 
@@ -11,12 +13,13 @@ def get_mpd(dashProv):
     "Get the MPD corresponding to parameters in dashProv"
     cfg = dashProv.cfg
     if cfg.ext == ".period":
-        mpd_filename = "%s/%s/%s" % (dashProv.content_dir, cfg.content_name, cfg.filename.split('+')[0])
+        mpd_name = cfg.filename.split('+')[0]
         # Get the first part of the string only, which is the .manifest file name.
     elif cfg.ext == ".mpd":
-        mpd_filename = "%s/%s/%s" % (dashProv.content_dir, cfg.content_name, cfg.filename)
+        mpd_name = cfg.filename
     else:
         raise ValueError("Not a valid extension for manifest generation")
+    mpd_content = get_content_storage(dashProv).read(mpd_name)
     mpd_input_data = dashProv.cfg_processor.get_mpd_data()
     nr_xlink_periods_per_hour = min(mpd_input_data['xlinkPeriodsPerHour'], 60)
     nr_periods_per_hour = min(mpd_input_data['periodsPerHour'], 60)
@@ -30,7 +33,7 @@ def get_mpd(dashProv):
     if mpd_input_data['insertAd'] > 0 and nr_xlink_periods_per_hour < 0:
         raise Exception("Insert ad option can only be used in conjuction with the xlink option. To use the "
                         "insert ad option, also set use xlink_m in your url.")
-    response = generate_dynamic_mpd(dashProv, mpd_filename, mpd_input_data, dashProv.now)
+    response = generate_dynamic_mpd(dashProv, mpd_content, mpd_input_data, dashProv.now)
     # The following 'if' is for IOP 4.11.4.3 , deployment scenario when segments not found.
     if len(cfg.multi_url) > 0 and cfg.segtimelineloss:  # There is one specific baseURL with losses specified
         a_var, b_var = cfg.multi_url[0].split("_")
@@ -45,12 +48,12 @@ def get_mpd(dashProv):
                     # Generate and provide mpd with the latest up time, so that last generated segment is shown
                     # and no new S element added to SegmentTimeline.
                     latestUptime = dashProv.now - now_mod_60 + (i * total_dur + dur1)
-                    response = generate_dynamic_mpd(dashProv, mpd_filename, mpd_input_data, latestUptime)
+                    response = generate_dynamic_mpd(dashProv, mpd_content, mpd_input_data, latestUptime)
                     break
                 elif now_mod_60 == i * total_dur + dur1:
                     # Just before down time starts, add InbandEventStream to the MPD.
                     cfg.emsg_last_seg = True
-                    response = generate_dynamic_mpd(dashProv, mpd_filename, mpd_input_data, dashProv.now)
+                    response = generate_dynamic_mpd(dashProv, mpd_content, mpd_input_data, dashProv.now)
                     cfg.emsg_last_seg = False
 
     if nr_xlink_periods_per_hour > 0:
@@ -59,8 +62,8 @@ def get_mpd(dashProv):
     return response
 
 
-def generate_dynamic_mpd(dashProv, mpd_filename, in_data, now):
-    "Generate the dynamic MPD."
+def generate_dynamic_mpd(dashProv, mpd_content, in_data, now):
+    "Generate the dynamic MPD from the data of the VoD MPD."
     cfg = dashProv.cfg
     mpd_data = in_data.copy()
     if cfg.minimum_update_period_in_s is not None:
@@ -108,11 +111,13 @@ def generate_dynamic_mpd(dashProv, mpd_filename, in_data, now):
             mpd_proc_cfg['utc_timing_methods'].append('httpiso')
         mpd_data['add_profiles'] = ['http://www.dashif.org/guidelines/low-latency-live-v5']
     full_url = dashProv.base_url + '/'.join(dashProv.url_parts)
-    mpmod = mpdprocessor.MpdProcessor(mpd_filename, mpd_proc_cfg, cfg,
-                                      full_url)
-    period_data = generate_period_data(mpd_data, now, cfg)
-    mpmod.process(mpd_data, period_data, ll_data)
-    return mpmod.get_full_xml()
+    with stage("mpd_build"):
+        mpmod = mpdprocessor.MpdProcessor(BytesIO(mpd_content), mpd_proc_cfg, cfg,
+                                          full_url)
+        period_data = generate_period_data(mpd_data, now, cfg)
+        mpmod.process(mpd_data, period_data, ll_data)
+    with stage("mpd_serialize"):
+        return mpmod.get_full_xml()
 
 
 def generate_response_with_xlink(response, cfg, filename, nr_periods_per_hour, nr_xlink_periods_per_hour, insert_ad):
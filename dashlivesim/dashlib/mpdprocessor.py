@@ -39,6 +39,7 @@ from dashlivesim.dashlib.timeformatconversions import make_timestamp
 from dashlivesim.dashlib.segtimeline import SegmentTimeLineGenerator
 from dashlivesim.dashlib.dash_namespace import add_ns
 from dashlivesim.dashlib import scte35
+from dashlivesim.dashlib.tracing import span
 
 SET_BASEURL = True
 
@@ -322,89 +323,91 @@ class MpdProcessor(object):
         # From the Base URL
         last_period_id = '-1'
         for (period, pdata) in zip(periods, period_data):
-            set_attribs(period, ('id', 'start'), pdata)
-            if 'etpDuration' in pdata:
-                period.set('duration', "PT%dS" % pdata['etpDuration'])
-            if 'periodDuration' in pdata:
-                period.set('duration', pdata['periodDuration'])
-            segmenttemplate_attribs = ['startNumber']
-            pto = pdata['presentationTimeOffset']
-            if pto:
-                if offset_at_period_level:
-                    insert_segmentbase(period, pto)
-                else:
-                    segmenttemplate_attribs.append('presentationTimeOffset')
-            if 'mpdCallback' in pdata:
-                # Add the mpdCallback element only if the flag is raised.
-                mpdcallback_elem = create_inline_mpdcallback_elem(BaseURLSegmented)
-                period.insert(0, mpdcallback_elem)
-            adaptation_sets = period.findall(add_ns('AdaptationSet'))
-            for ad_set in adaptation_sets:
-                ad_pos = 0
-                content_type = ad_set.get('contentType')
-                if self.emsg_last_seg:
-                    inband_event_elem = create_inband_stream_elem()
-                    ad_set.insert(0, inband_event_elem)
-                if content_type == 'video' and self.scte35_present:
-                    scte35_elem = create_inband_scte35stream_elem()
-                    ad_set.insert(0, scte35_elem)
-                    ad_pos += 1
-                if self.continuous and last_period_id != '-1':
-                    supplementalprop_elem = self.create_descriptor_elem("SupplementalProperty",
-                                                                        "urn:mpeg:dash:period_continuity:2014",
-                                                                        last_period_id)
-                    ad_set.insert(ad_pos, supplementalprop_elem)
-                if ll_data:
-                    self.insert_producer_reference(ad_set, ad_pos)
-                seg_templates = ad_set.findall(add_ns('SegmentTemplate'))
-                for seg_template in seg_templates:
-                    set_attribs(seg_template, segmenttemplate_attribs, pdata)
+            with span("period", id=pdata.get('id')):
+                set_attribs(period, ('id', 'start'), pdata)
+                if 'etpDuration' in pdata:
+                    period.set('duration', "PT%dS" % pdata['etpDuration'])
+                if 'periodDuration' in pdata:
+                    period.set('duration', pdata['periodDuration'])
+                segmenttemplate_attribs = ['startNumber']
+                pto = pdata['presentationTimeOffset']
+                if pto:
+                    if offset_at_period_level:
+                        insert_segmentbase(period, pto)
+                    else:
+                        segmenttemplate_attribs.append('presentationTimeOffset')
+                if 'mpdCallback' in pdata:
+                    # Add the mpdCallback element only if the flag is raised.
+                    mpdcallback_elem = create_inline_mpdcallback_elem(BaseURLSegmented)
+                    period.insert(0, mpdcallback_elem)
+                adaptation_sets = period.findall(add_ns('AdaptationSet'))
+                for ad_set in adaptation_sets:
+                    ad_pos = 0
+                    content_type = ad_set.get('contentType')
+                    if self.emsg_last_seg:
+                        inband_event_elem = create_inband_stream_elem()
+                        ad_set.insert(0, inband_event_elem)
+                    if content_type == 'video' and self.scte35_present:
+                        scte35_elem = create_inband_scte35stream_elem()
+                        ad_set.insert(0, scte35_elem)
+                        ad_pos += 1
+                    if self.continuous and last_period_id != '-1':
+                        supplementalprop_elem = self.create_descriptor_elem("SupplementalProperty",
+                                                                            "urn:mpeg:dash:period_continuity:2014",
+                                                                            last_period_id)
+                        ad_set.insert(ad_pos, supplementalprop_elem)
                     if ll_data:
-                        set_attribs(seg_template,
-                                    ('availabilityTimeOffset', 'availabilityTimeComplete'),
-                                    ll_data)
-                    if pdata.get('startNumber') == '-1':  # Default to 1
-                        remove_attribs(seg_template, ['startNumber'])
-
-                    if self.segtimeline or self.segtimeline_nr:
-                        # add SegmentTimeline block in SegmentTemplate with timescale and window.
-                        segtime_gen = segtimeline_generators[content_type]
-                        now = self.mpd_proc_cfg['now']
-                        tsbd = self.cfg.timeshift_buffer_depth_in_s
-                        ast = self.cfg.availability_start_time_in_s
-                        start_time = max(ast + pdata['start_s'], now - tsbd)
-                        if 'period_duration_s' in pdata:
-                            end_time = min(ast + pdata['start_s'] + pdata['period_duration_s'], now)
-                        else:
-                            end_time = now
-                        start_time -= self.cfg.availability_start_time_in_s
-                        end_time -= self.cfg.availability_start_time_in_s
-                        use_closest = False
-                        if self.cfg.stop_time and self.cfg.timeoffset == 0:
-                            start_time = self.cfg.start_time
-                            end_time = min(now, self.cfg.stop_time)
-                            use_closest = True
-                        seg_timeline = segtime_gen.create_segtimeline(
-                            start_time, end_time, use_closest)
-                        remove_attribs(seg_template, ['duration'])
-                        seg_template.set('timescale', str(self.cfg.media_data[content_type]['timescale']))
-                        if pto != "0" and not offset_at_period_level:
-                            # rescale presentationTimeOffset based on the local timescale
-                            seg_template.set('presentationTimeOffset',
-                                             str(int(pto) * int(self.cfg.media_data[content_type]['timescale'])))
-                        media_template = seg_template.attrib['media']
-                        if self.segtimeline:
-                            media_template = media_template.replace('$Number$', 't$Time$')
-                            remove_attribs(seg_template, ['startNumber'])
-                        elif self.segtimeline_nr:
-                            # Set number to the first number listed
+                        self.insert_producer_reference(ad_set, ad_pos)
+                    seg_templates = ad_set.findall(add_ns('SegmentTemplate'))
+                    for seg_template in seg_templates:
+                        set_attribs(seg_template, segmenttemplate_attribs, pdata)
+                        if ll_data:
                             set_attribs(seg_template,
-                                        ('startNumber',),
-                                        {'startNumber': segtime_gen.start_number})
-                        seg_template.set('media', media_template)
-                        seg_template.text = "\n"
-                        seg_template.insert(0, seg_timeline)
-            last_period_id = pdata.get('id')
+                                        ('availabilityTimeOffset', 'availabilityTimeComplete'),
+                                        ll_data)
+                        if pdata.get('startNumber') == '-1':  # Default to 1
+                            remove_attribs(seg_template, ['startNumber'])
+
+                        if self.segtimeline or self.segtimeline_nr:
+                            # add SegmentTimeline block in SegmentTemplate with timescale and window.
+                            segtime_gen = segtimeline_generators[content_type]
+                            now = self.mpd_proc_cfg['now']
+                            tsbd = self.cfg.timeshift_buffer_depth_in_s
+                            ast = self.cfg.availability_start_time_in_s
+                            start_time = max(ast + pdata['start_s'], now - tsbd)
+                            if 'period_duration_s' in pdata:
+                                end_time = min(ast + pdata['start_s'] + pdata['period_duration_s'], now)
+                            else:
+                                end_time = now
+                            start_time -= self.cfg.availability_start_time_in_s
+                            end_time -= self.cfg.availability_start_time_in_s
+                            use_closest = False
+                            if self.cfg.stop_time and self.cfg.timeoffset == 0:
+                                start_time = self.cfg.start_time
+                                end_time = min(now, self.cfg.stop_time)
+                                use_closest = True
+                            with span("segtimeline", content_type=content_type):
+                                seg_timeline = segtime_gen.create_segtimeline(
+                                    start_time, end_time, use_closest)
+                            remove_attribs(seg_template, ['duration'])
+                            seg_template.set('timescale', str(self.cfg.media_data[content_type]['timescale']))
+                            if pto != "0" and not offset_at_period_level:
+                                # rescale presentationTimeOffset based on the local timescale
+                                seg_template.set('presentationTimeOffset',
+                                                 str(int(pto) * int(self.cfg.media_data[content_type]['timescale'])))
+                            media_template = seg_template.attrib['media']
+                            if self.segtimeline:
+                                media_template = media_template.replace('$Number$', 't$Time$')
+                                remove_attribs(seg_template, ['startNumber'])
+                            elif self.segtimeline_nr:
+                                # Set number to the first number listed
+                                set_attribs(seg_template,
+                                            ('startNumber',),
+                                            {'startNumber': segtime_gen.start_number})
+                            seg_template.set('media', media_template)
+                            seg_template.text = "\n"
+                            seg_template.insert(0, seg_timeline)
+                last_period_id = pdata.get('id')
 
     def create_descriptor_elem(self, name, scheme_id_uri, value=None, elem_id=None, messageData=None):
         "Create an element of DescriptorType."
@@ -429,7 +432,8 @@ class MpdProcessor(object):
         pos = start_pos
         for utc_method in self.utc_timing_methods:
             if utc_method == "direct":
-                direct_time = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time()))
+                now = self.mpd_proc_cfg.get('now')  # Time of the request, which may come from a virtual clock
+                direct_time = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now if now is not None else time.time()))
                 time_elem = self.create_descriptor_elem('UTCTiming', 'urn:mpeg:dash:utc:direct:2014', direct_time)
             elif utc_method == "head":
                 time_elem = self.create_descriptor_elem('UTCTiming', 'urn:mpeg:dash:utc:http-head:2014',
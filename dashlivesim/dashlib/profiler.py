@@ -0,0 +1,138 @@
+"""On-demand profiling of single requests.
+
+A request is profiled if it has the header X-DashLiveSim-Profile set to "pstats" or
+"collapsed", and an X-DashLiveSim-Token header with one of the tokens in the
+comma-separated ADMIN_TOKENS environment variable. Without ADMIN_TOKENS, profiling
+is not possible.
+
+With "pstats", the request is run under cProfile and the statistics are written to
+a .pstats file in PROFILE_DIR (default: the system temp directory). The file name is
+returned in the X-DashLiveSim-Profile-File response header.
+With "collapsed", the response body is replaced by the call stacks of the request
+in collapsed format ("f1;f2;f3 microseconds" per line), as used by flame graph tools.
+"""
+
+# The copyright in this software is being made available under the BSD License,
+# included below. This software may be subject to other third party and contributor
+# rights, including patent rights, and no such rights are granted under this license.
+#
+# Copyright (c) 2026, Dash Industry Forum.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#  * Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation and/or
+#  other materials provided with the distribution.
+#  * Neither the name of Dash Industry Forum nor the names of its
+#  contributors may be used to endorse or promote products derived from this software
+#  without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS AS IS AND ANY
+#  EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+#  WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+#  INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+#  WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+import cProfile
+import hmac
+import os
+import re
+import sys
+import tempfile
+import threading
+from collections import defaultdict
+from time import perf_counter, strftime
+
+ADMIN_TOKENS_ENV = "ADMIN_TOKENS"
+PROFILE_DIR_ENV = "PROFILE_DIR"
+TOKEN_HEADER = "HTTP_X_DASHLIVESIM_TOKEN"
+PROFILE_HEADER = "HTTP_X_DASHLIVESIM_PROFILE"
+PROFILE_FILE_HEADER = "X-DashLiveSim-Profile-File"
+PSTATS = "pstats"
+COLLAPSED = "collapsed"
+
+_profile_lock = threading.Lock()  # Only one cProfile can be active at a time
+
+
+def is_authorized(environ):
+    "Check that the request has an admin token from the ADMIN_TOKENS allowlist."
+    token = environ.get(TOKEN_HEADER, "")
+    allowed = [t.strip() for t in environ.get(ADMIN_TOKENS_ENV, "").split(",") if t.strip()]
+    if not token or not allowed:
+        return False
+    return any(hmac.compare_digest(token.encode('utf-8'), t.encode('utf-8')) for t in allowed)
+
+
+def requested_mode(environ):
+    "Return the profiling mode for an authorized request, or None."
+    mode = environ.get(PROFILE_HEADER, "").strip().lower()
+    if mode not in (PSTATS, COLLAPSED):
+        return None
+    if not is_authorized(environ):
+        return None
+    return mode
+
+
+def pstats_file_name(environ, profile_dir):
+    "Make a unique .pstats file name from time and path."
+    path = re.sub(r"[^A-Za-z0-9_.-]+", "_", environ.get('REQUEST_URI', '').strip("/"))[-100:]
+    return os.path.join(profile_dir, "%s_%d_%s.pstats" % (strftime("%Y%m%dT%H%M%S"), os.getpid(), path))
+
+
+def run_with_pstats(environ, func, *args):
+    "Run func(*args) under cProfile and dump the stats. Return (result, file_name)."
+    profile_dir = environ.get(PROFILE_DIR_ENV) or tempfile.gettempdir()
+    os.makedirs(profile_dir, exist_ok=True)
+    file_name = pstats_file_name(environ, profile_dir)
+    with _profile_lock:
+        profiler = cProfile.Profile()
+        result = profiler.runcall(func, *args)
+    profiler.dump_stats(file_name)
+    return result, file_name
+
+
+class StackCollector(object):
+    "Profile function that sums the time spent with each exact call stack."
+
+    def __init__(self):
+        self.stack = []
+        self.times = defaultdict(float)
+        self.last = perf_counter()
+
+    def __call__(self, frame, event, arg):
+        now = perf_counter()
+        if self.stack:
+            self.times[tuple(self.stack)] += now - self.last
+        if event == 'call':
+            code = frame.f_code
+            self.stack.append("%s:%s" % (os.path.basename(code.co_filename), code.co_name))
+        elif event == 'c_call':
+            self.stack.append(getattr(arg, '__qualname__', getattr(arg, '__name__', 'builtin')))
+        elif self.stack:  # return, c_return, c_exception
+            self.stack.pop()
+        self.last = perf_counter()
+
+    def collapsed(self):
+        "Collapsed stacks with microseconds, heaviest first."
+        lines = ["%s %d" % (";".join(stack), round(duration * 1e6))
+                 for stack, duration in sorted(self.times.items(), key=lambda item: -item[1])]
+        return "\n".join(lines) + "\n"
+
+
+def run_collapsed(func, *args):
+    "Run func(*args) and collect call stacks. Return (result, collapsed stack text)."
+    collector = StackCollector()
+    sys.setprofile(collector)
+    try:
+        result = func(*args)
+    finally:
+        sys.setprofile(None)
+    return result, collector.collapsed()
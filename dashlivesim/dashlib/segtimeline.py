@@ -29,8 +29,7 @@
 #  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 #  POSSIBILITY OF SUCH DAMAGE.
 
-import os
-from struct import unpack
+from struct import iter_unpack
 from xml.etree import ElementTree
 import bisect
 
@@ -53,14 +52,8 @@ class SegmentTimeLineGenerator(object):
             dat_file = media_data['dat_file']
         except KeyError as e:
             print("Error for %s: %s" % (media_data, e))
-        dat_file_path = os.path.join(self.cfg.vod_cfg_dir, dat_file)
-        self.segtimedata = []  # Tuples corresponding to SegTimeEntry
-        with open(dat_file_path, "rb") as ifh:
-            data = ifh.read(12)
-            while data:
-                ste = SegTimeEntry(*unpack(SEGTIMEFORMAT, data))
-                self.segtimedata.append(ste)
-                data = ifh.read(12)
+        data = self.cfg.vod_cfg_storage.read(dat_file)
+        self.segtimedata = [SegTimeEntry(*entry) for entry in iter_unpack(SEGTIMEFORMAT, data)]
         self.interval_starts = [std.start_time for std in self.segtimedata]
         self.wrap_duration = cfg.vod_wrap_seconds * self.timescale
         self.nr_segments_per_wrap = cfg.vod_nr_segments_in_loop
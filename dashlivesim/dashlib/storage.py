@@ -0,0 +1,392 @@
+"""Storage backends for content and VoD configuration files.
+
+Files are read by paths relative to the root of a storage, with / as separator. The backends are
+
+* LocalStorage: a local directory,
+* PackStorage: a content pack (see contentpack.py) with a directory for the files that are not packed,
+* HttpStorage: a base URL on an HTTP origin. The files are fetched over pooled keep-alive connections
+  into a bounded local disk cache, and are then read from there.
+
+get_storage() returns the storage for a CONTENT_ROOT or VOD_CONF_DIR value, so that the simulator can
+pull content from a central origin instead of a shared file system.
+"""
+
+# The copyright in this software is being made available under the BSD License,
+# included below. This software may be subject to other third party and contributor
+# rights, including patent rights, and no such rights are granted under this license.
+#
+# Copyright (c) 2026, Dash Industry Forum.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#  * Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation and/or
+#  other materials provided with the distribution.
+#  * Neither the name of Dash Industry Forum nor the names of its
+#  contributors may be used to endorse or promote products derived from this software
+#  without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS AS IS AND ANY
+#  EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+#  WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+#  INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+#  WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+
+import errno
+import hashlib
+import http.client
+import os
+import tempfile
+import threading
+from collections import OrderedDict, namedtuple
+from os.path import join, splitext
+from urllib.parse import quote, urlsplit
+
+from dashlivesim.dashlib.caches import register_cache
+from dashlivesim.dashlib.contentpack import PACKS, PACK_EXTENSION
+from dashlivesim.dashlib.metrics import cache_lookup, stage
+
+CACHE_DIR_ENV = "STORAGE_CACHE_DIR"  # setEnv STORAGE_CACHE_DIR <dir> for files fetched from an HTTP origin
+CACHE_MB_ENV = "STORAGE_CACHE_MB"  # setEnv STORAGE_CACHE_MB <size> to bound the disk cache
+DEFAULT_CACHE_DIR = join(tempfile.gettempdir(), "dashlivesim_storage")
+DEFAULT_CACHE_MB = 1024
+HTTP_TIMEOUT = 10  # seconds
+MAX_IDLE_CONNECTIONS = 8  # Per origin and process
+
+Extent = namedtuple("Extent", "path offset size")  # A byte range of a local file, e.g. for sendfile
+
+
+class StorageError(Exception):
+    "Error when reading from a storage."
+
+
+def is_url(location):
+    "True if location is an http or https URL."
+    return location.startswith("http://") or location.startswith("https://")
+
+
+class LocalStorage(object):
+    "Files in a local directory."
+
+    def __init__(self, root):
+        self.root = root
+
+    def __repr__(self):
+        return "LocalStorage(%r)" % self.root
+
+    def local_file(self, rel_path):
+        "Path of a local file with exactly the data of rel_path, or None if there is none."
+        return join(self.root, rel_path)
+
+    def read(self, rel_path):
+        "The data of rel_path."
+        with open(join(self.root, rel_path), 'rb') as ifh:
+            return ifh.read()
+
+    def extent(self, rel_path):
+        "The Extent of a local file where the data of rel_path is."
+        path = join(self.root, rel_path)
+        return Extent(path, 0, os.path.getsize(path))
+
+    def exists(self, rel_path):
+        return os.path.isfile(join(self.root, rel_path))
+
+    def listdir(self, rel_dir=""):
+        "Names in the directory rel_dir, in sorted order."
+        return sorted(os.listdir(join(self.root, rel_dir)))
+
+    def content(self, content_name):
+        "Storage for the files of a content. If there is a <content>.pack, the files in it are read from there."
+        content_dir = LocalStorage(join(self.root, content_name))
+        pack = PACKS.get(join(self.root, content_name + PACK_EXTENSION))
+        if pack is None:
+            return content_dir
+        return PackStorage(pack, content_dir)
+
+
+class PackStorage(object):
+    "Files in a content pack. Files that are not packed, like MPDs, are read from a fallback storage."
+
+    def __init__(self, pack, fallback):
+        self.pack = pack
+        self.fallback = fallback
+
+    def __repr__(self):
+        return "PackStorage(%r, %r)" % (self.pack.path, self.fallback)
+
+    def local_file(self, rel_path):
+        "None for packed files, since they are parts of the pack file."
+        if rel_path in self.pack:
+            return None
+        return self.fallback.local_file(rel_path)
+
+    def read(self, rel_path):
+        "The data of rel_path. For packed files, this is a memoryview of the mapped pack."
+        entry = self.pack.get(rel_path)
+        if entry is None:
+            return self.fallback.read(rel_path)
+        return self.pack.read(entry)
+
+    def extent(self, rel_path):
+        entry = self.pack.get(rel_path)
+        if entry is None:
+            return self.fallback.extent(rel_path)
+        return Extent(self.pack.path, entry.offset, entry.size)
+
+    def exists(self, rel_path):
+        return rel_path in self.pack or self.fallback.exists(rel_path)
+
+
+class ConnectionPool(object):
+    """Idle keep-alive connections to one HTTP origin, shared by the threads of a process.
+
+    A connection is taken from the pool for each request and is put back when the response has been read."""
+
+    def __init__(self, scheme, netloc, max_idle=MAX_IDLE_CONNECTIONS, timeout=HTTP_TIMEOUT):
+        self.connection_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        self.netloc = netloc
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self.idle = []
+        self.lock = threading.Lock()
+        self.nr_connections = 0  # Connections opened so far
+
+    def get(self):
+        "Return (connection, reused)."
+        with self.lock:
+            if self.idle:
+                return self.idle.pop(), True
+            self.nr_connections += 1
+        return self.connection_class(self.netloc, timeout=self.timeout), False
+
+    def put(self, connection):
+        with self.lock:
+            if len(self.idle) < self.max_idle:
+                self.idle.append(connection)
+                return
+        connection.close()
+
+    def request(self, path):
+        """GET path. Return (status, body).
+
+        A reused connection may have been closed by the origin while idle. The request is then retried once
+        on a new connection."""
+        while True:
+            connection, reused = self.get()
+            try:
+                connection.request("GET", path)
+                response = connection.getresponse()
+                body = response.read()
+            except (ConnectionError, http.client.BadStatusLine) as exc:
+                connection.close()
+                if reused:
+                    continue
+                raise StorageError("Cannot get %s from %s: %s" % (path, self.netloc, exc))
+            except OSError:
+                connection.close()
+                raise
+            if response.will_close:
+                connection.close()
+            else:
+                self.put(connection)
+            return response.status, body
+
+    def close(self):
+        "Close the idle connections."
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for connection in idle:
+            connection.close()
+
+
+class DiskCache(object):
+    """Bounded cache of files in a local directory. The least recently used files are removed first.
+
+    Files that are already in the directory, e.g. from before a restart, are used as well. Each process keeps its
+    own index, so processes that share the directory may evict each others files, but not while they are read,
+    since an open file is only removed from the directory. Responses therefore open their files before the
+    headers are sent.
+
+    Cached files are not revalidated with the origin. They are kept until they are evicted or the cache is
+    cleared, so files that are changed on the origin must get new names, or the cache directory be emptied."""
+
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.files = OrderedDict()  # name -> size, least recently used first
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        existing = []
+        for name in os.listdir(cache_dir):
+            if not name.endswith(".tmp"):  # Not being written by another process
+                stat = os.stat(join(cache_dir, name))
+                existing.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(existing):
+            self.files[name] = size
+            self.total_bytes += size
+
+    def get(self, name):
+        "Path of the cached file name, or None if it is not cached."
+        with self.lock:
+            if name not in self.files:
+                return None
+            self.files.move_to_end(name)
+        return join(self.cache_dir, name)
+
+    def put(self, name, data):
+        "Store data as name and return its path. Older files are removed to keep the cache within its size."
+        path = join(self.cache_dir, name)
+        tmp_path = "%s.%d.%d.tmp" % (path, os.getpid(), threading.get_ident())
+        with open(tmp_path, 'wb') as ofh:
+            ofh.write(data)
+        os.replace(tmp_path, path)
+        evicted = []
+        with self.lock:
+            self.total_bytes += len(data) - self.files.pop(name, 0)
+            self.files[name] = len(data)
+            while self.total_bytes > self.max_bytes and len(self.files) > 1:
+                old_name, old_size = self.files.popitem(last=False)
+                self.total_bytes -= old_size
+                evicted.append(old_name)
+        for old_name in evicted:
+            try:
+                os.remove(join(self.cache_dir, old_name))
+            except FileNotFoundError:
+                pass
+        return path
+
+    def __len__(self):
+        return len(self.files)
+
+    def nbytes(self):
+        "Size of the cached files on disk."
+        return self.total_bytes
+
+    def invalidate(self, path):
+        "The cached files are from an origin, and do not depend on local files. They are never revalidated."
+        return 0
+
+    def clear(self):
+        "Remove all cached files."
+        with self.lock:
+            names, self.files, self.total_bytes = list(self.files), OrderedDict(), 0
+        for name in names:
+            try:
+                os.remove(join(self.cache_dir, name))
+            except FileNotFoundError:
+                pass
+
+
+class HttpStorage(object):
+    """Files below a base URL on an HTTP origin.
+
+    A file is fetched on first use and stored in a DiskCache, from where it is then read, mapped or sent like any
+    local file."""
+
+    def __init__(self, base_url, cache, pool=None):
+        self.base_url = base_url.rstrip("/") + "/"
+        url = urlsplit(self.base_url)
+        self.base_path = url.path
+        self.pool = pool if pool is not None else get_pool(url.scheme, url.netloc)
+        self.cache = cache
+
+    def __repr__(self):
+        return "HttpStorage(%r)" % self.base_url
+
+    def fetch(self, rel_path):
+        "Path of the cached copy of rel_path, which is fetched from the origin if needed."
+        url = self.base_url + rel_path
+        name = hashlib.sha1(url.encode('utf-8')).hexdigest() + splitext(rel_path)[1]
+        path = self.cache.get(name)
+        cache_lookup("storage", path is not None)
+        if path is not None:
+            return path
+        with stage("fetch"):
+            status, body = self.pool.request(quote(self.base_path + rel_path))
+        if status in (404, 410):
+            raise FileNotFoundError(errno.ENOENT, "Not found on origin", url)
+        if status != 200:
+            raise StorageError("Got status %d for %s" % (status, url))
+        return self.cache.put(name, body)
+
+    def local_file(self, rel_path):
+        "Path of the cached copy of rel_path."
+        return self.fetch(rel_path)
+
+    def read(self, rel_path):
+        with open(self.fetch(rel_path), 'rb') as ifh:
+            return ifh.read()
+
+    def extent(self, rel_path):
+        path = self.fetch(rel_path)
+        return Extent(path, 0, os.path.getsize(path))
+
+    def exists(self, rel_path):
+        try:
+            self.fetch(rel_path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def listdir(self, rel_dir=""):
+        raise StorageError("Cannot list %s%s on an HTTP origin" % (self.base_url, rel_dir))
+
+    def content(self, content_name):
+        "Storage for the files of a content. Packs are not fetched from an origin."
+        return HttpStorage(self.base_url + content_name, self.cache, self.pool)
+
+
+STORAGES = {}  # Storages by location
+POOLS = {}  # Connection pools by (scheme, netloc)
+DISK_CACHES = {}  # Disk caches by directory
+_lock = threading.Lock()
+
+
+def get_pool(scheme, netloc):
+    "The ConnectionPool for an origin, which is shared by all storages on it."
+    with _lock:
+        pool = POOLS.get((scheme, netloc))
+        if pool is None:
+            pool = POOLS[(scheme, netloc)] = ConnectionPool(scheme, netloc)
+    return pool
+
+
+def get_disk_cache(environ=None):
+    "The DiskCache configured in environ. It is created on first use, and is registered with the other caches."
+    environ = environ or {}
+    cache_dir = environ.get(CACHE_DIR_ENV, DEFAULT_CACHE_DIR)
+    with _lock:
+        cache = DISK_CACHES.get(cache_dir)
+        if cache is None:
+            max_bytes = int(environ.get(CACHE_MB_ENV, DEFAULT_CACHE_MB)) * 1024 * 1024
+            cache = DISK_CACHES[cache_dir] = DiskCache(cache_dir, max_bytes)
+            register_cache("storage:%s" % cache_dir, cache)
+    return cache
+
+
+def get_storage(location, environ=None):
+    """Storage for a directory or an http(s) URL, e.g. from CONTENT_ROOT or VOD_CONF_DIR.
+
+    A storage object is returned as it is. Storages are shared per process, so that HTTP connections are reused
+    between requests, and so that data that is derived from a storage can be kept per storage."""
+    if not isinstance(location, str):
+        return location
+    storage = STORAGES.get(location)
+    if storage is None:
+        if is_url(location):
+            storage = HttpStorage(location, get_disk_cache(environ))
+        else:
+            storage = LocalStorage(location)
+        with _lock:
+            storage = STORAGES.setdefault(location, storage)
+    return storage
@@ -29,8 +29,14 @@
 #  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 #  POSSIBILITY OF SUCH DAMAGE.
 
+import sys
+from array import array
 from struct import pack, unpack
 
+UINT32_TYPECODE = 'I' if array('I').itemsize == 4 else 'L'
+INT32_TYPECODE = 'i' if array('i').itemsize == 4 else 'l'
+UINT64_TYPECODE = 'Q'
+
 
 def str_to_uint32(string4):
     "4-character string to unsigned int32."
@@ -60,3 +66,29 @@ def sint32_to_str(sint32):
 def uint64_to_str(uint64):
     "Unsigned int64 to string."
     return pack(">Q", uint64)
+
+
+def str_to_uint32_array(string):
+    "String or other bytes-like object of big-endian unsigned int32 to array."
+    values = array(UINT32_TYPECODE)
+    values.frombytes(string)
+    if sys.byteorder == 'little':
+        values.byteswap()
+    return values
+
+
+def str_to_uint64_array(string):
+    "String or other bytes-like object of big-endian unsigned int64 to array."
+    values = array(UINT64_TYPECODE)
+    values.frombytes(string)
+    if sys.byteorder == 'little':
+        values.byteswap()
+    return values
+
+
+def uint_array_to_str(values):
+    "Array of unsigned ints to big-endian string."
+    if sys.byteorder == 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
@@ -0,0 +1,224 @@
+"""Span tracing of sampled requests, exported as Chrome Trace Event Format JSON.
+
+Set TRACE_SAMPLE_RATE (0-1) in the environment to trace that fraction of the requests.
+The spans of a traced request are the metrics stages plus finer spans marked with
+
+    with tracing.span("filter_box", box=path):
+        ...
+
+and are written as complete ("X") events to dashlivesim_trace_<pid>.json in TRACE_DIR
+when the request ends. The file is a JSON array without the closing bracket, which
+Perfetto and chrome://tracing accept. It is rotated when larger than TRACE_MAX_BYTES.
+Each traced request gets a trace ID that is returned in the X-DashLiveSim-Trace-Id
+response header, so that it can be logged in access logs.
+"""
+
+# The copyright in this software is being made available under the BSD License,
+# included below. This software may be subject to other third party and contributor
+# rights, including patent rights, and no such rights are granted under this license.
+#
+# Copyright (c) 2026, Dash Industry Forum.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#  * Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation and/or
+#  other materials provided with the distribution.
+#  * Neither the name of Dash Industry Forum nor the names of its
+#  contributors may be used to endorse or promote products derived from this software
+#  without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS AS IS AND ANY
+#  EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+#  WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+#  INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+#  WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+import json
+import os
+import random
+import tempfile
+import threading
+from functools import wraps
+from time import perf_counter, time
+
+from dashlivesim.dashlib.metrics import current_request, NO_STAGE
+
+TRACE_SAMPLE_RATE_ENV = "TRACE_SAMPLE_RATE"
+TRACE_DIR_ENV = "TRACE_DIR"
+TRACE_MAX_BYTES_ENV = "TRACE_MAX_BYTES"
+TRACE_BACKUPS_ENV = "TRACE_BACKUPS"
+TRACE_ID_HEADER = "X-DashLiveSim-Trace-Id"
+TRACE_ID_ENVIRON_KEY = "dashlivesim.trace_id"
+
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_BACKUPS = 3
+
+EPOCH_OFFSET = time() - perf_counter()  # To get wall-clock timestamps from perf_counter values
+
+
+class TracingError(Exception):
+    "Bad tracing configuration."
+
+
+def sample_rate(environ):
+    "Get the configured sample rate."
+    try:
+        rate = float(environ.get(TRACE_SAMPLE_RATE_ENV, 0))
+    except ValueError:
+        raise TracingError("%s must be a number between 0 and 1" % TRACE_SAMPLE_RATE_ENV)
+    if not 0 <= rate <= 1:
+        raise TracingError("%s must be a number between 0 and 1" % TRACE_SAMPLE_RATE_ENV)
+    return rate
+
+
+def is_sampled(environ):
+    "Decide if this request should be traced."
+    if TRACE_SAMPLE_RATE_ENV not in environ:
+        return False
+    rate = sample_rate(environ)
+    return rate > 0 and random.random() < rate
+
+
+def new_trace_id():
+    "Random 64-bit trace ID as hex."
+    return os.urandom(8).hex()
+
+
+def json_default(obj):
+    "Make span arguments such as box paths JSON serializable."
+    if isinstance(obj, bytes):
+        return obj.decode('latin-1')
+    return str(obj)
+
+
+class TraceWriter(object):
+    "Append events to a trace file and rotate it when it gets too big."
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES, backups=DEFAULT_BACKUPS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._lock = threading.Lock()
+
+    def write(self, events):
+        "Write events, one per line."
+        lines = "".join(json.dumps(event, default=json_default) + ",\n" for event in events)
+        with self._lock:
+            with open(self.path, 'a') as ofh:
+                if ofh.tell() == 0:
+                    ofh.write("[\n")
+                ofh.write(lines)
+                size = ofh.tell()
+            if size > self.max_bytes:
+                self.rotate()
+
+    def rotate(self):
+        "Shift path to path.1, path.1 to path.2 and so on, dropping the oldest."
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists("%s.%d" % (self.path, i)):
+                os.replace("%s.%d" % (self.path, i), "%s.%d" % (self.path, i + 1))
+        if self.backups > 0:
+            os.replace(self.path, "%s.1" % self.path)
+        else:
+            os.remove(self.path)
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(environ):
+    "Get the writer for the trace file configured in environ."
+    trace_dir = environ.get(TRACE_DIR_ENV) or tempfile.gettempdir()
+    path = os.path.join(trace_dir, "dashlivesim_trace_%d.json" % os.getpid())
+    with _writers_lock:
+        writer = _writers.get(path)
+        if writer is None:
+            os.makedirs(trace_dir, exist_ok=True)
+            writer = TraceWriter(path, int(environ.get(TRACE_MAX_BYTES_ENV, DEFAULT_MAX_BYTES)),
+                                 int(environ.get(TRACE_BACKUPS_ENV, DEFAULT_BACKUPS)))
+            _writers[path] = writer
+    return writer
+
+
+class Trace(object):
+    "Spans of one traced request."
+
+    def __init__(self, trace_id, uri, writer):
+        self.trace_id = trace_id
+        self.uri = uri
+        self.writer = writer
+        self.pid = os.getpid()
+        self.tid = threading.get_ident()
+        self.events = []
+
+    def add(self, name, start, duration, args=None):
+        "Add a complete event for a span with start and duration from perf_counter."
+        event = {'name': name, 'cat': 'dashlivesim', 'ph': 'X', 'pid': self.pid, 'tid': self.tid,
+                 'ts': round((start + EPOCH_OFFSET) * 1e6, 3), 'dur': round(duration * 1e6, 3)}
+        if args:
+            event['args'] = args
+        self.events.append(event)
+
+    def finish(self, request, status_code, registry=None):
+        "Add the request span and write all events."
+        self.add("request", request.start, perf_counter() - request.start,
+                 {'trace_id': self.trace_id, 'uri': self.uri, 'status': status_code,
+                  'resource': request.resource, 'flags': request.flags})
+        self.writer.write(self.events)
+
+
+def start_trace(request, environ):
+    "Attach a new Trace to a RequestMetrics object, and make its ID available for logging."
+    trace = Trace(new_trace_id(), environ.get('REQUEST_URI', ''), get_writer(environ))
+    request.trace = trace
+    request.finish_hooks.append(trace.finish)
+    environ[TRACE_ID_ENVIRON_KEY] = trace.trace_id
+    return trace
+
+
+class _Span(object):
+    "Context manager adding a span to a trace."
+
+    __slots__ = ("trace", "name", "args", "start")
+
+    def __init__(self, trace, name, args):
+        self.trace = trace
+        self.name = name
+        self.args = args
+        self.start = None
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.trace.add(self.name, self.start, perf_counter() - self.start, self.args)
+
+
+def span(name, **args):
+    "Context manager for a span in the current trace (if any)."
+    request = current_request()
+    if request is None or request.trace is None:
+        return NO_STAGE
+    return _Span(request.trace, name, args)
+
+
+def traced(name):
+    "Decorator that runs the function in a span."
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
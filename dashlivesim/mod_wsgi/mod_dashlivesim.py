@@ -29,19 +29,29 @@
 #  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 #  POSSIBILITY OF SUCH DAMAGE.
 
-# Note that VOD_CONF_DIR and CONTENT_ROOT directories must be set in environment
+# Note that VOD_CONF_DIR and CONTENT_ROOT directories (or http URLs) must be set in environment
 # For Apache mod_wsgi, this is done using setEnv
 
+import os
 import traceback
+import types
 from os.path import splitext
 from urllib.parse import urlparse, parse_qs
-from time import time, sleep
-
-from dashlivesim.dashlib import dash_proxy, sessionid, mpd_proxy
-from dashlivesim.dashlib.dash_proxy import ChunkedSegment
+from email.utils import formatdate
+from wsgiref.util import FileWrapper
+from wsgiref.simple_server import ServerHandler, WSGIRequestHandler
+
+from dashlivesim.dashlib import dash_proxy, sessionid, mpd_proxy, metrics, profiler, tracing, memory, fswatch
+from dashlivesim.dashlib.clock import get_clock, set_default_clock, VirtualClock, SYSTEM_CLOCK, parse_start_time
+from dashlivesim.dashlib.dash_proxy import ChunkedSegment, SegmentPayload
+from dashlivesim.dashlib.cachepolicy import CachePolicy, NO_CACHE_HEADERS, resource_type, etag_matches
+from dashlivesim.dashlib.storage import get_storage
 from dashlivesim import SERVER_AGENT
 
 MAX_SESSION_LENGTH = 0  # If non-zero,  limit sessions via redirect
+MULTIPART_BOUNDARY = "DASH_LIVE_SIM_BYTERANGES"
+MAX_BYTE_RANGES = 16  # More ranges in a request are ignored, and the full payload is sent
+FILE_BLOCK_SIZE = 65536  # Block size when streaming mdat payloads without sendfile
 
 # Helper for HTTP responses
 # pylint: disable=dangerous-default-value
@@ -50,20 +60,25 @@ status_string = {
     200: 'OK',
     206: 'Partial Content',
     302: 'Found',
+    304: 'Not Modified',
+    400: 'Bad Request',
+    403: 'Forbidden',
     404: 'Not Found',
     410: 'Gone'
     }
 
 
 def start_reply(status_code, response, length=-1, headers={}):
-    "Start reply by writing headers reply."
+    """Start reply by writing headers reply. Return the WSGI write callable.
+
+    Responses are not cacheable unless headers has a Cache-Control value."""
     status = "%d %s" % (status_code, status_string[status_code])
+    headers = dict(headers)
 
     # Add default headers to all requests
     headers['Accept-Ranges'] = 'bytes'
-    headers['Pragma'] = 'no-cache'
-    headers['Cache-Control'] = 'no-cache'
-    headers['Expires'] = '-1'
+    if 'Cache-Control' not in headers:
+        headers.update(NO_CACHE_HEADERS)
     headers['DASH-Live-Simulator'] = SERVER_AGENT
     headers['Access-Control-Allow-Headers'] = 'origin,range,accept-encoding,referer'
     headers['Access-Control-Allow-Methods'] = 'GET,HEAD,OPTIONS'
@@ -76,7 +91,24 @@ def start_reply(status_code, response, length=-1, headers={}):
     if 'Content-Type' not in headers:
         headers['Content-Type'] = 'text/plain'
 
-    response(status, list(headers.items()))
+    request_metrics = metrics.current_request()
+    if request_metrics is not None and request_metrics.server_timing:
+        headers['Server-Timing'] = request_metrics.server_timing_header()
+        headers['Timing-Allow-Origin'] = '*'
+    if request_metrics is not None and request_metrics.trace is not None:
+        headers[tracing.TRACE_ID_HEADER] = request_metrics.trace.trace_id
+
+    return response(status, list(headers.items()))
+
+
+def dated_start_response(start_response, now):
+    "Wrap start_response to send a Date header with the time now, e.g. from a virtual clock."
+    date = formatdate(now, usegmt=True)
+
+    def start_response_with_date(status, headers, *args):
+        headers = [(name, value) for (name, value) in headers if name.lower() != 'date'] + [('Date', date)]
+        return start_response(status, headers, *args)
+    return start_response_with_date
 
 
 def full_reply(status_code, response, body=b"", headers={}):
@@ -85,21 +117,123 @@ def full_reply(status_code, response, body=b"", headers={}):
     return [body]
 
 
-# pylint: disable=too-many-branches, too-many-locals
 def application(environment, start_response):
     "WSGI Entrypoint"
+    path_parts = urlparse(environment['REQUEST_URI']).path.split('/')
+    enabled = metrics.is_enabled(environment)
+    if len(path_parts) == 3 and path_parts[2] in (metrics.METRICS_PATH_NAME, memory.MEMORY_PATH_NAME):
+        return admin_reply(environment, start_response, path_parts[2], enabled)
+    server_timing = (metrics.is_enabled(environment, metrics.SERVER_TIMING_ENV) or
+                     metrics.SERVER_TIMING_OPTION in path_parts)
+    if profiler.PROFILE_HEADER in environment:
+        mode = profiler.requested_mode(environment)
+        if mode is not None:
+            return profiled_request(environment, start_response, mode)
+    try:
+        traced = tracing.is_sampled(environment)
+    except tracing.TracingError as exc:
+        print("mod_dash_handler: Request not traced: {0}".format(exc))
+        traced = False
+    if not (enabled or server_timing or traced):
+        return handle_request(environment, start_response)
+
+    request_metrics = metrics.begin_request(metrics.resource_label(splitext(path_parts[-1])[1]),
+                                            record=enabled, server_timing=server_timing)
+    if traced:
+        tracing.start_trace(request_metrics, environment)
+    if enabled and memory.is_enabled(environment):
+        memory.track_request(request_metrics, environment)
+    status = []
+
+    def start_response_with_status(status_line, headers, *args):
+        status.append(int(status_line.split(" ", 1)[0]))
+        return start_response(status_line, headers, *args)
+
+    try:
+        result = handle_request(environment, start_response_with_status)
+    except BaseException:
+        metrics.end_request(request_metrics, 500)  # Also makes the thread forget the request
+        raise
+    status_code = status[-1] if status else 500
+    if isinstance(result, types.GeneratorType):  # Chunked response, which is produced while iterating
+        return metrics.iterate_measured(request_metrics, result, status_code)
+    metrics.end_request(request_metrics, status_code)
+    return result
+
+
+def admin_reply(environment, start_response, name, metrics_enabled):
+    "Reply on the reserved paths for metrics and memory reports."
+    if name == metrics.METRICS_PATH_NAME:
+        if not metrics_enabled:
+            return full_reply(404, start_response, b"Metrics not enabled\n")
+        return full_reply(200, start_response, metrics.REGISTRY.render().encode('utf-8'),
+                          {'Content-Type': metrics.CONTENT_TYPE})
+    if not profiler.is_authorized(environment):
+        return full_reply(403, start_response, b"Forbidden\n")
+    query = urlparse(environment['REQUEST_URI']).query or environment.get('QUERY_STRING', '')
+    args = parse_qs(query)
+    try:
+        top = int(args.get('top', [memory.DEFAULT_TOP])[0])
+        report = memory.snapshot_report(top, args.get('key', ['lineno'])[0])
+    except ValueError as exc:
+        return full_reply(400, start_response, ("%s\n" % exc).encode('utf-8'))
+    return full_reply(200, start_response, report.encode('utf-8'))
+
+
+def profiled_request(environment, start_response, mode):
+    """Handle a request with the profiler and return a buffered response.
+
+    In pstats mode, this is the normal response with the name of the stats file in a header.
+    In collapsed mode, the body is the collapsed call stacks."""
+    response = {}
+
+    def buffered_start_response(status_line, headers, *args):
+        response['status'] = status_line
+        response['headers'] = headers
+        return response.setdefault('written', []).append
+
+    def run():
+        "Run the request including the production of the body."
+        result = handle_request(environment, buffered_start_response)
+        try:
+            parts = list(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return b"".join(response.get('written', []) + parts)
+
+    if mode == profiler.PSTATS:
+        body, file_name = profiler.run_with_pstats(environment, run)
+        headers = [(k, v) for (k, v) in response['headers'] if k != 'Content-Length']
+        headers.append(('Content-Length', str(len(body))))
+        headers.append((profiler.PROFILE_FILE_HEADER, os.path.basename(file_name)))
+        start_response(response['status'], headers)
+        return [body]
+    _, collapsed = profiler.run_collapsed(run)
+    return full_reply(200, start_response, collapsed.encode('utf-8'))
+
+
+# pylint: disable=too-many-branches, too-many-locals
+def handle_request(environment, start_response):
+    "Handle a request for an MPD, init segment, media segment or thumbnail."
 
     hostname = environment['HTTP_HOST']
     url = urlparse(environment['REQUEST_URI'])
-    vod_conf_dir = environment['VOD_CONF_DIR']
-    content_root = environment['CONTENT_ROOT']
+    if metrics.is_enabled(environment, fswatch.WATCH_FILES_ENV):
+        fswatch.watch(environment)
+    vod_conf_dir = get_storage(environment['VOD_CONF_DIR'], environment)
+    content_root = get_storage(environment['CONTENT_ROOT'], environment)
     is_https = environment.get('wsgi.url_scheme', False) and environment['wsgi.url_scheme'] == 'https'
     path_parts = url.path.split('/')
     ext = splitext(path_parts[-1])[1]
     query = url.query if url.query else environment.get('QUERY_STRING', '')
     args = parse_qs(query)
 
-    now = time()
+    clock = get_clock(environment)
+    now = clock.time()
+    if clock is not SYSTEM_CLOCK:  # Let clients synchronize to the simulated time
+        start_response = dated_start_response(start_response, now)
+    is_head = environment.get('REQUEST_METHOD') == 'HEAD'
 
     body = None
 
@@ -137,94 +271,118 @@ def application(environment, start_response):
             start_reply(404, start_response, len(body))
 
     if body is not None:
-        yield body
-    else:
-        range_line = None
-        if 'HTTP_RANGE' in environment:
-            range_line = environment['HTTP_RANGE']
-
-        success = True
-        mimetype = get_mime_type(ext)
-        status_code = 200
-        payload_in = None
-        chunk = chunk_out = False
-
-        try:
-            dashProv = dash_proxy.createProvider(hostname, path_parts[1:], args,
-                                                 vod_conf_dir, content_root, now,
-                                                 None, is_https)
-            cfg = dashProv.cfg
-            ext = cfg.ext
-            if ext == ".m4s":
-                if cfg.chunk_duration_in_s is not None and cfg.chunk_duration_in_s > 0:
-                    chunk = True
-                response = dash_proxy.get_media(dashProv, chunk)
-                if isinstance(response, ChunkedSegment):
-                    chunk_out = True
-            elif ext in (".mpd", ".period"):
-                response = mpd_proxy.get_mpd(dashProv)
-            elif ext == ".mp4":
-                response = dash_proxy.get_init(dashProv)
-            elif ext == ".jpg":
-                response = dash_proxy.get_media(dashProv)
-            if isinstance(response, bytes) or isinstance(response, str) or chunk_out:
-                if isinstance(response, str):
-                    response = response.encode('utf-8')
-                payload_in = response
-                if not payload_in:
-                    success = False
-            else:
-                if not response['ok']:
-                    success = False
-                payload_in = response['pl']
-
-        # pylint: disable=broad-except
-        except Exception as exc:
-            success = False
-            traceback.print_exc()
-            payload_in = "DASH Proxy Error: {0}\n URL={1}".format(exc, url)
-
-        if not success:
+        return [body]
+
+    range_line = None
+    if 'HTTP_RANGE' in environment:
+        range_line = environment['HTTP_RANGE']
+
+    success = True
+    mimetype = get_mime_type(ext)
+    status_code = 200
+    payload_in = None
+    chunk = chunk_out = False
+    dashProv = None
+    payload_key = cached = None
+    cache_policy = CachePolicy.from_environ(environment)
+
+    try:
+        dashProv = dash_proxy.createProvider(hostname, path_parts[1:], args,
+                                             vod_conf_dir, content_root, now,
+                                             None, is_https, clock,
+                                             metrics.is_enabled(environment, dash_proxy.MMAP_READS_ENV))
+        cfg = dashProv.cfg
+        ext = cfg.ext
+        request_metrics = metrics.current_request()
+        if request_metrics is not None:
+            request_metrics.set_config(cfg)
+        if ext == ".m4s":
+            if cfg.chunk_duration_in_s is not None and cfg.chunk_duration_in_s > 0:
+                chunk = True
+            if not cfg.multi_url:  # Otherwise, the segment depends on the time of the request
+                payload_key = (url.path, query, environment['CONTENT_ROOT'], environment['VOD_CONF_DIR'])
+                if is_head or range_line:
+                    # The size, ETag and byte ranges are all had from a cached SegmentPayload.
+                    cached = dash_proxy.PAYLOADS.get(payload_key)
+            response = dash_proxy.get_media(dashProv, chunk, passthrough=True, cached=cached, head=is_head)
+            if isinstance(response, ChunkedSegment):
+                chunk_out = True
+        elif ext in (".mpd", ".period"):
+            response = mpd_proxy.get_mpd(dashProv)
+        elif ext == ".mp4":
+            response = dash_proxy.get_init(dashProv)
+        elif ext == ".jpg":
+            response = dash_proxy.get_media(dashProv, passthrough=True)
+        if isinstance(response, (bytes, str, SegmentPayload)) or chunk_out:
+            if isinstance(response, str):
+                response = response.encode('utf-8')
+            payload_in = response
             if not payload_in:
-                payload_in = "Not found (now)"
-
-            status_code = 404
-            mimetype = "text/plain"
-
-        if isinstance(payload_in, str):
-            payload_in = payload_in.encode('utf-8')
-        payload_out = payload_in
-
-        # Setup response headers
-        headers = {'Content-Type': mimetype}
-
-        if status_code != 404:
-            if range_line and not chunk_out:
-                payload_out, range_out = handle_byte_range(payload_in, range_line)
-                if range_out != "":  # OK
-                    headers['Content-Range'] = range_out
-                    status_code = 206
-                else:  # Bad range, drop it
-                    print("mod_dash_handler: Bad range {0}".format(range_line))
-
-        if not chunk_out:
-            start_reply(status_code, start_response, len(payload_out), headers)
-            yield payload_out
+                success = False
         else:
-            start_reply(status_code, start_response, -1, headers)
-            now_float = now
-            seg_start = payload_out.seg_start
-            chunk_dur = cfg.chunk_duration_in_s
-            margin = 0.1  # Make available 100ms before the formal time
-            for i, chunk in enumerate(payload_out.chunks, start=1):
-                now_float = time()  # Update time
-                chunk_availability_time = seg_start + i * chunk_dur - margin
-                time_until_available = chunk_availability_time - now_float
-                # print("%d time_until_available %.3f" % (i, time_until_available))
-                if time_until_available > 0:
-                    # print("Sleeping for %.3f" % time_until_available)
-                    sleep(time_until_available)
-                yield chunk
+            if not response['ok']:
+                success = False
+            payload_in = response['pl']
+
+    # pylint: disable=broad-except
+    except Exception as exc:
+        success = False
+        traceback.print_exc()
+        payload_in = "DASH Proxy Error: {0}\n URL={1}".format(exc, url)
+
+    if not success:
+        if not payload_in:
+            payload_in = "Not found (now)"
+
+        status_code = 404
+        mimetype = "text/plain"
+
+    if isinstance(payload_in, str):
+        payload_in = payload_in.encode('utf-8')
+    elif isinstance(payload_in, SegmentPayload) and payload_key is not None and payload_in is not cached:
+        dash_proxy.PAYLOADS.put(payload_key, payload_in)
+    payload_out = payload_in
+
+    # Setup response headers
+    headers = {'Content-Type': mimetype}
+
+    if status_code != 404 and not chunk_out:
+        headers.update(cache_policy.headers(resource_type(ext), dashProv, now, payload_in))
+        if_none_match = environment.get('HTTP_IF_NONE_MATCH')
+        if if_none_match and 'ETag' in headers and etag_matches(if_none_match, headers['ETag']):
+            start_reply(304, start_response, -1, headers)
+            return [b""]
+
+    if status_code != 404:
+        # Range requests on chunked responses are ignored since the length is not known in advance.
+        if range_line and not chunk_out:
+            payload_out, range_headers = handle_byte_range(payload_in, range_line, mimetype)
+            if range_headers is not None:  # OK
+                headers.update(range_headers)
+                status_code = 206
+            else:  # Bad range, drop it
+                print("mod_dash_handler: Bad range {0}".format(range_line))
+
+    if is_head:
+        # The length of a SegmentPayload is known without reading the mdat payload.
+        start_reply(status_code, start_response, -1 if chunk_out else len(payload_out), headers)
+        return [b""]
+    if chunk_out:
+        start_reply(status_code, start_response, -1, headers)
+        # The chunks are paced by the shared scheduler in chunkscheduler.
+        return payload_out.chunks
+    if isinstance(payload_out, SegmentPayload):
+        # Send the filtered boxes from memory, and let the server stream the mdat payload from the file.
+        # The file is opened before the headers are sent, so that it can be removed, e.g. from a disk cache,
+        # without cutting the response short.
+        payload_file = payload_out.open_payload()
+        write = start_reply(status_code, start_response, len(payload_out), headers)
+        if payload_out.prefix:
+            write(payload_out.prefix)
+        file_wrapper = environment.get('wsgi.file_wrapper', FileWrapper)
+        return file_wrapper(payload_file, FILE_BLOCK_SIZE)
+    start_reply(status_code, start_response, len(payload_out), headers)
+    return [payload_out]
 
 
 def get_mime_type(ext):
@@ -239,36 +397,118 @@ def get_mime_type(ext):
     return "text/plain"
 
 
-def handle_byte_range(payload, range_line):
-    """Handle byte range and return data and range-header value.
-    If range is strange, return empty string."""
-    range_parts = range_line.split("=")[-1]
-    ranges = range_parts.split(",")
-    if len(ranges) > 1:
-        return (payload, None)
-    length = len(payload)
-    range_interval = ranges[0]
-    range_start, range_end = range_interval.split("-")
-    bad_range = False
-    if range_start == "" and range_end != "":
-        # This is the rangeStart lasts bytes
-        range_start = length - int(range_end)
-        range_end = length - 1
-    elif range_start != "":
-        range_start = int(range_start)
-        if range_end != "":
-            range_end = min(int(range_end), length-1)
+def parse_byte_ranges(range_line, length):
+    """Parse a Range header value into a sorted list of (first, last) byte positions.
+
+    Overlapping and adjacent ranges are merged, so that no byte is sent twice.
+    Return None if the header is malformed, has more than MAX_BYTE_RANGES ranges,
+    or no range is satisfiable."""
+    unit, _, range_set = range_line.partition("=")
+    if unit.strip() != "bytes":
+        return None
+    range_intervals = range_set.split(",")
+    if len(range_intervals) > MAX_BYTE_RANGES:
+        return None
+    ranges = []
+    for range_interval in range_intervals:
+        range_start, sep, range_end = range_interval.strip().partition("-")
+        if sep == "":
+            return None
+        try:
+            if range_start == "":  # The last range_end bytes
+                if range_end == "":
+                    return None
+                range_start = max(length - int(range_end), 0)
+                range_end = length - 1
+            else:
+                range_start = int(range_start)
+                range_end = min(int(range_end), length - 1) if range_end != "" else length - 1
+        except ValueError:
+            return None
+        if range_start <= range_end:
+            ranges.append((range_start, range_end))
+    merged = []
+    for range_start, range_end in sorted(ranges):
+        if merged and range_start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], range_end))
         else:
-            range_end = length-1
-    else:
-        bad_range = True
-    if range_end < range_start:
-        bad_range = True
-    if bad_range:
-        return (payload, "")
-    ranged_payload = payload[range_start: range_end+1]
-    range_response = "bytes %d-%d/%d" % (range_start, range_end, len(payload))
-    return (ranged_payload, range_response)
+            merged.append((range_start, range_end))
+    return merged or None
+
+
+def handle_byte_range(payload, range_line, mimetype="application/octet-stream"):
+    """Handle byte range and return data and extra headers.
+
+    Only the requested parts are extracted from the payload, so a SegmentPayload
+    only reads the needed parts of the file. Multiple ranges result in a
+    multipart/byteranges response. If range is strange, return (payload, None)."""
+    length = len(payload)
+    ranges = parse_byte_ranges(range_line, length)
+    if ranges is None:
+        return (payload, None)
+    if len(ranges) == 1:
+        range_start, range_end = ranges[0]
+        range_response = "bytes %d-%d/%d" % (range_start, range_end, length)
+        return (payload[range_start: range_end+1], {'Content-Range': range_response})
+    parts = []
+    for range_start, range_end in ranges:
+        parts.append(("\r\n--%s\r\nContent-Type: %s\r\nContent-Range: bytes %d-%d/%d\r\n\r\n" %
+                      (MULTIPART_BOUNDARY, mimetype, range_start, range_end, length)).encode('utf-8'))
+        parts.append(payload[range_start: range_end+1])
+    parts.append(("\r\n--%s--\r\n" % MULTIPART_BOUNDARY).encode('utf-8'))
+    content_type = "multipart/byteranges; boundary=%s" % MULTIPART_BOUNDARY
+    return (b"".join(parts), {'Content-Type': content_type})
+
+
+class SendfileServerHandler(ServerHandler):
+    "Server handler that transmits wsgi.file_wrapper responses with os.sendfile."
+
+    def sendfile(self):
+        """Send the rest of the wrapped file from its current position directly to the socket.
+
+        No more than the Content-Length is sent, since the payload may be followed by other data, as in a pack."""
+        filelike = self.result.filelike
+        try:
+            in_fd = filelike.fileno()
+            out_fd = self.stdout.fileno()
+        except (AttributeError, OSError):
+            return False
+        if not self.headers_sent:
+            self.send_headers()
+        self._flush()
+        offset = filelike.tell()
+        remaining = os.fstat(in_fd).st_size - offset
+        content_length = self.headers.get('Content-Length')
+        if content_length is not None:
+            remaining = min(remaining, int(content_length) - self.bytes_sent)
+        while remaining > 0:
+            sent = os.sendfile(out_fd, in_fd, offset, remaining)
+            if sent == 0:
+                break
+            offset += sent
+            remaining -= sent
+            self.bytes_sent += sent
+        return True
+
+
+class SendfileRequestHandler(WSGIRequestHandler):
+    "Request handler for the local webserver using SendfileServerHandler."
+
+    def handle(self):
+        "Handle a single HTTP request (as WSGIRequestHandler.handle, but with another server handler)."
+        self.raw_requestline = self.rfile.readline(65537)
+        if len(self.raw_requestline) > 65536:
+            self.requestline = ''
+            self.request_version = ''
+            self.command = ''
+            self.send_error(414)
+            return
+        if not self.parse_request():  # An error code has been sent, just exit
+            return
+        handler = SendfileServerHandler(self.rfile, self.wfile, self.get_stderr(), self.get_environ(),
+                                        multithread=False)
+        handler.request_handler = self  # backpointer for logging
+        handler.run(self.server.get_app())
 
 
 def main():
@@ -281,7 +521,14 @@ def main():
                         help="content root directory", required=True)
     parser.add_argument("--host", dest="host", type=str, help="IPv4 host", default="0.0.0.0")
     parser.add_argument("--port", dest="port", type=int, help="IPv4 port", default=8059)
+    parser.add_argument("--clock_start", dest="clock_start", type=str,
+                        help="simulated start time (seconds since epoch or ISO 8601)")
+    parser.add_argument("--clock_speed", dest="clock_speed", type=float,
+                        help="simulated seconds per real second (0 stops the clock)")
     args = parser.parse_args()
+    if args.clock_start is not None or args.clock_speed is not None:
+        start = parse_start_time(args.clock_start) if args.clock_start is not None else None
+        set_default_clock(VirtualClock(start, args.clock_speed if args.clock_speed is not None else 1.0))
 
     def application_wrapper(env, resp):
         "Wrapper around application for local webserver."
@@ -294,7 +541,7 @@ def main():
         "Local webserver."
         from wsgiref.simple_server import make_server
         print('Waiting for requests at "{0}:{1}"'.format(host, port))
-        httpd = make_server(host, port, wrapper)
+        httpd = make_server(host, port, wrapper, handler_class=SendfileRequestHandler)
         httpd.serve_forever()
 
     run_local_webserver(application_wrapper, args.host, args.port)
@@ -31,6 +31,9 @@
 
 from os import unlink, makedirs
 from os.path import join, abspath, dirname, exists
+
+from dashlivesim.dashlib.structops import uint32_to_str
+
 thisDir = abspath(dirname(__file__))
 VOD_CONFIG_DIR = join(thisDir, "vod_cfg")
 CONTENT_ROOT = thisDir
@@ -53,6 +56,29 @@ def write_data_to_outfile(data, filename):
     ofh.close()
 
 
+def wsgi_request(application, path, extra_environ=None):
+    """Call a WSGI application with path. Return (status, headers, body)."""
+    environ = {'HTTP_HOST': 'streamtest.eu', 'REQUEST_URI': path, 'REQUEST_METHOD': 'GET',
+               'VOD_CONF_DIR': VOD_CONFIG_DIR, 'CONTENT_ROOT': CONTENT_ROOT}
+    if extra_environ:
+        environ.update(extra_environ)
+    response = {}
+    written = []
+
+    def start_response(status, headers):
+        response['status'] = status
+        response['headers'] = dict(headers)
+        return written.append
+
+    result = application(environ, start_response)
+    try:
+        body = b"".join(written + list(result))
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return response['status'], response['headers'], body
+
+
 def findAllIndexes(needle, haystack):
     """Find the index for the beginning of each occurrence of ``needle`` in ``haystack``. Overlaps are allowed."""
     indexes = []
@@ -61,3 +87,14 @@ def findAllIndexes(needle, haystack):
         indexes.append(last_index)
         last_index = haystack.find(needle, last_index + 1)
     return indexes
+
+
+def make_saio_moof(nr_entries, version=0):
+    "moof with a 32-bit tfdt and a saio with nr_entries offsets, as with CENC data that is not contiguous."
+    tfdt = uint32_to_str(16) + b'tfdt' + b'\x00' * 8
+    entry_size = 4 if version == 0 else 8
+    saio = (uint32_to_str(16 + entry_size * nr_entries) + b'saio' + bytes([version]) + b'\x00\x00\x00' +
+            uint32_to_str(nr_entries) +
+            b"".join((1000 + 10 * i).to_bytes(entry_size, 'big') for i in range(nr_entries)))
+    traf = uint32_to_str(8 + len(tfdt) + len(saio)) + b'traf' + tfdt + saio
+    return uint32_to_str(8 + len(traf)) + b'moof' + traf
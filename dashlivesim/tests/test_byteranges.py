@@ -0,0 +1,169 @@
+# The copyright in this software is being made available under the BSD License,
+# included below. This software may be subject to other third party and contributor
+# rights, including patent rights, and no such rights are granted under this license.
+#
+# Copyright (c) 2026, Dash Industry Forum.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#  * Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation and/or
+#  other materials provided with the distribution.
+#  * Neither the name of Dash Industry Forum nor the names of its
+#  contributors may be used to endorse or promote products derived from this software
+#  without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS AS IS AND ANY
+#  EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+#  WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+#  INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+#  WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+import time
+import unittest
+from unittest import mock
+from wsgiref.util import FileWrapper
+
+from dashlivesim.tests.dash_test_util import VOD_CONFIG_DIR, CONTENT_ROOT, wsgi_request
+from dashlivesim.dashlib import dash_proxy
+from dashlivesim.dashlib.chunkscheduler import SCHEDULER
+from dashlivesim.dashlib.clock import CLOCK_ENVIRON_KEY, VirtualClock
+from dashlivesim.dashlib.dash_proxy import SegmentPayload
+from dashlivesim.mod_wsgi.mod_dashlivesim import application, parse_byte_ranges, MULTIPART_BOUNDARY, \
+    MAX_BYTE_RANGES
+
+SEGMENT_PATH = "/livesim/ato_inf/testpic/V1/0.m4s"
+
+
+def get_segment(url_parts, now, passthrough):
+    dp = dash_proxy.DashProvider("streamtest.eu", url_parts, None, VOD_CONFIG_DIR, CONTENT_ROOT, now=now)
+    return dash_proxy.get_media(dp, passthrough=passthrough)
+
+
+class TestSegmentPayload(unittest.TestCase):
+
+    def testPassthroughSameAsFullFilter(self):
+        for url in ("livesim/testpic/V1/1.m4s", "livesim/sidx_1/testpic/A1/9.m4s"):
+            url_parts = url.split("/")
+            full = get_segment(url_parts, 100, False)
+            payload = get_segment(url_parts, 100, True)
+            self.assertIsInstance(payload, SegmentPayload)
+            self.assertEqual(len(payload), len(full))
+            self.assertEqual(bytes(payload), full)
+            self.assertEqual(payload[100:len(full) - 100], full[100:-100])
+            self.assertEqual(payload[-10:], full[-10:])
+
+
+class TestPayloadStreaming(unittest.TestCase):
+
+    def testGetUsesFileWrapper(self):
+        wrapped = []
+
+        def file_wrapper(filelike, block_size):
+            wrapped.append(filelike)
+            return FileWrapper(filelike, block_size)
+
+        status, headers, body = wsgi_request(application, SEGMENT_PATH, {'wsgi.file_wrapper': file_wrapper})
+        self.assertEqual(status, "200 OK")
+        self.assertEqual(len(wrapped), 1)
+        self.assertTrue(wrapped[0].closed)
+        full = get_segment(SEGMENT_PATH[1:].split("/"), time.time(), False)
+        self.assertEqual(body, full)
+        self.assertEqual(int(headers['Content-Length']), len(full))
+
+
+class TestRangeParsing(unittest.TestCase):
+
+    def testRanges(self):
+        self.assertEqual(parse_byte_ranges("bytes=0-99", 1000), [(0, 99)])
+        self.assertEqual(parse_byte_ranges("bytes=900-", 1000), [(900, 999)])
+        self.assertEqual(parse_byte_ranges("bytes=-2000", 1000), [(0, 999)])
+        self.assertEqual(parse_byte_ranges("bytes=0-0, 990-1200", 1000), [(0, 0), (990, 999)])
+
+    def testOverlappingRangesAreMerged(self):
+        self.assertEqual(parse_byte_ranges("bytes=0-,0-,0-", 1000), [(0, 999)])
+        self.assertEqual(parse_byte_ranges("bytes=500-599,0-99,50-149,150-199", 1000), [(0, 199), (500, 599)])
+
+    def testTooManyRanges(self):
+        range_set = ",".join("%d-%d" % (2 * i, 2 * i) for i in range(MAX_BYTE_RANGES))
+        self.assertEqual(len(parse_byte_ranges("bytes=" + range_set, 1000)), MAX_BYTE_RANGES)
+        self.assertIsNone(parse_byte_ranges("bytes=%s,900-" % range_set, 1000))
+
+    def testBadRanges(self):
+        self.assertIsNone(parse_byte_ranges("bytes=1000-", 1000))
+        self.assertIsNone(parse_byte_ranges("bytes=5-2", 1000))
+        self.assertIsNone(parse_byte_ranges("bytes=a-b", 1000))
+        self.assertIsNone(parse_byte_ranges("items=0-1", 1000))
+
+
+class TestHeadAndRangeRequests(unittest.TestCase):
+
+    def setUp(self):
+        _, _, self.full = wsgi_request(application, SEGMENT_PATH)
+
+    def testHead(self):
+        status, headers, body = wsgi_request(application, SEGMENT_PATH, {'REQUEST_METHOD': 'HEAD'})
+        self.assertEqual(status, "200 OK")
+        self.assertEqual(body, b"")
+        self.assertEqual(int(headers['Content-Length']), len(self.full))
+
+    def testSingleRange(self):
+        status, headers, body = wsgi_request(application, SEGMENT_PATH, {'HTTP_RANGE': 'bytes=-1024'})
+        self.assertEqual(status, "206 Partial Content")
+        self.assertEqual(body, self.full[-1024:])
+        self.assertEqual(headers['Content-Range'], "bytes %d-%d/%d" % (len(self.full) - 1024, len(self.full) - 1,
+                                                                       len(self.full)))
+
+    def testMultipleRanges(self):
+        status, headers, body = wsgi_request(application, SEGMENT_PATH, {'HTTP_RANGE': 'bytes=0-7,2000-2999'})
+        self.assertEqual(status, "206 Partial Content")
+        self.assertEqual(headers['Content-Type'], "multipart/byteranges; boundary=%s" % MULTIPART_BOUNDARY)
+        self.assertEqual(int(headers['Content-Length']), len(body))
+        parts = body.split(b"\r\n--" + MULTIPART_BOUNDARY.encode('utf-8'))
+        self.assertEqual(parts[-1], b"--\r\n")
+        first_headers, first_data = parts[1].split(b"\r\n\r\n", 1)
+        self.assertIn(b"Content-Range: bytes 0-7/%d" % len(self.full), first_headers)
+        self.assertEqual(first_data, self.full[0:8])
+        self.assertEqual(parts[2].split(b"\r\n\r\n", 1)[1], self.full[2000:3000])
+
+    def testRepeatedRangesSentOnce(self):
+        status, headers, body = wsgi_request(application, SEGMENT_PATH, {'HTTP_RANGE': 'bytes=' + ",".join(["0-"] * 8)})
+        self.assertEqual(status, "206 Partial Content")
+        self.assertEqual(body, self.full)
+        self.assertEqual(headers['Content-Range'], "bytes 0-%d/%d" % (len(self.full) - 1, len(self.full)))
+
+    def testHeadAndRangeFromCachedPayload(self):
+        timing = {'CACHE_POLICY': 'timing'}
+        _, get_headers, _ = wsgi_request(application, SEGMENT_PATH, timing)
+        with mock.patch.object(dash_proxy, 'filter_media_segment', side_effect=AssertionError("filtered")), \
+                mock.patch.object(dash_proxy, 'MediaSegmentFilter', side_effect=AssertionError("filtered")):
+            status, headers, _ = wsgi_request(application, SEGMENT_PATH, dict(timing, REQUEST_METHOD='HEAD'))
+            self.assertEqual(status, "200 OK")
+            self.assertEqual(int(headers['Content-Length']), len(self.full))
+            self.assertEqual(headers['ETag'], get_headers['ETag'])
+            status, _, body = wsgi_request(application, SEGMENT_PATH, {'HTTP_RANGE': 'bytes=-1024'})
+            self.assertEqual(status, "206 Partial Content")
+            self.assertEqual(body, self.full[-1024:])
+
+    def testChunkedHeadStartsNoProducer(self):
+        SCHEDULER.clear()
+        environ = {'REQUEST_METHOD': 'HEAD', CLOCK_ENVIRON_KEY: VirtualClock(3607, speed=0)}
+        with mock.patch.object(dash_proxy, 'filter_media_segment', side_effect=AssertionError("filtered")):
+            status, headers, body = wsgi_request(application, "/livesim/chunkdur_1/testpic/V1/600.m4s", environ)
+        self.assertEqual(status, "200 OK")
+        self.assertNotIn('Content-Length', headers)
+        self.assertEqual(body, b"")
+        self.assertEqual(len(SCHEDULER), 0)
+
+    def testUnsatisfiableRangeIgnored(self):
+        status, _, body = wsgi_request(application, SEGMENT_PATH, {'HTTP_RANGE': 'bytes=%d-' % 10**7})
+        self.assertEqual(status, "200 OK")
+        self.assertEqual(body, self.full)
@@ -0,0 +1,130 @@
+# The copyright in this software is being made available under the BSD License,
+# included below. This software may be subject to other third party and contributor
+# rights, including patent rights, and no such rights are granted under this license.
+#
+# Copyright (c) 2026, Dash Industry Forum.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#  * Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation and/or
+#  other materials provided with the distribution.
+#  * Neither the name of Dash Industry Forum nor the names of its
+#  contributors may be used to endorse or promote products derived from this software
+#  without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS AS IS AND ANY
+#  EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+#  WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+#  INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+#  WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+
+from dashlivesim.tests.dash_test_util import VOD_CONFIG_DIR, CONTENT_ROOT, wsgi_request
+from dashlivesim.dashlib import dash_proxy
+from dashlivesim.dashlib import cachepolicy
+from dashlivesim.dashlib.clock import CLOCK_ENVIRON_KEY, VirtualClock
+from dashlivesim.dashlib.cachepolicy import CachePolicy, CachePolicyError, MPD, INIT, MEDIA
+from dashlivesim.mod_wsgi.mod_dashlivesim import application
+
+TIMING_ENV = {'CACHE_POLICY': 'timing'}
+
+
+def make_provider(url_parts, now):
+    return dash_proxy.DashProvider("streamtest.eu", url_parts, None, VOD_CONFIG_DIR, CONTENT_ROOT, now=now)
+
+
+class TestCachePolicy(unittest.TestCase):
+
+    def testNoCacheIsDefault(self):
+        policy = CachePolicy.from_environ({})
+        dp = make_provider(['livesim', 'testpic', 'Manifest.mpd'], 100)
+        headers = policy.headers(MPD, dp, 100, b"mpd")
+        self.assertEqual(headers['Cache-Control'], 'no-cache')
+        self.assertEqual(headers['Pragma'], 'no-cache')
+        self.assertNotIn('ETag', headers)
+
+    def testBadMode(self):
+        self.assertRaises(CachePolicyError, CachePolicy, "always")
+
+    def testMpdValidUntilNextSegmentBoundary(self):
+        policy = CachePolicy(cachepolicy.TIMING)
+        dp = make_provider(['livesim', 'segtimeline_1', 'testpic', 'Manifest.mpd'], 100)
+        self.assertEqual(policy.max_age(MPD, dp, 100), 2)
+
+    def testMpdValidUntilNextUpdate(self):
+        policy = CachePolicy(cachepolicy.TIMING)
+        dp = make_provider(['livesim', 'mup_30', 'testpic', 'Manifest.mpd'], 100)
+        self.assertEqual(policy.max_age(MPD, dp, 100), 20)
+
+    def testMpdWithDirectTimingNotCached(self):
+        policy = CachePolicy(cachepolicy.TIMING)
+        dp = make_provider(['livesim', 'utc_direct', 'testpic', 'Manifest.mpd'], 100)
+        self.assertIsNone(policy.max_age(MPD, dp, 100))
+
+    def testSegmentValidWhileInTimeshiftBuffer(self):
+        policy = CachePolicy(cachepolicy.TIMING)
+        dp = make_provider(['livesim', 'testpic', 'V1', '0.m4s'], 100)
+        dash_proxy.get_media(dp)
+        # Segment 0 is available at 6s and leaves the 300s time-shift buffer at 312s
+        self.assertEqual(policy.max_age(MEDIA, dp, 100), 212)
+
+    def testInitMaxAge(self):
+        policy = CachePolicy.from_environ({'CACHE_POLICY': 'timing', 'CACHE_INIT_MAX_AGE': '600'})
+        dp = make_provider(['livesim', 'testpic', 'V1', 'init.mp4'], 100)
+        headers = policy.headers(INIT, dp, 100, b"init")
+        self.assertEqual(headers['Cache-Control'], 'public, max-age=600')
+        self.assertEqual(headers['ETag'], cachepolicy.make_etag(b"init"))
+
+    def testEtagMatches(self):
+        etag = cachepolicy.make_etag(b"data")
+        self.assertTrue(cachepolicy.etag_matches('"abc", %s' % etag, etag))
+        self.assertTrue(cachepolicy.etag_matches('W/%s' % etag, etag))
+        self.assertTrue(cachepolicy.etag_matches('*', etag))
+        self.assertFalse(cachepolicy.etag_matches('"abc"', etag))
+
+
+class TestConditionalGet(unittest.TestCase):
+
+    def testDefaultIsNoCache(self):
+        status, headers, _ = wsgi_request(application, '/livesim/testpic/Manifest.mpd')
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(headers['Cache-Control'], 'no-cache')
+
+    def testNotModified(self):
+        path = '/livesim/ato_inf/testpic/V1/0.m4s'
+        status, headers, body = wsgi_request(application, path, TIMING_ENV)
+        self.assertEqual(status, '200 OK')
+        self.assertTrue(headers['Cache-Control'].startswith('public, max-age='))
+        env = dict(TIMING_ENV, HTTP_IF_NONE_MATCH=headers['ETag'])
+        status, headers, body = wsgi_request(application, path, env)
+        self.assertEqual(status, '304 Not Modified')
+        self.assertEqual(body, b"")
+
+    def testMpdNotModified(self):
+        path = '/livesim/testpic/Manifest.mpd'
+        now = 1700000000
+        _, headers, body = wsgi_request(application, path, dict(TIMING_ENV, **{CLOCK_ENVIRON_KEY: VirtualClock(now)}))
+        env = dict(TIMING_ENV, HTTP_IF_NONE_MATCH=headers['ETag'], **{CLOCK_ENVIRON_KEY: VirtualClock(now + 1)})
+        status, _, new_body = wsgi_request(application, path, env)
+        self.assertEqual(status, '304 Not Modified')
+        self.assertEqual(new_body, b"")
+        del env['HTTP_IF_NONE_MATCH']
+        _, new_headers, new_body = wsgi_request(application, path, env)
+        self.assertNotEqual(new_body, body)  # Only publishTime differs
+        self.assertEqual(new_headers['ETag'], headers['ETag'])
+
+    def testErrorsNotCached(self):
+        status, headers, _ = wsgi_request(application, '/livesim/testpic/V1/100000000.m4s', TIMING_ENV)
+        self.assertEqual(status, '404 Not Found')
+        self.assertEqual(headers['Cache-Control'], 'no-cache')
+        self.assertNotIn('ETag', headers)
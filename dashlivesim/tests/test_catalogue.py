@@ -0,0 +1,172 @@
+# The copyright in this software is being made available under the BSD License,
+# included below. This software may be subject to other third party and contributor
+# rights, including patent rights, and no such rights are granted under this license.
+#
+# Copyright (c) 2026, Dash Industry Forum.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#  * Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation and/or
+#  other materials provided with the distribution.
+#  * Neither the name of Dash Industry Forum nor the names of its
+#  contributors may be used to endorse or promote products derived from this software
+#  without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS AS IS AND ANY
+#  EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+#  WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+#  INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+#  WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+
+import configparser
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from os.path import join
+
+from dashlivesim.dashlib import catalogue
+from dashlivesim.dashlib.storage import LocalStorage, StorageError
+from dashlivesim.mod_wsgi.mod_dashlivesim import application
+from dashlivesim.tests.dash_test_util import VOD_CONFIG_DIR, wsgi_request
+
+
+class UnlistedStorage(LocalStorage):
+    "A storage that cannot be listed, like an HTTP origin."
+
+    def listdir(self, rel_dir=""):
+        raise StorageError("Cannot list")
+
+
+class NoReadStorage(LocalStorage):
+    "A storage that fails the test if it is read."
+
+    def read(self, rel_path):
+        raise AssertionError("Read %s" % rel_path)
+
+
+class SlowStorage(LocalStorage):
+    "A storage that is listed once per build, and waits before reading."
+
+    def __init__(self, root):
+        LocalStorage.__init__(self, root)
+        self.nr_listings = 0
+        self.reading = threading.Event()
+        self.go_on = threading.Event()
+
+    def listdir(self, rel_dir=""):
+        self.nr_listings += 1
+        return LocalStorage.listdir(self, rel_dir)
+
+    def read(self, rel_path):
+        self.reading.set()
+        self.go_on.wait(5)
+        return LocalStorage.read(self, rel_path)
+
+
+class TestCatalogue(unittest.TestCase):
+
+    def setUp(self):
+        self.cfg_dir = tempfile.mkdtemp()
+        for name in ("testpic.cfg", "testpic_stpp.cfg"):
+            shutil.copy(join(VOD_CONFIG_DIR, name), self.cfg_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.cfg_dir)
+
+    def testContentInfo(self):
+        cat = catalogue.Catalogue(LocalStorage(self.cfg_dir))
+        content = cat.get("testpic")
+        self.assertEqual(cat.names(), ["testpic", "testpic_stpp"])
+        self.assertEqual(sorted(content.representations), ["A1", "V1"])
+        self.assertEqual(content.representations["V1"],
+                         catalogue.Representation("V1", "video", 90000, "V1/init.mp4"))
+        self.assertEqual((content.first_segment, content.last_segment), (1, 600))
+        self.assertFalse(content.has_thumbnails)
+        self.assertEqual(cat.get("testpic_stpp").representations["S1"].content_type, "subtitles")
+
+    def testUnknownContentIsNotRead(self):
+        cat = catalogue.Catalogue(LocalStorage(self.cfg_dir))
+        cat.build()
+        cat.storage = NoReadStorage(self.cfg_dir)
+        self.assertIsNone(cat.get("nonexisting"))
+        self.assertIsNotNone(cat.get("testpic"))
+
+    def testUnlistedStorage(self):
+        cat = catalogue.Catalogue(UnlistedStorage(self.cfg_dir))
+        self.assertIsNone(cat.get("nonexisting"))
+        self.assertEqual(len(cat), 0)  # Unknown contents are not remembered
+        self.assertEqual(cat.get("testpic").name, "testpic")
+        self.assertEqual(cat.names(), ["testpic"])
+
+    def testBadConfig(self):
+        with open(join(self.cfg_dir, "bad.cfg"), "w") as ofh:
+            ofh.write("[General]\nversion = 1.0\n")
+        cat = catalogue.Catalogue(LocalStorage(self.cfg_dir))
+        with self.assertRaises(configparser.NoSectionError):
+            cat.get("bad")
+        self.assertIsNotNone(cat.get("testpic"))
+
+    def testRebuiltAfterClear(self):
+        cat = catalogue.Catalogue(LocalStorage(self.cfg_dir))
+        cat.build()
+        self.assertEqual(len(cat), 2)
+        shutil.copy(join(VOD_CONFIG_DIR, "testpic_2s.cfg"), self.cfg_dir)
+        self.assertIsNone(cat.get("testpic_2s"))
+        os.remove(join(self.cfg_dir, "testpic.cfg"))
+        cat.clear()
+        self.assertIsNotNone(cat.get("testpic_2s"))
+        self.assertIsNone(cat.get("testpic"))
+
+    def testBuiltOnce(self):
+        storage = SlowStorage(self.cfg_dir)
+        cat = catalogue.Catalogue(storage)
+        threads = [threading.Thread(target=cat.get, args=("testpic",)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        storage.go_on.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(storage.nr_listings, 1)
+        self.assertEqual(len(cat), 2)
+
+    def testChangeDuringBuild(self):
+        storage = SlowStorage(self.cfg_dir)
+        cat = catalogue.Catalogue(storage)
+        builder = threading.Thread(target=cat.build)
+        builder.start()
+        storage.reading.wait(5)
+        shutil.copy(join(VOD_CONFIG_DIR, "testpic_2s.cfg"), self.cfg_dir)
+        cat.invalidate(join(self.cfg_dir, "testpic_2s.cfg"))
+        storage.go_on.set()
+        builder.join()
+        self.assertFalse(cat.built)  # The build from before the change is not kept
+        self.assertIsNotNone(cat.get("testpic_2s"))
+        self.assertEqual(storage.nr_listings, 2)
+
+    def testRegistry(self):
+        self.assertIs(catalogue.get_catalogue(self.cfg_dir), catalogue.get_catalogue(self.cfg_dir))
+        self.assertIsNot(catalogue.get_catalogue(self.cfg_dir), catalogue.get_catalogue(VOD_CONFIG_DIR))
+
+
+class TestResolution(unittest.TestCase):
+
+    def testBadRequestsFailEarly(self):
+        for path, message in [("/livesim/nonexisting/V1/1.m4s", b"Unknown content nonexisting"),
+                              ("/livesim/testpic/V9/1.m4s", b"No representation V9 in testpic"),
+                              ("/livesim/testpic/V1__X1/init.mp4", b"No representation X1 in testpic"),
+                              ("/livesim/testpic/A1/1.jpg", b"No .jpg in representation A1 of testpic")]:
+            status, _, body = wsgi_request(application, path, {'CONTENT_ROOT': "/nonexisting"})
+            self.assertEqual(status, "404 Not Found")
+            self.assertIn(message, body)
@@ -30,8 +30,9 @@
 import unittest
 from os.path import join
 
-from dashlivesim.tests.dash_test_util import CONTENT_ROOT
+from dashlivesim.tests.dash_test_util import CONTENT_ROOT, make_saio_moof
 from dashlivesim.dashlib import mediasegmentfilter
+from dashlivesim.dashlib.mp4 import mp4
 
 
 class TestSaioUpdate(unittest.TestCase):
@@ -54,3 +55,15 @@ class TestSaioUpdate(unittest.TestCase):
         self.f.filter()
         self.assertEqual(self.f.size_change, 4)
         self.assertEqual(self.f.new_saio_value, self.input_saio_offset + 4)
+
+    def testSaioTables(self):
+        "Test that all entries of 32- and 64-bit saio tables are shifted when the tfdt becomes 64-bit."
+        for version in (0, 1):
+            self.f = mediasegmentfilter.MediaSegmentFilter(None, offset=2**32, track_timescale=1)
+            self.f.data = make_saio_moof(3, version)
+            saio = mp4(self.f.filter()).find(b'moof.traf.saio')
+            self.assertEqual(self.f.size_change, 4)
+            self.assertEqual(self.f.new_saio_value, 1004)
+            entry_size = 4 if version == 0 else 8
+            self.assertEqual(saio.fmap[saio.offset + 16:saio.offset + saio.size],
+                             b''.join((1004 + 10 * i).to_bytes(entry_size, 'big') for i in range(3)))
@@ -0,0 +1,185 @@
+# The copyright in this software is being made available under the BSD License,
+# included below. This software may be subject to other third party and contributor
+# rights, including patent rights, and no such rights are granted under this license.
+#
+# Copyright (c) 2026, Dash Industry Forum.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#  * Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation and/or
+#  other materials provided with the distribution.
+#  * Neither the name of Dash Industry Forum nor the names of its
+#  contributors may be used to endorse or promote products derived from this software
+#  without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS AS IS AND ANY
+#  EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+#  WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+#  INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+#  WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+import threading
+import unittest
+from time import time, monotonic
+
+from dashlivesim.tests.dash_test_util import VOD_CONFIG_DIR, CONTENT_ROOT
+from dashlivesim.dashlib import dash_proxy
+from dashlivesim.dashlib.chunkscheduler import SCHEDULER
+from dashlivesim.dashlib.clock import VirtualClock
+from dashlivesim.dashlib.chunkscheduler import ChunkProducer, ChunkProducerError, ChunkScheduler
+
+
+class TestChunkProducer(unittest.TestCase):
+
+    def testAllChunksAvailable(self):
+        "Segment produced long ago, so all chunks should be released directly."
+        now = time()
+        producer = ChunkProducer("key", [b"a", b"b", b"c"], now - 100, 1.0, now)
+        self.assertEqual(list(producer.subscribe()), [b"a", b"b", b"c"])
+
+    def testLateJoinerGetsReleasedPrefix(self):
+        now = time()
+        producer = ChunkProducer("key", [b"a", b"b", b"c"], now, 0.2, now)
+        start = monotonic()
+        first = producer.subscribe()
+        self.assertEqual(next(first), b"a")
+        self.assertEqual(next(first), b"b")
+        late = producer.subscribe()
+        self.assertEqual(next(late), b"a")
+        self.assertEqual(next(late), b"b")
+        self.assertLess(monotonic() - start, 0.45)
+        self.assertEqual(next(late), b"c")
+        self.assertGreaterEqual(monotonic() - start, 0.45)
+        self.assertEqual(list(first), [b"c"])
+
+    def testFanOutToManySubscribers(self):
+        now = time()
+        producer = ChunkProducer("key", [b"a", b"b", b"c"], now, 0.1, now)
+        results = []
+
+        def consume():
+            results.append(list(producer.subscribe()))
+
+        threads = [threading.Thread(target=consume) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [[b"a", b"b", b"c"]] * 8)
+        self.assertLessEqual(producer.deadline(2), monotonic())
+
+    def testErrorIsRaisedInAllSubscribers(self):
+        def chunks():
+            yield b"a"
+            raise IOError("Segment removed")
+
+        now = time()
+        producer = ChunkProducer("key", chunks(), now - 100, 1.0, now)
+        for _ in range(2):
+            subscription = producer.subscribe()
+            self.assertEqual(next(subscription), b"a")
+            with self.assertRaises(ChunkProducerError) as context:
+                next(subscription)
+            self.assertIsInstance(context.exception.__cause__, IOError)
+
+
+class TestChunkScheduler(unittest.TestCase):
+
+    def testChunksMadeOnlyOnce(self):
+        scheduler = ChunkScheduler()
+        calls = []
+
+        def make_chunks():
+            calls.append(1)
+            return [b"x"]
+
+        now = time()
+        producer1 = scheduler.get_producer("key", make_chunks, now - 10, 1.0, now)
+        producer2 = scheduler.get_producer("key", make_chunks, now - 10, 1.0, now)
+        self.assertIs(producer1, producer2)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(scheduler), 1)
+
+    def testOtherSegmentsDoNotWaitForSlowProducer(self):
+        scheduler = ChunkScheduler()
+        release = threading.Event()
+        now = time()
+        results = {}
+
+        def make_slow_chunks():
+            release.wait(5)
+            return [b"slow"]
+
+        def get(name, key, make_chunks):
+            results[name] = scheduler.get_producer(key, make_chunks, now - 10, 1.0, now)
+
+        maker = threading.Thread(target=get, args=("maker", "slow", make_slow_chunks))
+        maker.start()
+        while not scheduler._pending:
+            release.wait(0.01)
+        waiter = threading.Thread(target=get, args=("waiter", "slow", lambda: [b"again"]))
+        waiter.start()
+        get("other", "fast", lambda: [b"fast"])
+        self.assertEqual(list(results["other"].subscribe()), [b"fast"])
+        self.assertFalse(release.is_set())
+        release.set()
+        maker.join()
+        waiter.join()
+        self.assertIs(results["waiter"], results["maker"])
+        self.assertEqual(list(results["waiter"].subscribe()), [b"slow"])
+
+    def testFailedProducerIsNotKept(self):
+        scheduler = ChunkScheduler()
+        now = time()
+
+        def make_chunks():
+            raise IOError("No segment")
+
+        with self.assertRaises(IOError):
+            scheduler.get_producer("key", make_chunks, now - 10, 1.0, now)
+        producer = scheduler.get_producer("key", lambda: [b"x"], now - 10, 1.0, now)
+        self.assertEqual(list(producer.subscribe()), [b"x"])
+
+    def testExpiredProducersAreDropped(self):
+        scheduler = ChunkScheduler()
+        now = time()
+        scheduler.get_producer("old", lambda: [b"x"], now - 1000, 1.0, now)
+        for producer in list(scheduler._producers.values()):
+            producer._first_deadline = monotonic() - 1000
+        scheduler.get_producer("new", lambda: [b"y"], now, 1.0, now)
+        self.assertEqual(len(scheduler), 1)
+
+
+class TestChunkedMediaSegment(unittest.TestCase):
+
+    def testSameChunksForAllConnections(self):
+        urlParts = ['livesim', 'chunkdur_1', 'testpic', 'V1', '0.m4s']
+        segs = []
+        for _ in range(2):
+            dp = dash_proxy.DashProvider("streamtest.eu", urlParts, None, VOD_CONFIG_DIR, CONTENT_ROOT, now=100)
+            segs.append(dash_proxy.get_media(dp, chunk=True))
+        self.assertEqual(segs[0].seg_start, 0)
+        chunks0 = list(segs[0].chunks)
+        self.assertEqual(len(chunks0), 6)
+        self.assertEqual(chunks0, list(segs[1].chunks))
+
+    def testProducerPerClock(self):
+        urlParts = ['livesim', 'chunkdur_1', 'testpic', 'V1', '600.m4s']  # Just produced at 3607
+        SCHEDULER.clear()
+        clocks = [VirtualClock(3607, speed=0), VirtualClock(3607, speed=0)]
+        for clock in clocks + clocks:
+            dp = dash_proxy.DashProvider("streamtest.eu", urlParts, None, VOD_CONFIG_DIR, CONTENT_ROOT, clock=clock)
+            dash_proxy.get_media(dp, chunk=True)
+        self.assertEqual(len(SCHEDULER), 2)
+        self.assertEqual(sorted(producer.clock is clocks[0] for producer in SCHEDULER._producers.values()),
+                         [False, True])
+        SCHEDULER.clear()
@@ -0,0 +1,102 @@
+# The copyright in this software is being made available under the BSD License,
+# included below. This software may be subject to other third party and contributor
+# rights, including patent rights, and no such rights are granted under this license.
+#
+# Copyright (c) 2026, Dash Industry Forum.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#  * Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation and/or
+#  other materials provided with the distribution.
+#  * Neither the name of Dash Industry Forum nor the names of its
+#  contributors may be used to endorse or promote products derived from this software
+#  without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS AS IS AND ANY
+#  EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+#  WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+#  INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+#  WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+from time import monotonic
+
+from dashlivesim.dashlib import clock, dash_proxy
+from dashlivesim.dashlib.chunkscheduler import ChunkProducer
+from dashlivesim.dashlib.clock import VirtualClock, get_clock, CLOCK_ENVIRON_KEY
+from dashlivesim.mod_wsgi.mod_dashlivesim import application
+from dashlivesim.tests.dash_test_util import wsgi_request, VOD_CONFIG_DIR, CONTENT_ROOT
+
+NOW = 1356998460
+
+
+class TestVirtualClock(unittest.TestCase):
+
+    def testStoppedClock(self):
+        vclock = VirtualClock(NOW, speed=0)
+        self.assertEqual(vclock.time(), NOW)
+        vclock.sleep(2.5)
+        self.assertEqual(vclock.time(), NOW + 2.5)
+        self.assertEqual(vclock.monotonic(), 2.5)
+
+    def testJumps(self):
+        vclock = VirtualClock(NOW, speed=0)
+        vclock.jump(NOW + 3600)
+        self.assertEqual(vclock.time(), NOW + 3600)
+        self.assertEqual(vclock.monotonic(), 3600)
+        vclock.jump(NOW)
+        self.assertEqual(vclock.time(), NOW)
+        self.assertEqual(vclock.monotonic(), 3600)
+
+    def testAccelerated(self):
+        vclock = VirtualClock(NOW, speed=1000)
+        start = monotonic()
+        vclock.sleep(50)
+        self.assertLess(monotonic() - start, 1)
+        self.assertGreaterEqual(vclock.time(), NOW + 50)
+
+    def testConfiguredFromEnvironment(self):
+        environ = {clock.CLOCK_START_ENV: "2013-01-01T00:01:00Z", clock.CLOCK_SPEED_ENV: "0"}
+        vclock = get_clock(environ)
+        self.assertEqual(vclock.time(), NOW)
+        self.assertIs(get_clock(dict(environ)), vclock)
+        self.assertIs(get_clock({}), clock.SYSTEM_CLOCK)
+        with self.assertRaises(clock.ClockError):
+            get_clock({clock.CLOCK_SPEED_ENV: "fast"})
+
+
+class TestClockInjection(unittest.TestCase):
+
+    def testChunkPacingWithAcceleratedClock(self):
+        vclock = VirtualClock(NOW, speed=100)
+        producer = ChunkProducer("key", [b"a", b"b", b"c"], NOW, 1.0, NOW, vclock)
+        start = monotonic()
+        self.assertEqual(list(producer.subscribe()), [b"a", b"b", b"c"])
+        self.assertLess(monotonic() - start, 1)
+        self.assertGreaterEqual(vclock.time(), NOW + 2.9)
+
+    def testProviderTakesTimeFromClock(self):
+        url_parts = ['livesim', 'testpic', 'Manifest.mpd']
+        provider = dash_proxy.DashProvider("streamtest.eu", url_parts, None, VOD_CONFIG_DIR, CONTENT_ROOT,
+                                           clock=VirtualClock(NOW, speed=0))
+        self.assertEqual(provider.now, NOW)
+
+    def testChunkedRequestOnStoppedClock(self):
+        "A chunked segment is served at virtual time, and the Date header has the virtual time."
+        seg_nr = (NOW - 60) // 6  # Maps to 1.m4s
+        vclock = VirtualClock(seg_nr * 6 + 7, speed=0)  # Just after availability
+        status, headers, body = wsgi_request(application, "/livesim/chunkdur_1/testpic/V1/%d.m4s" % seg_nr,
+                                             {CLOCK_ENVIRON_KEY: vclock})
+        self.assertEqual(status, "200 OK")
+        self.assertEqual(body.count(b'moof'), 6)
+        self.assertEqual(headers['Date'], "Tue, 01 Jan 2013 00:00:07 GMT")
+        self.assertEqual(vclock.time(), seg_nr * 6 + 7)
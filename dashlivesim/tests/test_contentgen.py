@@ -0,0 +1,89 @@
+# The copyright in this software is being made available under the BSD License,
+# included below. This software may be subject to other third party and contributor
+# rights, including patent rights, and no such rights are granted under this license.
+#
+# Copyright (c) 2026, Dash Industry Forum.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#  * Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation and/or
+#  other materials provided with the distribution.
+#  * Neither the name of Dash Industry Forum nor the names of its
+#  contributors may be used to endorse or promote products derived from this software
+#  without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS AS IS AND ANY
+#  EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+#  WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+#  INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+#  WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+import tempfile
+import unittest
+from os.path import join
+
+from dashlivesim.benchmark import contentgen
+from dashlivesim.dashlib.clock import CLOCK_ENVIRON_KEY, VirtualClock
+from dashlivesim.dashlib.mp4 import mp4
+from dashlivesim.mod_wsgi import mod_dashlivesim
+from dashlivesim.tests.dash_test_util import wsgi_request
+
+NOW = 1356998460
+
+
+class TestContentGenerator(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.environ = {'CONTENT_ROOT': join(self.tmp_dir.name, "content"),
+                        'VOD_CONF_DIR': join(self.tmp_dir.name, "vod_cfg")}
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def generate(self, **kwargs):
+        generator = contentgen.ContentGenerator("synth", self.environ['CONTENT_ROOT'], self.environ['VOD_CONF_DIR'],
+                                                ["320x180:200"], fps=10, nr_segments=3, **kwargs)
+        generator.generate()
+        return generator
+
+    def read(self, *path):
+        with open(join(self.environ['CONTENT_ROOT'], "synth", *path), "rb") as ifh:
+            return ifh.read()
+
+    def testSegTimeEntries(self):
+        entries = contentgen.seg_time_entries([96256, 96256, 95232, 96256], 1)
+        self.assertEqual(entries, [(1, 1, 0, 96256), (3, 0, 192512, 95232), (4, 0, 287744, 96256)])
+
+    def testVideoSegments(self):
+        generator = self.generate()
+        trun = mp4(self.read("V1", "2.m4s")).find(b'moof.traf.trun')
+        self.assertEqual(trun.sample_count, 20)
+        self.assertEqual(trun.total_duration, 2 * generator.video_timescale)
+        self.assertIsNotNone(mp4(self.read("V1", "init.mp4")).find(b'moov.trak.mdia.minf.stbl.stsd.avc1'))
+
+    def testCencBoxes(self):
+        self.generate(cenc=True)
+        init = mp4(self.read("V1", "init.mp4"))
+        tenc = init.find(b'moov.trak.mdia.minf.stbl.stsd.encv.sinf.schi.tenc')
+        self.assertEqual(tenc.key_id, contentgen.DEFAULT_KID)
+        self.assertTrue(mp4(self.read("A1", "init.mp4")).find(b'moov.trak.mdia.minf.stbl.stsd.enca'))
+        self.assertTrue(mp4(self.read("V1", "1.m4s")).find(b'moof.traf.senc'))
+
+    def testServedLive(self):
+        self.generate()
+        seg_nr = (NOW - 10) // 2
+        self.environ[CLOCK_ENVIRON_KEY] = VirtualClock(NOW, speed=0)
+        for path in ("/livesim/segtimeline_1/synth/Manifest.mpd", "/livesim/synth/V1/%d.m4s" % seg_nr,
+                     "/livesim/synth/A1/%d.m4s" % seg_nr, "/livesim/synth/V1__A1/%d.m4s" % seg_nr):
+            status, _, _ = wsgi_request(mod_dashlivesim.application, path, self.environ)
+            self.assertEqual(status, "200 OK", path)
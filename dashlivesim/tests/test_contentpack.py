@@ -0,0 +1,156 @@
+# The copyright in this software is being made available under the BSD License,
+# included below. This software may be subject to other third party and contributor
+# rights, including patent rights, and no such rights are granted under this license.
+#
+# Copyright (c) 2026, Dash Industry Forum.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#  * Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation and/or
+#  other materials provided with the distribution.
+#  * Neither the name of Dash Industry Forum nor the names of its
+#  contributors may be used to endorse or promote products derived from this software
+#  without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS AS IS AND ANY
+#  EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+#  WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+#  INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+#  WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+
+import os
+import shutil
+import tempfile
+import unittest
+from os.path import join
+
+from dashlivesim.benchmark.wsgibench import NOW, SEG_NR, STPP_NOW, STPP_SEG_NR, THUMB_CONTENT, \
+    make_thumbnail_content
+from dashlivesim.dashlib import contentpack
+from dashlivesim.dashlib.clock import CLOCK_ENVIRON_KEY, VirtualClock
+from dashlivesim.dashlib.dash_proxy import PayloadFile
+from dashlivesim.mod_wsgi.mod_dashlivesim import application
+from dashlivesim.dashlib.structops import uint32_to_str
+from dashlivesim.tests.dash_test_util import CONTENT_ROOT, wsgi_request
+from dashlivesim.vodanalyzer.dashanalyzer import DashAnalyzerError, read_segment_timing
+
+PATHS = [("/livesim/testpic/V1/init.mp4", NOW),
+         ("/livesim/testpic/V1__A1/init.mp4", NOW),
+         ("/livesim/testpic/V1/%d.m4s" % SEG_NR, NOW),
+         ("/livesim/testpic/A1/%d.m4s" % SEG_NR, NOW),
+         ("/livesim/testpic/V1__A1/%d.m4s" % SEG_NR, NOW),
+         ("/livesim/chunkdur_1/testpic/V1/%d.m4s" % SEG_NR, NOW),
+         ("/livesim/testpic_stpp/S1/%d.m4s" % STPP_SEG_NR, STPP_NOW)]
+
+
+def remove_packed_files(content_dir):
+    "Remove the files that are in the pack, so that they can only be served from it."
+    for rel_path in contentpack.find_files(content_dir):
+        os.remove(join(content_dir, rel_path))
+
+
+class TestContentPack(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.content_root = join(self.tmp_dir, "content")
+        for content in ("testpic", "testpic_stpp"):
+            shutil.copytree(join(CONTENT_ROOT, content), join(self.content_root, content))
+        contentpack.PACKS.clear()
+
+    def tearDown(self):
+        contentpack.PACKS.clear()
+        shutil.rmtree(self.tmp_dir)
+
+    def request(self, path, now, content_root, extra_environ=None):
+        environ = {'CONTENT_ROOT': content_root, CLOCK_ENVIRON_KEY: VirtualClock(now, speed=0)}
+        environ.update(extra_environ or {})
+        return wsgi_request(application, path, environ)
+
+    def testIndex(self):
+        content_dir = join(self.content_root, "testpic")
+        pack_path, nr_files = contentpack.write_pack(content_dir)
+        self.assertEqual(pack_path, content_dir + ".pack")
+        pack = contentpack.ContentPack(pack_path)
+        self.assertEqual(len(pack), nr_files)
+        self.assertIn("V1/init.mp4", pack)
+        entry = pack.get("V1/2.m4s")
+        with open(join(content_dir, "V1/2.m4s"), 'rb') as ifh:
+            data = ifh.read()
+        self.assertEqual(bytes(pack.read(entry)), data)
+        self.assertEqual((entry.tfdt, entry.duration), read_segment_timing(join(content_dir, "V1/2.m4s"), None))
+        self.assertEqual(data[entry.mdat_payload_pos - 4:entry.mdat_payload_pos], b'mdat')
+        self.assertIsNone(pack.get("V1/nonexisting.m4s"))
+
+    def testSegmentWithoutTrun(self):
+        mfhd = uint32_to_str(16) + b'mfhd' + b'\x00' * 4 + uint32_to_str(1)
+        tfhd = uint32_to_str(16) + b'tfhd' + b'\x00' * 4 + uint32_to_str(1)
+        tfdt = uint32_to_str(16) + b'tfdt' + b'\x00' * 4 + uint32_to_str(90000)
+        traf = uint32_to_str(8 + len(tfhd) + len(tfdt)) + b'traf' + tfhd + tfdt
+        data = uint32_to_str(8 + len(mfhd) + len(traf)) + b'moof' + mfhd + traf + uint32_to_str(12) + b'mdat' + b'data'
+        with self.assertRaises(contentpack.SegmentInfoError):
+            contentpack.segment_info(data)
+        segment_path = join(self.tmp_dir, "1.m4s")
+        with open(segment_path, 'wb') as ofh:
+            ofh.write(data)
+        with self.assertRaises(DashAnalyzerError):
+            read_segment_timing(segment_path, None)
+
+    def testNotAPack(self):
+        bad_path = join(self.tmp_dir, "bad.pack")
+        with open(bad_path, 'wb') as ofh:
+            ofh.write(b"\x00" * 64)
+        with self.assertRaises(contentpack.ContentPackError):
+            contentpack.ContentPack(bad_path)
+
+    def testResponsesFromPack(self):
+        expected = [self.request(path, now, CONTENT_ROOT) for path, now in PATHS]
+        for content in ("testpic", "testpic_stpp"):
+            contentpack.write_pack(join(self.content_root, content))
+            remove_packed_files(join(self.content_root, content))
+        for (path, now), (status, headers, body) in zip(PATHS, expected):
+            self.assertEqual(status, "200 OK", path)
+            self.assertEqual(self.request(path, now, self.content_root), (status, headers, body), path)
+        self.assertEqual(len(contentpack.PACKS), 2)
+
+    def testRangeFromPack(self):
+        path, now = PATHS[2]
+        _, _, full = self.request(path, now, CONTENT_ROOT)
+        contentpack.write_pack(join(self.content_root, "testpic"))
+        remove_packed_files(join(self.content_root, "testpic"))
+        status, _, body = self.request(path, now, self.content_root, {'HTTP_RANGE': 'bytes=-1024'})
+        self.assertEqual(status, "206 Partial Content")
+        self.assertEqual(body, full[-1024:])
+
+    def testThumbnailFromPack(self):
+        content_root, vod_conf_dir = make_thumbnail_content(self.tmp_dir)
+        path = "/livesim/%s/thumbs/%d.jpg" % (THUMB_CONTENT, SEG_NR)
+        extra_environ = {'VOD_CONF_DIR': vod_conf_dir}
+        expected = self.request(path, NOW, content_root, extra_environ)
+        contentpack.write_pack(join(content_root, THUMB_CONTENT))
+        remove_packed_files(join(content_root, THUMB_CONTENT))
+        contentpack.PACKS.clear()  # The content was remembered as not packed
+        self.assertEqual(expected[0], "200 OK")
+        self.assertEqual(self.request(path, NOW, content_root, extra_environ), expected)
+
+    def testPayloadFileIsBounded(self):
+        file_path = join(self.tmp_dir, "payload")
+        with open(file_path, 'wb') as ofh:
+            ofh.write(b"0123456789")
+        payload = PayloadFile(file_path, 2, 5)
+        self.assertEqual(payload.tell(), 2)
+        self.assertEqual(payload.read(3), b"234")
+        self.assertEqual(payload.read(), b"56")
+        self.assertEqual(payload.read(), b"")
+        payload.close()
+        self.assertTrue(payload.closed)
@@ -0,0 +1,190 @@
+# The copyright in this software is being made available under the BSD License,
+# included below. This software may be subject to other third party and contributor
+# rights, including patent rights, and no such rights are granted under this license.
+#
+# Copyright (c) 2026, Dash Industry Forum.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#  * Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation and/or
+#  other materials provided with the distribution.
+#  * Neither the name of Dash Industry Forum nor the names of its
+#  contributors may be used to endorse or promote products derived from this software
+#  without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS AS IS AND ANY
+#  EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+#  WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+#  INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+#  WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+
+import os
+import queue
+import shutil
+import tempfile
+import unittest
+from os.path import join
+from unittest import mock
+
+from dashlivesim.dashlib import caches, catalogue, contentpack, fswatch, metrics
+from dashlivesim.tests.dash_test_util import VOD_CONFIG_DIR
+
+
+class FakeCache(object):
+    "A cache without invalidate(), which is cleared on any change."
+
+    def __init__(self):
+        self.entries = {"a": b"1", "b": b"2"}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def nbytes(self):
+        return sum(len(value) for value in self.entries.values())
+
+    def clear(self):
+        self.entries = {}
+
+
+class TestInvalidation(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cfg_dir = join(self.tmp_dir, "vod_cfg")
+        os.mkdir(self.cfg_dir)
+        shutil.copy(join(VOD_CONFIG_DIR, "testpic.cfg"), self.cfg_dir)
+        metrics.REGISTRY.reset()
+
+    def tearDown(self):
+        caches.CACHES.pop("fake", None)
+        contentpack.PACKS.clear()
+        shutil.rmtree(self.tmp_dir)
+
+    def testChangedConfigRebuildsCatalogue(self):
+        cat = catalogue.get_catalogue(self.cfg_dir)
+        self.assertIsNone(cat.get("testpic_2s"))
+        watcher = fswatch.PollingWatcher([self.cfg_dir])
+        shutil.copy(join(VOD_CONFIG_DIR, "testpic_2s.cfg"), self.cfg_dir)
+        self.assertEqual(watcher.check(), [join(self.cfg_dir, "testpic_2s.cfg")])
+        self.assertIsNotNone(cat.get("testpic_2s"))
+        self.assertEqual(watcher.check(), [])
+        self.assertEqual(metrics.REGISTRY.counters[(metrics.FILE_CHANGES, (("watcher", "poll"),))], 1)
+        self.assertEqual(metrics.REGISTRY.counters[(metrics.CACHE_INVALIDATIONS, (("cache", "catalogue"),))], 1)
+
+    def testOtherFilesKeepCatalogue(self):
+        cat = catalogue.get_catalogue(self.cfg_dir)
+        cat.build()
+        self.assertEqual(cat.invalidate(join(self.tmp_dir, "testpic.cfg")), 0)
+        self.assertEqual(cat.invalidate(join(self.cfg_dir, "notes.txt")), 0)
+        self.assertEqual(len(cat), 1)
+
+    def testPackIsReopened(self):
+        pack_path = join(self.tmp_dir, "testpic.pack")
+        self.assertIsNone(contentpack.PACKS.get(pack_path))  # Remembered as not packed
+        self.assertEqual(caches.invalidate(pack_path), 1)
+        self.assertNotIn(pack_path, contentpack.PACKS.packs)
+
+    def testPacksInMovedDirectory(self):
+        pack_path = join(self.tmp_dir, "content", "testpic.pack")
+        contentpack.PACKS.get(pack_path)
+        self.assertEqual(caches.invalidate(join(self.tmp_dir, "cont")), 0)  # Only a common prefix
+        self.assertEqual(caches.invalidate(join(self.tmp_dir, "content")), 1)
+
+    def testCatalogueInMovedDirectory(self):
+        cat = catalogue.get_catalogue(self.cfg_dir)
+        cat.build()
+        self.assertEqual(cat.invalidate(self.tmp_dir), 1)
+        self.assertFalse(cat.built)
+
+    def testCacheWithoutInvalidateIsCleared(self):
+        fake = FakeCache()
+        caches.register_cache("fake", fake)
+        fswatch.file_changed(join(self.tmp_dir, "any.m4s"), "poll")
+        self.assertEqual(len(fake), 0)
+        self.assertEqual(metrics.REGISTRY.counters[(metrics.CACHE_INVALIDATIONS, (("cache", "fake"),))], 2)
+
+    def testTemporaryFilesAreIgnored(self):
+        fake = FakeCache()
+        caches.register_cache("fake", fake)
+        self.assertEqual(fswatch.file_changed(join(self.tmp_dir, "testpic.pack.tmp"), "poll"), 0)
+        self.assertEqual(len(fake), 2)
+        self.assertEqual(metrics.REGISTRY.counters, {})
+
+
+class TestWatch(unittest.TestCase):
+
+    def tearDown(self):
+        fswatch.WATCHED.clear()
+
+    def testResolvedOnce(self):
+        environ = {'VOD_CONF_DIR': "/nonexisting/vod_cfg", 'CONTENT_ROOT': "http://origin.example.com/content"}
+        self.assertIsNone(fswatch.watch(environ))
+        with mock.patch.object(fswatch.os.path, 'isdir') as isdir:
+            self.assertIsNone(fswatch.watch(environ))
+        isdir.assert_not_called()
+
+
+class TestInotifyWatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.changes = queue.Queue()
+        try:
+            self.watcher = fswatch.InotifyWatcher([self.tmp_dir], self.callback, timeout=0.05)
+        except OSError as exc:
+            shutil.rmtree(self.tmp_dir)
+            self.skipTest("No inotify: %s" % exc)
+        self.watcher.start()
+
+    def tearDown(self):
+        self.watcher.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def callback(self, path, watcher_type):
+        self.changes.put((path, watcher_type))
+
+    def wait_for_change(self, path):
+        "Return the changes up to and including the one of path."
+        changes = []
+        while not changes or changes[-1][0] != path:
+            changes.append(self.changes.get(timeout=5))
+        return changes
+
+    def testReplacedFile(self):
+        path = join(self.tmp_dir, "testpic.pack")
+        with open(path + ".tmp", 'wb') as ofh:
+            ofh.write(b"pack")
+        os.replace(path + ".tmp", path)
+        self.assertEqual(self.wait_for_change(path)[-1], (path, "inotify"))
+
+    def testNewDirectoryIsWatched(self):
+        sub_dir = join(self.tmp_dir, "testpic")
+        os.mkdir(sub_dir)
+        self.wait_for_change(sub_dir)  # The watch is added when the event for the directory is read
+        path = join(sub_dir, "testpic.cfg")
+        with open(path, 'w') as ofh:
+            ofh.write("[General]\n")
+        self.assertEqual(self.wait_for_change(path), [(path, "inotify")])
+
+    def testMovedDirectory(self):
+        old_dir = join(self.tmp_dir, "testpic")
+        new_dir = join(self.tmp_dir, "testpic_old")
+        os.mkdir(old_dir)
+        self.wait_for_change(old_dir)
+        os.rename(old_dir, new_dir)
+        self.assertEqual(self.wait_for_change(new_dir), [(old_dir, "inotify"), (new_dir, "inotify")])
+        self.assertEqual(sorted(self.watcher.watches.values()), [self.tmp_dir, new_dir])
+        path = join(new_dir, "testpic.cfg")
+        with open(path, 'w') as ofh:
+            ofh.write("[General]\n")
+        self.assertEqual(self.wait_for_change(path), [(path, "inotify")])
@@ -0,0 +1,94 @@
+# The copyright in this software is being made available under the BSD License,
+# included below. This software may be subject to other third party and contributor
+# rights, including patent rights, and no such rights are granted under this license.
+#
+# Copyright (c) 2026, Dash Industry Forum.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#  * Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation and/or
+#  other materials provided with the distribution.
+#  * Neither the name of Dash Industry Forum nor the names of its
+#  contributors may be used to endorse or promote products derived from this software
+#  without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS AS IS AND ANY
+#  EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+#  WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+#  INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+#  WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+
+import threading
+import unittest
+from wsgiref.simple_server import make_server
+
+from dashlivesim.benchmark import loadgen
+from dashlivesim.mod_wsgi.mod_dashlivesim import application, SendfileRequestHandler
+from dashlivesim.tests.dash_test_util import VOD_CONFIG_DIR, CONTENT_ROOT
+
+NOW = 1356998460
+SEG_NR = (NOW - 60) // 6  # Maps to 1.m4s, and SEG_NR + 1 to 2.m4s of V1
+
+
+class TestLoadGen(unittest.TestCase):
+
+    def testInProcessPlayers(self):
+        report = loadgen.run_load(nr_players=3, duration=6, clock_start=SEG_NR * 6 + 1, speed=100, ramp_up=0,
+                                  switch_probability=0,
+                                  mpd_paths=["/livesim/testpic/Manifest.mpd",
+                                             "/livesim/chunkdur_1/ato_5/testpic/Manifest.mpd",
+                                             "/livesim/segtimeline_1/testpic/Manifest.mpd"])
+        resources = report['resources']
+        self.assertEqual(resources['mpd']['statuses']['200'], 3)
+        self.assertGreater(resources['init']['statuses']['200'], 0)
+        self.assertGreater(resources['media_video']['statuses']['200'], 0)
+        self.assertEqual(report['total']['error_rate'], 0)
+        self.assertEqual(report['chunk_lateness']['chunks'] % 6, 0)  # Whole segments of 1s chunks
+        self.assertGreater(report['chunk_lateness']['chunks'], 0)
+
+    def testParseTimelineMpd(self):
+        mpd = (b'<MPD xmlns="urn:mpeg:dash:schema:mpd:2011" type="dynamic" minimumUpdatePeriod="PT0S" '
+               b'availabilityStartTime="1970-01-01T00:00:00Z"><BaseURL>http://host/livesim/x/</BaseURL>'
+               b'<Period start="PT0S"><AdaptationSet contentType="video"><SegmentTemplate timescale="10" '
+               b'media="$RepresentationID$/t$Time$.m4s" initialization="$RepresentationID$/init.mp4">'
+               b'<SegmentTimeline><S t="100" d="20" r="2"/><S d="10"/></SegmentTimeline></SegmentTemplate>'
+               b'<Representation id="V1" bandwidth="100"/></AdaptationSet></Period></MPD>')
+        manifest = loadgen.parse_mpd(mpd, "/livesim/x/Manifest.mpd")
+        self.assertEqual(manifest.mup, 0)
+        self.assertEqual(manifest.base_path, "/livesim/x/")
+        template = manifest.adaptations[0].template
+        self.assertEqual(template.timeline, (4, 160, 10))
+        self.assertEqual(loadgen.fill_template(template.media, "V1", 100, time=160), "V1/t160.m4s")
+        self.assertEqual(loadgen.fill_template("$Number%05d$.m4s", "V1", 100, number=7), "00007.m4s")
+
+    def testChunkTimer(self):
+        timer = loadgen.ChunkTimer(loadgen.VirtualClock(NOW, speed=0))
+        data = (b"\x00\x00\x00\x10moof" + b"x" * 8 + b"\x00\x00\x00\x0cmdat" + b"yyyy") * 2
+        for i in range(0, len(data), 5):
+            timer.feed(data[i:i + 5])
+        self.assertEqual(timer.times, [NOW, NOW])
+
+    def testHttpServer(self):
+        def wrapper(environ, start_response):
+            environ.update(REQUEST_URI=environ['PATH_INFO'], VOD_CONF_DIR=VOD_CONFIG_DIR, CONTENT_ROOT=CONTENT_ROOT)
+            return application(environ, start_response)
+        httpd = make_server("127.0.0.1", 0, wrapper, handler_class=SendfileRequestHandler)
+        thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
+        try:
+            report = loadgen.run_load(nr_players=1, duration=0.5, ramp_up=0, server=("127.0.0.1", httpd.server_port))
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+        self.assertEqual(report['resources']['mpd']['statuses'], {'200': 1})
+        self.assertGreater(report['total']['requests'], 1)
@@ -0,0 +1,80 @@
+# The copyright in this software is being made available under the BSD License,
+# included below. This software may be subject to other third party and contributor
+# rights, including patent rights, and no such rights are granted under this license.
+#
+# Copyright (c) 2026, Dash Industry Forum.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#  * Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation and/or
+#  other materials provided with the distribution.
+#  * Neither the name of Dash Industry Forum nor the names of its
+#  contributors may be used to endorse or promote products derived from this software
+#  without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS AS IS AND ANY
+#  EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+#  WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+#  INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+#  WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+
+import unittest
+
+from dashlivesim.benchmark import logreplay
+
+NOW = 1356998460
+SEG_NR = (NOW - 60) // 6  # Maps to 1.m4s
+
+LOG_LINES = [
+    '127.0.0.1 - - [01/Jan/2013:00:00:06 +0000] "GET /livesim/testpic/V1/init.mp4 HTTP/1.1" 200 800 "-" "player"',
+    '127.0.0.1 - - [01/Jan/2013:00:00:06 +0000] "GET /livesim/testpic/V1/%d.m4s HTTP/1.1" 200 80000' % SEG_NR,
+    '127.0.0.1 - - [01/Jan/2013:00:00:05 +0000] "GET /livesim/testpic/Manifest.mpd HTTP/1.1" 200 2000',
+    '127.0.0.1 - - [01/Jan/2013:00:00:07 +0000] "POST /livesim/testpic/Manifest.mpd HTTP/1.1" 405 0',
+    '127.0.0.1 - - [01/Jan/2013:00:00:08 +0000] "GET /livesim/testpic/V1/%d.m4s HTTP/1.1" 200 0' % (SEG_NR + 10),
+    'not a log line',
+]
+
+
+class TestLogReplay(unittest.TestCase):
+
+    def testReadLog(self):
+        entries = list(logreplay.read_log(LOG_LINES))
+        self.assertEqual([e.time for e in entries], [NOW - 55, NOW - 54, NOW - 53.5, NOW - 52])
+        self.assertEqual(entries[0].path, "/livesim/testpic/Manifest.mpd")
+        self.assertEqual(len(list(logreplay.read_log(LOG_LINES, include=r"\.m4s$"))), 2)
+        local_entry, = logreplay.read_log(['127.0.0.1 - - [01/Jan/2013 00:00:05] "GET /x HTTP/1.1" 200 10'])
+        self.assertEqual(local_entry.path, "/x")
+
+    def testUrlPattern(self):
+        self.assertEqual(logreplay.url_pattern("/livesim/tsbd_30/testpic/V1/%d.m4s?x=1" % SEG_NR),
+                         "/livesim/tsbd_30/testpic/V1/$Number$.m4s")
+        self.assertEqual(logreplay.url_pattern("/livesim/start_1356998400/testpic/A1/t65135911680000.m4s"),
+                         "/livesim/start_N/testpic/A1/t$Time$.m4s")
+        self.assertEqual(logreplay.url_pattern("/livesim/periods_60/xlink_4/testpic/Manifest.mpd+p22616641.period"),
+                         "/livesim/periods_60/xlink_4/testpic/Manifest.mpd+p$Number$.period")
+
+    def testReplayAtLoggedTimes(self):
+        replay = logreplay.Replay(speed=0)
+        report = replay.run(list(logreplay.read_log(LOG_LINES)))
+        self.assertEqual(report['total']['requests'], 4)
+        segments = report['resources']["/livesim/testpic/V1/$Number$.m4s"]
+        self.assertEqual(segments['statuses'], {'200': 1, '404': 1})  # The second one is in the future
+        self.assertEqual(segments['status_mismatches'], 1)
+        lines = logreplay.compare(report, report)
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(lines[1].split()[3], "1.00")
+
+    def testAcceleratedReplay(self):
+        report = logreplay.Replay(speed=100, workers=2).run(list(logreplay.read_log(LOG_LINES)))
+        self.assertEqual(report['total']['requests'], 4)
+        self.assertEqual(report['total']['status_mismatches'], 1)
@@ -0,0 +1,139 @@
+# The copyright in this software is being made available under the BSD License,
+# included below. This software may be subject to other third party and contributor
+# rights, including patent rights, and no such rights are granted under this license.
+#
+# Copyright (c) 2026, Dash Industry Forum.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#  * Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation and/or
+#  other materials provided with the distribution.
+#  * Neither the name of Dash Industry Forum nor the names of its
+#  contributors may be used to endorse or promote products derived from this software
+#  without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS AS IS AND ANY
+#  EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+#  WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+#  INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+#  WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+import tracemalloc
+import unittest
+
+from dashlivesim.tests.dash_test_util import VOD_CONFIG_DIR, CONTENT_ROOT, wsgi_request
+from dashlivesim.dashlib import caches, memory, metrics
+from dashlivesim.mod_wsgi.mod_dashlivesim import application
+
+ADMIN_ENV = {'ADMIN_TOKENS': 'secret', 'HTTP_X_DASHLIVESIM_TOKEN': 'secret'}
+
+
+class FakeCache(object):
+
+    def __init__(self):
+        self.data = {'a': b'x' * 100, 'b': b'y' * 50}
+
+    def __len__(self):
+        return len(self.data)
+
+    def nbytes(self):
+        return sum(len(v) for v in self.data.values())
+
+    def clear(self):
+        self.data = {}
+
+
+class TestCacheRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = FakeCache()
+        caches.register_cache("fake", self.cache)
+
+    def tearDown(self):
+        del caches.CACHES["fake"]
+
+    def testStatsAndGauges(self):
+        self.assertIn(("fake", 2, 150), caches.cache_stats())
+        text = metrics.REGISTRY.render()
+        self.assertIn('# TYPE dashlivesim_cache_bytes gauge', text)
+        self.assertIn('dashlivesim_cache_bytes{cache="fake"} 150', text)
+        self.assertIn('dashlivesim_cache_entries{cache="fake"} 2', text)
+        self.assertIn('dashlivesim_cache_bytes{cache="chunks"}', text)
+
+    def testClear(self):
+        self.assertGreaterEqual(caches.clear_caches(), 2)
+        self.assertEqual(self.cache.nbytes(), 0)
+
+
+class TestMemoryTracking(unittest.TestCase):
+
+    def setUp(self):
+        metrics.REGISTRY.reset()
+        memory._previous['snapshot'] = None
+
+    def tearDown(self):
+        tracemalloc.stop()
+        memory._previous['snapshot'] = None
+
+    def testPeakPerResource(self):
+        env = {'METRICS': '1', 'MEMORY_TRACKING': '1'}
+        wsgi_request(application, "/livesim/segtimeline_1/testpic/Manifest.mpd", env)
+        self.assertTrue(tracemalloc.is_tracing())
+        histogram = metrics.REGISTRY.histograms[(metrics.PEAK_BYTES, (("resource", "mpd"),
+                                                                       ("flags", "segtimeline")))]
+        self.assertEqual(histogram.count, 1)
+        self.assertGreater(histogram.sum, 10000)  # The MPD tree is at least that big
+
+    def testOneRequestMeasuredAtATime(self):
+        first = metrics.RequestMetrics("media")
+        second = metrics.RequestMetrics("mpd")
+        memory.track_request(first, {})
+        memory.track_request(second, {})  # Not measured, since it would reset the peak of the first
+        self.assertEqual(len(second.response_hooks), 0)
+        metrics.end_request(first, 200)
+        memory.track_request(second, {})
+        metrics.end_request(second, 200)
+        names = [(name, labels[0][1]) for name, labels in metrics.REGISTRY.histograms]
+        self.assertIn((metrics.PEAK_BYTES, "media"), names)
+        self.assertIn((metrics.PEAK_BYTES, "mpd"), names)
+
+    def testChunkedResponseClosedEarly(self):
+        env = {'METRICS': '1', 'MEMORY_TRACKING': '1'}
+        environ = {'HTTP_HOST': 'streamtest.eu', 'REQUEST_URI': "/livesim/chunkdur_1/ato_inf/testpic/A1/0.m4s",
+                   'REQUEST_METHOD': 'GET', 'VOD_CONF_DIR': VOD_CONFIG_DIR, 'CONTENT_ROOT': CONTENT_ROOT}
+        environ.update(env)
+        result = application(environ, lambda status, headers: None)
+        result.close()  # Before the first chunk, as a server does when the client has gone
+        wsgi_request(application, "/livesim/testpic/Manifest.mpd", env)
+        names = [(name, labels[0][1]) for name, labels in metrics.REGISTRY.histograms]
+        self.assertIn((metrics.PEAK_BYTES, "media"), names)
+        self.assertIn((metrics.PEAK_BYTES, "mpd"), names)
+
+    def testNotTrackedByDefault(self):
+        wsgi_request(application, "/livesim/testpic/Manifest.mpd", {'METRICS': '1'})
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertNotIn(metrics.PEAK_BYTES, [name for name, _ in metrics.REGISTRY.histograms])
+
+    def testSnapshotEndpoint(self):
+        status, _, _ = wsgi_request(application, "/livesim/memory")
+        self.assertEqual(status, "403 Forbidden")
+        status, _, body = wsgi_request(application, "/livesim/memory", ADMIN_ENV)
+        self.assertEqual(status, "200 OK")
+        self.assertIn(b"Started now", body)
+        _, _, body = wsgi_request(application, "/livesim/memory?top=3", ADMIN_ENV)
+        self.assertIn(b"Top 3 allocations by lineno:", body)
+        self.assertIn(b"chunks", body)
+        _, _, body = wsgi_request(application, "/livesim/memory?top=3&key=filename", ADMIN_ENV)
+        self.assertIn(b"Top 3 differences by filename since previous report:", body)
+        self.assertLessEqual(len(body.split(b"Top 3")[1].splitlines()), 4)
+        status, _, _ = wsgi_request(application, "/livesim/memory?key=size", ADMIN_ENV)
+        self.assertEqual(status, "400 Bad Request")
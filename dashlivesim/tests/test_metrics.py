@@ -0,0 +1,170 @@
+# The copyright in this software is being made available under the BSD License,
+# included below. This software may be subject to other third party and contributor
+# rights, including patent rights, and no such rights are granted under this license.
+#
+# Copyright (c) 2026, Dash Industry Forum.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#  * Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation and/or
+#  other materials provided with the distribution.
+#  * Neither the name of Dash Industry Forum nor the names of its
+#  contributors may be used to endorse or promote products derived from this software
+#  without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS AS IS AND ANY
+#  EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+#  WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+#  INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+#  WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+from unittest import mock
+
+from dashlivesim.tests.dash_test_util import wsgi_request
+from dashlivesim.dashlib import metrics
+from dashlivesim.dashlib.metrics import MetricsRegistry, Histogram
+from dashlivesim.mod_wsgi import mod_dashlivesim
+from dashlivesim.mod_wsgi.mod_dashlivesim import application
+
+METRICS_ENV = {'METRICS': '1'}
+
+
+class TestRegistry(unittest.TestCase):
+
+    def testHistogramBuckets(self):
+        histogram = Histogram((0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(value)
+        self.assertEqual(histogram.counts, [2, 1, 1])
+        self.assertEqual(histogram.count, 4)
+
+    def testRender(self):
+        registry = MetricsRegistry()
+        registry.inc(metrics.REQUESTS, (("resource", "mpd"),))
+        registry.observe("x_seconds", (("stage", "filter"),), 0.002)
+        text = registry.render()
+        self.assertIn('# TYPE dashlivesim_requests_total counter', text)
+        self.assertIn('dashlivesim_requests_total{resource="mpd"} 1', text)
+        self.assertIn('x_seconds_bucket{stage="filter",le="0.0025"} 1', text)
+        self.assertIn('x_seconds_bucket{stage="filter",le="+Inf"} 1', text)
+        self.assertIn('x_seconds_count{stage="filter"} 1', text)
+
+    def testStagesOnlyRecordedForMeasuredRequest(self):
+        self.assertIs(metrics.stage("filter"), metrics.NO_STAGE)
+        registry = MetricsRegistry()
+        request = metrics.begin_request("media")
+        with metrics.stage("filter"):
+            pass
+        metrics.end_request(request, 200, registry)
+        self.assertIsNone(metrics.current_request())
+        self.assertEqual(request.stages[0][0], "filter")
+        self.assertEqual(registry.counters[(metrics.REQUESTS, (("resource", "media"), ("flags", "none"),
+                                                               ("status", "200")))], 1)
+
+
+class TestMetricsEndpoint(unittest.TestCase):
+
+    def setUp(self):
+        metrics.REGISTRY.reset()
+
+    def testDisabled(self):
+        status, _, _ = wsgi_request(application, "/livesim/metrics")
+        self.assertEqual(status, "404 Not Found")
+        wsgi_request(application, "/livesim/ato_inf/testpic/V1/0.m4s")
+        self.assertEqual(metrics.REGISTRY.counters, {})
+
+    def testStagesPerResourceAndFlags(self):
+        wsgi_request(application, "/livesim/ato_inf/testpic/V1/0.m4s", METRICS_ENV)
+        wsgi_request(application, "/livesim/segtimeline_1/testpic/Manifest.mpd", METRICS_ENV)
+        status, headers, body = wsgi_request(application, "/livesim/metrics", METRICS_ENV)
+        self.assertEqual(status, "200 OK")
+        self.assertEqual(headers['Content-Type'], metrics.CONTENT_TYPE)
+        text = body.decode('utf-8')
+        for stage in ("config", "cfg_read", "read", "filter"):
+            self.assertIn('dashlivesim_stage_duration_seconds_count{stage="%s",resource="media",flags="ato"} 1'
+                          % stage, text)
+        for stage in ("config", "mpd_build", "mpd_serialize"):
+            self.assertIn('dashlivesim_stage_duration_seconds_count{stage="%s",resource="mpd",flags="segtimeline"} 1'
+                          % stage, text)
+        self.assertIn('dashlivesim_requests_total{resource="media",flags="ato",status="200"} 1', text)
+
+    def testChunkedResponse(self):
+        status, _, _ = wsgi_request(application, "/livesim/chunkdur_1/ato_inf/testpic/A1/0.m4s", METRICS_ENV)
+        self.assertEqual(status, "200 OK")
+        text = metrics.REGISTRY.render()
+        self.assertIn('dashlivesim_stage_duration_seconds_count{stage="chunk",resource="media",flags="ato+chunkdur"}',
+                      text)
+        self.assertIn('dashlivesim_requests_total{resource="media",flags="ato+chunkdur",status="200"} 1', text)
+
+    def testFailedRequest(self):
+        with mock.patch.object(mod_dashlivesim, 'handle_request', side_effect=RuntimeError("Failed")):
+            with self.assertRaises(RuntimeError):
+                wsgi_request(application, "/livesim/ato_inf/testpic/V1/0.m4s", METRICS_ENV)
+        self.assertIsNone(metrics.current_request())
+        self.assertIn('dashlivesim_requests_total{resource="media",flags="none",status="500"} 1',
+                      metrics.REGISTRY.render())
+
+    def testFailedChunkedResponse(self):
+        def chunks():
+            yield b"chunk"
+            raise IOError("Segment removed")
+
+        request = metrics.begin_request("media")
+        with self.assertRaises(IOError):
+            list(metrics.iterate_measured(request, chunks(), 200))
+        self.assertIn('dashlivesim_requests_total{resource="media",flags="none",status="500"} 1',
+                      metrics.REGISTRY.render())
+
+    def testBadTraceSampleRate(self):
+        env = dict(METRICS_ENV, TRACE_SAMPLE_RATE="often")
+        status, _, _ = wsgi_request(application, "/livesim/ato_inf/testpic/V1/0.m4s", env)
+        self.assertEqual(status, "200 OK")
+        self.assertIn('dashlivesim_requests_total{resource="media",flags="ato",status="200"} 1',
+                      metrics.REGISTRY.render())
+
+
+class TestServerTiming(unittest.TestCase):
+
+    def setUp(self):
+        metrics.REGISTRY.reset()
+
+    def testOffByDefault(self):
+        _, headers, _ = wsgi_request(application, "/livesim/ato_inf/testpic/V1/0.m4s")
+        self.assertNotIn('Server-Timing', headers)
+
+    def testUrlOption(self):
+        status, headers, _ = wsgi_request(application, "/livesim/servertiming_1/ato_inf/testpic/V1/0.m4s")
+        self.assertEqual(status, "200 OK")
+        names = [part.split(";")[0] for part in headers['Server-Timing'].split(", ")]
+        self.assertEqual(names, ["cfg_read", "config", "read", "filter", "total"])
+        self.assertEqual(headers['Timing-Allow-Origin'], '*')
+        self.assertEqual(metrics.REGISTRY.counters, {})  # Metrics are still disabled
+
+    def testSameStagesAsMetrics(self):
+        env = {'SERVER_TIMING': '1', 'METRICS': '1'}
+        _, headers, _ = wsgi_request(application, "/livesim/segtimeline_1/testpic/Manifest.mpd", env)
+        text = metrics.REGISTRY.render()
+        for part in headers['Server-Timing'].split(", ")[:-1]:
+            stage, duration = part.split(";dur=")
+            seconds = float(duration) / 1000
+            line = 'dashlivesim_stage_duration_seconds_sum{stage="%s",resource="mpd",flags="segtimeline"}' % stage
+            self.assertIn(line, text)
+            recorded = float(text.split(line)[1].split()[0])
+            self.assertAlmostEqual(recorded, seconds, places=6)
+
+    def testCacheMarkers(self):
+        request = metrics.RequestMetrics("media", record=False, server_timing=True)
+        request.cache_lookups.append(("chunks", True))
+        request.add_stage("filter", 0.0015)
+        self.assertTrue(request.server_timing_header().startswith('filter;dur=1.500, chunks-cache;desc="hit", '
+                                                                  'total;dur='))
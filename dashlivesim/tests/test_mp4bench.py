@@ -0,0 +1,90 @@
+# The copyright in this software is being made available under the BSD License,
+# included below. This software may be subject to other third party and contributor
+# rights, including patent rights, and no such rights are granted under this license.
+#
+# Copyright (c) 2026, Dash Industry Forum.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#  * Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation and/or
+#  other materials provided with the distribution.
+#  * Neither the name of Dash Industry Forum nor the names of its
+#  contributors may be used to endorse or promote products derived from this software
+#  without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS AS IS AND ANY
+#  EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+#  WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+#  INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+#  WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+import gc
+import sys
+import unittest
+
+from dashlivesim.benchmark import mp4bench
+from dashlivesim.dashlib.mediasegmentfilter import MediaSegmentFilter
+from dashlivesim.dashlib.mp4 import index_boxes, mp4
+
+
+class TestMp4Bench(unittest.TestCase):
+
+    def testSyntheticSegment(self):
+        root = mp4(mp4bench.make_segment(100))
+        trun = root.find(b'moof.traf.trun')
+        self.assertEqual(trun.sample_count, 100)
+        self.assertEqual(trun.total_duration, 100 * mp4bench.SAMPLE_DURATION)
+        self.assertEqual(root.find(b'mdat').size, 8 + 100 * mp4bench.SAMPLE_SIZE)
+        self.assertEqual(trun.sample_entry(1)['time_offset'], mp4bench.SAMPLE_DURATION)
+
+    def testTrunSamples(self):
+        trun = mp4(mp4bench.make_segment(100)).find(b'moof.traf.trun')
+        samples = list(trun.samples())
+        self.assertEqual(len(samples), 100)
+        for i, (duration, size, flags, time_offset) in enumerate(samples):
+            entry = trun.sample_entry(i)
+            self.assertEqual((duration, size, "0x%x" % flags, time_offset),
+                             (entry['duration'], entry['size'], entry['flags'], entry['time_offset']))
+
+    def testIndexBoxes(self):
+        data = mp4bench.make_segment(100)
+        index = index_boxes(data)
+        root = mp4(data)
+        for path in (b'styp', b'moof', b'moof.traf.tfhd', b'moof.traf.trun', b'mdat'):
+            found = root.find(path)
+            self.assertEqual(index[path], [(found.offset, found.size)], path)
+
+    def testLazyParseIsConstantSize(self):
+        "Parsing the moof path and summing the durations should not make objects per sample."
+
+        def count_blocks(nr_samples):
+            data = mp4bench.make_segment(nr_samples)
+            gc.collect()
+            blocks = sys.getallocatedblocks()
+            trun = mp4(data, recurse=False).find(b'moof.traf.trun')
+            self.assertEqual(trun.total_duration, nr_samples * mp4bench.SAMPLE_DURATION)
+            return sys.getallocatedblocks() - blocks
+
+        self.assertLess(count_blocks(5000), count_blocks(50) + 20)
+
+    def testFilterTrunDuration(self):
+        segment_filter = MediaSegmentFilter(None, offset=2**32, track_timescale=1)
+        segment_filter.data = mp4bench.make_segment(600)
+        trun = mp4(segment_filter.data).find(b'moof.traf.trun')
+        output = mp4(segment_filter.filter())
+        self.assertEqual(segment_filter.duration, 600 * mp4bench.SAMPLE_DURATION)
+        self.assertEqual(output.find(b'moof.traf.trun').data_offset,
+                         trun.data_offset + output.find(b'moof').size - trun.parent.parent.size)
+
+    def testCasesRun(self):
+        for case in mp4bench.CASES:
+            self.assertTrue(case.run(10)(), case.name)
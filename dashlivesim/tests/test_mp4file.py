@@ -0,0 +1,108 @@
+# The copyright in this software is being made available under the BSD License,
+# included below. This software may be subject to other third party and contributor
+# rights, including patent rights, and no such rights are granted under this license.
+#
+# Copyright (c) 2026, Dash Industry Forum.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#  * Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation and/or
+#  other materials provided with the distribution.
+#  * Neither the name of Dash Industry Forum nor the names of its
+#  contributors may be used to endorse or promote products derived from this software
+#  without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS AS IS AND ANY
+#  EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+#  WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+#  INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+#  WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+import io
+import mmap
+import unittest
+from os.path import join
+
+from dashlivesim.benchmark import mp4bench
+from dashlivesim.dashlib import chunker
+from dashlivesim.dashlib.initsegmentfilter import InitFilter
+from dashlivesim.dashlib.mediasegmentfilter import MediaSegmentFilter
+from dashlivesim.dashlib.mp4 import mp4, mp4_file
+from dashlivesim.tests.dash_test_util import CONTENT_ROOT
+from dashlivesim.vodanalyzer.dashanalyzer import read_segment_timing
+
+SEGMENT = join(CONTENT_ROOT, "testpic/V1/2.m4s")
+
+
+class CountingBytesIO(io.BytesIO):
+    "BytesIO that counts the bytes read."
+
+    def __init__(self, data):
+        io.BytesIO.__init__(self, data)
+        self.nr_read = 0
+
+    def read(self, size=-1):
+        data = io.BytesIO.read(self, size)
+        self.nr_read += len(data)
+        return data
+
+    def readinto(self, buffer):
+        nr_read = io.BytesIO.readinto(self, buffer)
+        self.nr_read += nr_read
+        return nr_read
+
+
+class TestMp4File(unittest.TestCase):
+
+    def testFindInFile(self):
+        with open(SEGMENT, 'rb') as ifh:
+            moof = mp4_file(ifh).find(b'moof')
+        segment_filter = MediaSegmentFilter(SEGMENT)
+        segment_filter.filter()
+        self.assertEqual(moof.find(b'traf.tfdt').decode_time, segment_filter.get_tfdt_value())
+        self.assertEqual(moof.find(b'traf.trun').total_duration, segment_filter.get_duration())
+
+    def testOnlyHeadersAndRequestedBoxesAreRead(self):
+        data = mp4bench.make_segment(100, sample_size=100000)
+        ifh = CountingBytesIO(data)
+        trun = mp4_file(ifh).find(b'moof.traf.trun')
+        self.assertEqual(trun.sample_count, 100)
+        self.assertLess(ifh.nr_read, 2 * trun.size)
+        mdat = mp4(data).find(b'mdat')
+        self.assertEqual(mp4_file(ifh).index(b'mdat'), [(mdat.offset, mdat.size)])
+
+    def testMmap(self):
+        with open(SEGMENT, 'rb') as ifh:
+            with mmap.mmap(ifh.fileno(), 0, access=mmap.ACCESS_READ) as fmap:
+                from_mmap = mp4_file(fmap).index(b'moof.traf.tfdt')
+                from_file = mp4_file(ifh).index(b'moof.traf.tfdt')
+        self.assertEqual(from_mmap, from_file)
+        self.assertEqual(len(from_file), 1)
+
+    def testSegmentTiming(self):
+        self.assertEqual(read_segment_timing(SEGMENT, None), (540000, 540000))
+
+    def testMappedFilter(self):
+        filters = [MediaSegmentFilter(SEGMENT, 2, 6, 1200, track_timescale=90000, mmap_reads=mmap_reads)
+                   for mmap_reads in (False, True)]
+        self.assertIsInstance(filters[1].data, memoryview)
+        self.assertEqual(filters[0].filter(), filters[1].filter())
+
+    def testDecodeFragmentSlices(self):
+        trex = InitFilter(join(CONTENT_ROOT, "testpic/V1/init.mp4"))
+        trex.filter()
+        with open(SEGMENT, 'rb') as ifh:
+            data = ifh.read()
+        samples = list(chunker.decode_fragment(data, trex))
+        self.assertTrue(all(isinstance(sample.data, memoryview) for sample in samples))
+        mdat = mp4(data).find(b'mdat')
+        self.assertEqual(b"".join(sample.data for sample in samples), data[mdat.offset + 8:mdat.offset + mdat.size])
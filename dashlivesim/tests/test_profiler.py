@@ -0,0 +1,100 @@
+# The copyright in this software is being made available under the BSD License,
+# included below. This software may be subject to other third party and contributor
+# rights, including patent rights, and no such rights are granted under this license.
+#
+# Copyright (c) 2026, Dash Industry Forum.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#  * Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation and/or
+#  other materials provided with the distribution.
+#  * Neither the name of Dash Industry Forum nor the names of its
+#  contributors may be used to endorse or promote products derived from this software
+#  without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS AS IS AND ANY
+#  EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+#  WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+#  INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+#  WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+import os
+import pstats
+import shutil
+import tempfile
+import unittest
+
+from dashlivesim.tests.dash_test_util import wsgi_request
+from dashlivesim.dashlib import profiler
+from dashlivesim.mod_wsgi.mod_dashlivesim import application
+
+MPD_PATH = "/livesim/periods_60/xlink_4/segtimeline_1/tsbd_7200/testpic/Manifest.mpd"
+
+
+class TestAuthorization(unittest.TestCase):
+
+    def testTokens(self):
+        env = {'ADMIN_TOKENS': 'abc, secret', 'HTTP_X_DASHLIVESIM_TOKEN': 'secret'}
+        self.assertTrue(profiler.is_authorized(env))
+        env['HTTP_X_DASHLIVESIM_TOKEN'] = 'other'
+        self.assertFalse(profiler.is_authorized(env))
+        self.assertFalse(profiler.is_authorized({'HTTP_X_DASHLIVESIM_TOKEN': 'secret'}))
+        self.assertFalse(profiler.is_authorized({'ADMIN_TOKENS': '', 'HTTP_X_DASHLIVESIM_TOKEN': ''}))
+
+    def testMode(self):
+        env = {'ADMIN_TOKENS': 'secret', 'HTTP_X_DASHLIVESIM_TOKEN': 'secret',
+               'HTTP_X_DASHLIVESIM_PROFILE': 'Collapsed'}
+        self.assertEqual(profiler.requested_mode(env), profiler.COLLAPSED)
+        env['HTTP_X_DASHLIVESIM_PROFILE'] = 'flame'
+        self.assertIsNone(profiler.requested_mode(env))
+
+
+class TestProfiledRequests(unittest.TestCase):
+
+    def setUp(self):
+        self.profile_dir = tempfile.mkdtemp()
+        self.env = {'ADMIN_TOKENS': 'secret', 'HTTP_X_DASHLIVESIM_TOKEN': 'secret',
+                    'PROFILE_DIR': self.profile_dir}
+
+    def tearDown(self):
+        shutil.rmtree(self.profile_dir)
+
+    def testPstats(self):
+        _, _, normal_body = wsgi_request(application, MPD_PATH)
+        self.env['HTTP_X_DASHLIVESIM_PROFILE'] = 'pstats'
+        status, headers, body = wsgi_request(application, MPD_PATH, self.env)
+        self.assertEqual(status, "200 OK")
+        self.assertEqual(len(body), len(normal_body))
+        self.assertEqual(int(headers['Content-Length']), len(body))
+        file_name = headers[profiler.PROFILE_FILE_HEADER]
+        self.assertEqual(os.listdir(self.profile_dir), [file_name])
+        stats = pstats.Stats(os.path.join(self.profile_dir, file_name))
+        self.assertTrue(any(func[2] == 'generate_dynamic_mpd' for func in stats.stats))
+
+    def testCollapsed(self):
+        self.env['HTTP_X_DASHLIVESIM_PROFILE'] = 'collapsed'
+        status, headers, body = wsgi_request(application, "/livesim/ato_inf/testpic/V1/0.m4s", self.env)
+        self.assertEqual(status, "200 OK")
+        self.assertEqual(headers['Content-Type'], 'text/plain')
+        lines = body.decode('utf-8').splitlines()
+        self.assertTrue(any("handle_request;" in line and "filter" in line for line in lines))
+        for line in lines:
+            stack, micro_seconds = line.rsplit(" ", 1)
+            int(micro_seconds)
+
+    def testUnauthorizedNotProfiled(self):
+        self.env['HTTP_X_DASHLIVESIM_PROFILE'] = 'pstats'
+        self.env['HTTP_X_DASHLIVESIM_TOKEN'] = 'guess'
+        status, headers, _ = wsgi_request(application, MPD_PATH, self.env)
+        self.assertEqual(status, "200 OK")
+        self.assertNotIn(profiler.PROFILE_FILE_HEADER, headers)
+        self.assertEqual(os.listdir(self.profile_dir), [])
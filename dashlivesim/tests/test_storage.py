@@ -0,0 +1,160 @@
+# The copyright in this software is being made available under the BSD License,
+# included below. This software may be subject to other third party and contributor
+# rights, including patent rights, and no such rights are granted under this license.
+#
+# Copyright (c) 2026, Dash Industry Forum.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#  * Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation and/or
+#  other materials provided with the distribution.
+#  * Neither the name of Dash Industry Forum nor the names of its
+#  contributors may be used to endorse or promote products derived from this software
+#  without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS AS IS AND ANY
+#  EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+#  WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+#  INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+#  WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from dashlivesim.benchmark.wsgibench import NOW, SEG_NR
+from dashlivesim.dashlib import caches, storage
+from dashlivesim.dashlib.clock import CLOCK_ENVIRON_KEY, VirtualClock
+from dashlivesim.mod_wsgi.mod_dashlivesim import application
+from dashlivesim.tests.dash_test_util import CONTENT_ROOT, VOD_CONFIG_DIR, wsgi_request
+
+PATHS = ["/livesim/testpic/Manifest.mpd",
+         "/livesim/segtimeline_1/testpic/Manifest.mpd",
+         "/livesim/testpic/V1__A1/init.mp4",
+         "/livesim/testpic/V1/%d.m4s" % SEG_NR,
+         "/livesim/chunkdur_1/testpic/A1/%d.m4s" % SEG_NR]
+
+
+class OriginHandler(SimpleHTTPRequestHandler):
+    "Static files over keep-alive connections. The connections are counted by the server."
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        SimpleHTTPRequestHandler.setup(self)
+        self.server.nr_connections += 1
+
+    def log_message(self, *args):
+        pass
+
+
+class TestHttpStorage(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), partial(OriginHandler, directory=CONTENT_ROOT))
+        self.server.nr_connections = 0
+        self.server.block_on_close = False  # Do not wait for idle keep-alive connections
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+        self.origin = "http://127.0.0.1:%d/" % self.server.server_port
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache = storage.DiskCache(self.cache_dir, 10 * 1024 * 1024)
+
+    def tearDown(self):
+        for pool in storage.POOLS.values():
+            pool.close()
+        storage.POOLS.clear()
+        storage.STORAGES.clear()
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.cache_dir)
+
+    def testReadThroughCache(self):
+        origin = storage.HttpStorage(self.origin + "testpic", self.cache)
+        with open(os.path.join(CONTENT_ROOT, "testpic", "V1", "init.mp4"), 'rb') as ifh:
+            expected = ifh.read()
+        self.assertEqual(origin.read("V1/init.mp4"), expected)
+        self.assertEqual(origin.extent("V1/init.mp4").size, len(expected))
+        self.assertEqual(origin.read("A1/init.mp4")[:8], expected[:8])
+        self.assertEqual(len(self.cache), 2)
+        self.server.shutdown()  # Cached files are read without the origin
+        self.assertEqual(origin.read("V1/init.mp4"), expected)
+        self.assertEqual(self.server.nr_connections, 1)
+
+    def testNotFound(self):
+        origin = storage.HttpStorage(self.origin, self.cache)
+        with self.assertRaises(FileNotFoundError):
+            origin.read("testpic/nonexisting.m4s")
+        self.assertFalse(origin.exists("testpic/nonexisting.m4s"))
+        self.assertTrue(origin.content("testpic").exists("Manifest.mpd"))
+        self.assertEqual(len(self.cache), 1)
+
+    def testCacheIsBounded(self):
+        cache = storage.DiskCache(self.cache_dir, 2500)
+        for name in ("a", "b", "c"):
+            cache.put(name, name.encode('utf-8') * 1000)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(sorted(os.listdir(self.cache_dir)), ["b", "c"])
+        self.assertEqual(cache.nbytes(), 2000)
+        self.assertIsNotNone(cache.get("b"))  # c is now the least recently used
+        cache.put("d", b"d" * 1000)
+        self.assertEqual(sorted(os.listdir(self.cache_dir)), ["b", "d"])
+        self.assertEqual(len(storage.DiskCache(self.cache_dir, 2500)), 2)  # E.g. after a restart
+        cache.clear()
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def testResponsesFromOrigin(self):
+        clock = VirtualClock(NOW, speed=0)
+        origin_environ = {'CONTENT_ROOT': self.origin, 'VOD_CONF_DIR': self.origin + "vod_cfg",
+                          storage.CACHE_DIR_ENV: self.cache_dir, CLOCK_ENVIRON_KEY: clock}
+        try:
+            for path in PATHS:
+                expected = wsgi_request(application, path, {CLOCK_ENVIRON_KEY: clock})
+                self.assertEqual(expected[0], "200 OK", path)
+                self.assertEqual(wsgi_request(application, path, origin_environ), expected, path)
+            self.assertIsInstance(storage.get_storage(self.origin), storage.HttpStorage)
+            self.assertEqual(self.server.nr_connections, 1)  # The connection is kept alive between requests
+        finally:
+            storage.DISK_CACHES.pop(self.cache_dir).clear()
+            del caches.CACHES["storage:" + self.cache_dir]
+
+    def testEvictionWhileSending(self):
+        clock = VirtualClock(NOW, speed=0)
+        path = "/livesim/testpic/V1/%d.m4s" % SEG_NR
+        origin_environ = {'CONTENT_ROOT': self.origin, 'VOD_CONF_DIR': self.origin + "vod_cfg",
+                          storage.CACHE_DIR_ENV: self.cache_dir, CLOCK_ENVIRON_KEY: clock}
+
+        def evicting_application(environ, start_response):
+            "Remove all cached files when the headers are sent."
+            def evicting_start_response(status, headers):
+                storage.DISK_CACHES[self.cache_dir].clear()
+                return start_response(status, headers)
+            return application(environ, evicting_start_response)
+
+        try:
+            expected = wsgi_request(application, path, {CLOCK_ENVIRON_KEY: clock})
+            self.assertEqual(wsgi_request(evicting_application, path, origin_environ), expected)
+            self.assertEqual(os.listdir(self.cache_dir), [])
+        finally:
+            storage.DISK_CACHES.pop(self.cache_dir).clear()
+            del caches.CACHES["storage:" + self.cache_dir]
+
+    def testLocalStorage(self):
+        local = storage.get_storage(VOD_CONFIG_DIR)
+        self.assertIsInstance(local, storage.LocalStorage)
+        self.assertIs(storage.get_storage(local), local)
+        self.assertEqual(local.extent("testpic.cfg").path, os.path.join(VOD_CONFIG_DIR, "testpic.cfg"))
+        self.assertFalse(local.exists("nonexisting.cfg"))
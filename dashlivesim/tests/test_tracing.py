@@ -0,0 +1,121 @@
+# The copyright in this software is being made available under the BSD License,
+# included below. This software may be subject to other third party and contributor
+# rights, including patent rights, and no such rights are granted under this license.
+#
+# Copyright (c) 2026, Dash Industry Forum.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#  * Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation and/or
+#  other materials provided with the distribution.
+#  * Neither the name of Dash Industry Forum nor the names of its
+#  contributors may be used to endorse or promote products derived from this software
+#  without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS AS IS AND ANY
+#  EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+#  WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+#  INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+#  WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from dashlivesim.tests.dash_test_util import wsgi_request
+from dashlivesim.dashlib import metrics, tracing
+from dashlivesim.dashlib.tracing import TraceWriter, TracingError
+from dashlivesim.mod_wsgi.mod_dashlivesim import application
+
+
+def read_events(path):
+    "Read a trace file without closing bracket."
+    with open(path) as ifh:
+        return json.loads(ifh.read().rstrip().rstrip(",") + "]")
+
+
+class TestTraceWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.trace_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.trace_dir, "trace.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.trace_dir)
+
+    def testAppendAndRotate(self):
+        writer = TraceWriter(self.path, max_bytes=90, backups=2)  # Two events per file
+        for i in range(7):
+            writer.write([{'name': 'span%d' % i, 'args': {'box': b'moof.traf'}}])
+        self.assertEqual(sorted(os.listdir(self.trace_dir)), ["trace.json", "trace.json.1", "trace.json.2"])
+        newest = read_events(self.path)
+        self.assertEqual([event['name'] for event in newest], ['span6'])
+        self.assertEqual([event['name'] for event in read_events(self.path + ".2")], ['span2', 'span3'])
+        self.assertEqual(read_events(self.path + ".1")[0]['args']['box'], 'moof.traf')
+
+
+class TestSampling(unittest.TestCase):
+
+    def testSampleRate(self):
+        self.assertFalse(tracing.is_sampled({}))
+        self.assertFalse(tracing.is_sampled({'TRACE_SAMPLE_RATE': '0'}))
+        self.assertTrue(tracing.is_sampled({'TRACE_SAMPLE_RATE': '1'}))
+        self.assertRaises(TracingError, tracing.is_sampled, {'TRACE_SAMPLE_RATE': '2'})
+        self.assertRaises(TracingError, tracing.is_sampled, {'TRACE_SAMPLE_RATE': 'all'})
+
+    def testNoSpanWhenNotTraced(self):
+        self.assertIs(tracing.span("filter_box"), metrics.NO_STAGE)
+
+
+class TestTracedRequests(unittest.TestCase):
+
+    def setUp(self):
+        self.trace_dir = tempfile.mkdtemp()
+        self.env = {'TRACE_SAMPLE_RATE': '1', 'TRACE_DIR': self.trace_dir}
+
+    def tearDown(self):
+        shutil.rmtree(self.trace_dir)
+
+    def get_events(self):
+        self.assertEqual(len(os.listdir(self.trace_dir)), 1)
+        return read_events(os.path.join(self.trace_dir, os.listdir(self.trace_dir)[0]))
+
+    def testSegmentSpans(self):
+        _, headers, _ = wsgi_request(application, "/livesim/scte35_2/ato_inf/testpic/V1/0.m4s", self.env)
+        trace_id = headers[tracing.TRACE_ID_HEADER]
+        events = self.get_events()
+        names = set(event['name'] for event in events)
+        for name in ("request", "config", "filter", "filter_box", "process_trun", "create_scte35box"):
+            self.assertIn(name, names)
+        request = [event for event in events if event['name'] == 'request'][0]
+        self.assertEqual(request['args']['trace_id'], trace_id)
+        self.assertEqual(request['args']['status'], 200)
+        for event in events:  # All spans are within the request span
+            self.assertEqual(event['ph'], 'X')
+            self.assertGreaterEqual(event['ts'], request['ts'])
+            self.assertLessEqual(event['ts'] + event['dur'], request['ts'] + request['dur'] + 1)
+        boxes = [event['args']['box'] for event in events if event['name'] == 'filter_box']
+        self.assertIn("moof.traf.trun", boxes)
+
+    def testMpdSpans(self):
+        wsgi_request(application, "/livesim/periods_60/segtimeline_1/testpic/Manifest.mpd", self.env)
+        names = [event['name'] for event in self.get_events()]
+        self.assertGreater(names.count("period"), 1)
+        self.assertIn("segtimeline", names)
+
+    def testNotTracedWithoutSampling(self):
+        _, headers, _ = wsgi_request(application, "/livesim/ato_inf/testpic/V1/0.m4s",
+                                     {'TRACE_DIR': self.trace_dir})
+        self.assertNotIn(tracing.TRACE_ID_HEADER, headers)
+        self.assertEqual(os.listdir(self.trace_dir), [])
@@ -36,7 +36,9 @@ import time
 import re
 from struct import pack
 from dashlivesim.dashlib import configprocessor
-from dashlivesim.dashlib import initsegmentfilter, mediasegmentfilter
+from dashlivesim.dashlib import initsegmentfilter
+from dashlivesim.dashlib.contentpack import NO_SEGMENT_INFO, SegmentInfoError, segment_info
+from dashlivesim.dashlib.mp4 import mp4_file
 from dashlivesim.vodanalyzer.mpdprocessor import MpdProcessor
 
 DEFAULT_DASH_NAMESPACE = "urn:mpeg:dash:schema:mpd:2011"
@@ -59,6 +61,20 @@ class DashAnalyzerError(Exception):
     """Error in DashAnalyzer."""
 
 
+def read_segment_timing(segment_path, default_sample_duration):
+    """Return (tfdt, duration) of the last moof in a media segment.
+
+    Only the moof boxes are read from the file, and not the media data."""
+    with open(segment_path, 'rb') as ifh:
+        try:
+            info = segment_info(mp4_file(ifh), default_sample_duration)
+        except SegmentInfoError as exc:
+            raise DashAnalyzerError("%s in %s" % (exc, segment_path))
+    if info is NO_SEGMENT_INFO:
+        raise DashAnalyzerError("No moof in %s" % segment_path)
+    return info.tfdt, info.duration
+
+
 class DashAnalyzer(object):
 
     def __init__(self, mpd_filepath, verbose=1):
@@ -197,12 +213,7 @@ class DashAnalyzer(object):
                                       rep_id, rep_data['endNr'], rep_data['endTime'],
                                       rep_data['endTime']-rep_data['startTime']))
                             break
-                        msf = mediasegmentfilter.MediaSegmentFilter(
-                            segmentPath, default_sample_duration = rep_data[
-                                'default_sample_duration'])
-                        msf.filter()
-                        tfdt = msf.get_tfdt_value()
-                        duration = msf.get_duration()
+                        tfdt, duration = read_segment_timing(segmentPath, rep_data['default_sample_duration'])
                         print("{0} {1:8d} {2}  {3}".format(content_type, segNr, tfdt, duration))
                         if duration == lastDuration:
                             repeatCount += 1
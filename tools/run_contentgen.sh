@@ -0,0 +1,3 @@
+# Generate synthetic fMP4 content for scale testing
+export PYTHONPATH=${PYTHONPATH}:..
+python3 -m dashlivesim.benchmark.contentgen $*
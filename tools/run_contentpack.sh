@@ -0,0 +1,3 @@
+# Pack VoD content directories into archives that are served from a shared mapping
+export PYTHONPATH=${PYTHONPATH}:..
+python3 -m dashlivesim.dashlib.contentpack $*
@@ -0,0 +1,3 @@
+# Emulate DASH players against the simulator
+export PYTHONPATH=${PYTHONPATH}:..
+python3 -m dashlivesim.benchmark.loadgen $*
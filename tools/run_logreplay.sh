@@ -0,0 +1,3 @@
+# Replay access logs against the simulator
+export PYTHONPATH=${PYTHONPATH}:..
+python3 -m dashlivesim.benchmark.logreplay $*
@@ -0,0 +1,3 @@
+# Run the mp4 parser and boxes serializer microbenchmarks
+export PYTHONPATH=${PYTHONPATH}:..
+python3 -m dashlivesim.benchmark.mp4bench $*
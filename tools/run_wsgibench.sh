@@ -0,0 +1,3 @@
+# Run the end-to-end WSGI benchmark
+export PYTHONPATH=${PYTHONPATH}:..
+python3 -m dashlivesim.benchmark.wsgibench $*